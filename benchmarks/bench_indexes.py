@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+TR: Şema göçlerinden (idx_*) önce ve sonra sıcak sorgu gecikmesini ölçer.
+EN: Measures hot-path query latency before and after the schema migrations (idx_*).
+
+    python benchmarks/bench_indexes.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghost_db import ConnectionPool, run_migrations
+from ghost_blobstore import BlobStore
+
+# TR: Göç 4 (chain_stats) hazine cüzdanını ister; ölçülen sorguları etkilemez
+# EN: Migration 4 (chain_stats) needs the treasury wallet; it does not affect the measured queries
+TREASURY_KEY = "GhostTreasury_System"
+
+SCHEMA = [
+    "CREATE TABLE blocks (block_index INTEGER PRIMARY KEY, timestamp REAL, previous_hash TEXT, block_hash TEXT, proof INTEGER, miner_key TEXT)",
+    "CREATE TABLE assets (asset_id TEXT PRIMARY KEY, owner_pub_key TEXT, type TEXT, name TEXT, content BLOB, storage_size INTEGER, creation_time REAL, expiry_time REAL, keywords TEXT)",
+    "CREATE TABLE transactions (tx_id TEXT PRIMARY KEY, sender TEXT, recipient TEXT, amount REAL, timestamp REAL, block_index INTEGER DEFAULT 0)",
+    "CREATE TABLE mesh_peers (ip_address TEXT PRIMARY KEY, last_seen REAL)",
+    "CREATE TABLE messages (msg_id TEXT PRIMARY KEY, sender TEXT, recipient TEXT, content TEXT, asset_id TEXT, timestamp REAL, block_index INTEGER DEFAULT 0)",
+]
+
+def populate(pool, rows, users=5000):
+    rnd = random.Random(42)
+    keys = [f"GHST{i:020d}" for i in range(users)]
+    now = time.time()
+    blocks = max(rows // 200, 10)
+    with pool.write() as conn:
+        for ddl in SCHEMA: conn.execute(ddl)
+        conn.executemany("INSERT INTO blocks VALUES (?,?,?,?,?,?)",
+                         ((i, now - (blocks - i) * 600, f"{i - 1:064x}", f"{i:064x}", i * 7, rnd.choice(keys)) for i in range(1, blocks + 1)))
+        # TR: ~%1 bekleyen işlem, geri kalanı bloklara dağıtılmış
+        # EN: ~1% pending transactions, the rest spread across blocks
+        conn.executemany("INSERT INTO transactions VALUES (?,?,?,?,?,?)",
+                         ((f"tx{i:012d}", "GhostProtocol_System" if i % 50 == 0 else rnd.choice(keys), rnd.choice(keys),
+                           rnd.random() * 10, now - rnd.random() * 86400 * 365, 0 if i % 100 == 0 else 1 + i % blocks) for i in range(rows)))
+        conn.executemany("INSERT INTO messages VALUES (?,?,?,?,?,?,?)",
+                         ((f"m{i}", rnd.choice(keys[:200]), rnd.choice(keys[:200]), "aGk=", None, now - i, 0) for i in range(rows // 10)))
+        conn.executemany("INSERT INTO mesh_peers VALUES (?,?)", ((f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", now - rnd.random() * 86400) for i in range(20000)))
+        conn.executemany("INSERT INTO assets VALUES (?,?,?,?,?,?,?,?,?)",
+                         ((f"a{i}", rnd.choice(keys), 'file', f"f{i}.png", None, 0, now - i, now + 1e6, "") for i in range(rows // 20)))
+    return keys
+
+def queries(keys):
+    rnd = random.Random(7)
+    k = lambda: rnd.choice(keys)
+    return [
+        ("last_transactions (OR)", "SELECT * FROM transactions WHERE sender = ? OR recipient = ? ORDER BY timestamp DESC LIMIT 10", lambda: (lambda x: (x, x))(k())),
+        ("last_transactions (UNION)", "SELECT * FROM (SELECT * FROM transactions WHERE sender = ? ORDER BY timestamp DESC LIMIT 10) UNION SELECT * FROM (SELECT * FROM transactions WHERE recipient = ? ORDER BY timestamp DESC LIMIT 10) ORDER BY timestamp DESC LIMIT 10", lambda: (lambda x: (x, x))(k())),
+        ("pending_txs", "SELECT tx_id, sender, recipient, amount FROM transactions WHERE block_index = 0 OR block_index IS NULL", lambda: ()),
+        ("mined_supply", "SELECT SUM(amount) FROM transactions WHERE sender = 'GhostProtocol_System'", lambda: ()),
+        ("get_messages", "SELECT * FROM messages WHERE (sender = ? AND recipient = ?) OR (sender = ? AND recipient = ?) ORDER BY timestamp ASC", lambda: (lambda a, b: (a, b, b, a))(rnd.choice(keys[:200]), rnd.choice(keys[:200]))),
+        ("active_peers", "SELECT COUNT(*) FROM mesh_peers WHERE last_seen > ?", lambda: (time.time() - 300,)),
+        ("peer_ips", "SELECT ip_address FROM mesh_peers WHERE last_seen > ?", lambda: (time.time() - 3600,)),
+        ("block_by_hash", "SELECT * FROM blocks WHERE block_hash = ?", lambda: (f"{rnd.randint(1, 1000):064x}",)),
+        ("assets_by_owner", "SELECT * FROM assets WHERE owner_pub_key = ? ORDER BY creation_time DESC", lambda: (k(),)),
+    ]
+
+def measure(pool, qs, repeat):
+    out = {}
+    conn = pool.get_read_connection()
+    try:
+        for name, sql, args in qs:
+            samples = []
+            for _ in range(repeat):
+                t = time.perf_counter()
+                conn.execute(sql, args()).fetchall()
+                samples.append((time.perf_counter() - t) * 1000)
+            out[name] = statistics.median(samples)
+    finally: conn.close()
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rows', type=int, default=1000000)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    path = os.path.join(work_dir, "bench_indexes.db")
+    pool = ConnectionPool(path)
+    t = time.time()
+    keys = populate(pool, args.rows)
+    print(f"populated {args.rows:,} transactions in {time.time() - t:.1f}s ({path})")
+
+    qs = queries(keys)
+    before = measure(pool, qs, args.repeat)
+    t = time.time()
+    run_migrations(pool, context={'blob_store': BlobStore(os.path.join(work_dir, "blobs")), 'treasury_key': TREASURY_KEY})
+    print(f"migrations applied in {time.time() - t:.1f}s")
+    after = measure(pool, qs, args.repeat)
+
+    print(f"{'query':28} {'before ms':>12} {'after ms':>12} {'speedup':>9}")
+    for name, _, _ in qs:
+        b, a = before[name], after[name]
+        print(f"{name:28} {b:12.3f} {a:12.3f} {b / a if a else float('inf'):8.1f}x")
+
+if __name__ == '__main__':
+    main()
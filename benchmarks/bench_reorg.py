@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+TR: Derin bir yeniden düzenlemeyi (varsayılan 1000 blok) uçtan uca ölçer: locator ile çatallanma noktası (eş tarafı),
+    ortak atanın bulunması (ikili arama ve eski doğrusal tarama), çatal seçimi planı (doğrulama dahil) ve tek işlemde
+    geri alma + bağlama. Sonunda bakiyeler ve chain_stats baştan hesaplananla karşılaştırılır.
+EN: Measures a deep reorg (1000 blocks by default) end to end: the fork point via the locator (peer side), finding the
+    common ancestor (binary search and the old linear scan), the fork choice plan (validation included) and disconnect +
+    connect in one transaction. Balances and chain_stats are compared with a full recompute at the end.
+
+    python benchmarks/bench_reorg.py --blocks 20000 --depth 1000 --txs 5
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghost_chain import (BlockValidator, ForkChoice, build_locator, common_prefix, disconnect_blocks, headers_since,
+                         reward_tx_id)
+from ghost_db import SYSTEM_SENDER, create_chain_stats, read_chain_stats, reindex_chain_stats
+from ghost_miner import scan_block
+
+GENESIS_HASH = hashlib.sha256(b'GhostGenesis').hexdigest()
+GENESIS_PROOF = 100
+REWARD = 50.0
+
+def fresh_db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE blocks (block_index INTEGER PRIMARY KEY, timestamp REAL, previous_hash TEXT, block_hash TEXT, proof INTEGER, miner_key TEXT, merkle_root TEXT);
+        CREATE INDEX idx_blocks_hash ON blocks(block_hash);
+        CREATE TABLE block_headers (block_index INTEGER PRIMARY KEY, block_hash BLOB NOT NULL, merkle_root BLOB);
+        CREATE TABLE transactions (tx_id TEXT PRIMARY KEY, sender TEXT, recipient TEXT, amount REAL, timestamp REAL, block_index INTEGER DEFAULT 0);
+        CREATE INDEX idx_tx_block ON transactions(block_index, tx_id);
+        CREATE TABLE users (wallet_public_key TEXT PRIMARY KEY, balance REAL DEFAULT 0);
+    """)
+    create_chain_stats(conn, 'treasury')
+    conn.execute("INSERT INTO blocks VALUES (1, 0, '0', ?, ?, 'GhostProtocol_System', NULL)", (GENESIS_HASH, GENESIS_PROOF))
+    conn.executemany("INSERT INTO users VALUES (?, 0)", [('miner-a',), ('miner-b',), ('alice',), ('bob',)])
+    conn.commit()
+    return conn
+
+def make_branch(parent, count, miner, salt, difficulty):
+    blocks, prev_hash, prev_proof = [], parent['block_hash'], parent['proof']
+    for index in range(parent['block_index'] + 1, parent['block_index'] + 1 + count):
+        nonce_block = 0
+        while True:
+            proof = scan_block(prev_proof, difficulty, nonce_block)
+            if proof is not None: break
+            nonce_block += 1
+        block_hash = hashlib.sha256(f"{salt}{index}{prev_hash}{proof}".encode()).hexdigest()
+        blocks.append({'block_index': index, 'timestamp': time.time(), 'previous_hash': prev_hash, 'block_hash': block_hash,
+                       'proof': proof, 'miner_key': miner, 'merkle_root': None})
+        prev_hash, prev_proof = block_hash, proof
+    return blocks
+
+def connect(conn, blocks, txs_per_block, pending=()):
+    # TR: Sunucunun blok etkileri: ödül işlemi + madenci bakiyesi, bekleyen işlemlerin onayı + alıcı bakiyesi
+    # EN: The server's block effects: reward tx + miner balance, confirming pending txs + recipient balance
+    pending = list(pending)
+    conn.executemany("INSERT INTO blocks VALUES (:block_index, :timestamp, :previous_hash, :block_hash, :proof, :miner_key, :merkle_root)", blocks)
+    for b in blocks:
+        conn.execute("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                     (reward_tx_id(b['block_index'], b['previous_hash'], b['proof']), SYSTEM_SENDER, b['miner_key'], REWARD, b['timestamp'], b['block_index']))
+        conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (REWARD, b['miner_key']))
+        batch, pending = pending[:txs_per_block], pending[txs_per_block:]
+        for tx in batch:
+            conn.execute("UPDATE transactions SET block_index = ? WHERE tx_id = ?", (b['block_index'], tx['tx_id']))
+            conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (tx['amount'], tx['recipient']))
+    return pending
+
+def add_pending(conn, count):
+    txs = [{'tx_id': f"tx{i}", 'sender': 'alice', 'recipient': 'bob', 'amount': 1.0, 'timestamp': time.time()} for i in range(count)]
+    conn.executemany("INSERT INTO transactions VALUES (:tx_id, :sender, :recipient, :amount, :timestamp, 0)", txs)
+    return txs
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--blocks', type=int, default=20000, help="common history before the fork")
+    ap.add_argument('--depth', type=int, default=1000, help="local blocks disconnected by the reorg")
+    ap.add_argument('--txs', type=int, default=5, help="confirmed transactions per local block")
+    ap.add_argument('--difficulty', type=int, default=1)
+    args = ap.parse_args()
+
+    local, remote = fresh_db(), fresh_db()
+    genesis = dict(local.execute("SELECT * FROM blocks WHERE block_index = 1").fetchone())
+    history = make_branch(genesis, args.blocks, 'miner-a', 'h', args.difficulty)
+    for conn in (local, remote):
+        with conn: connect(conn, history, 0)
+    ancestor = history[-1]
+    with local:
+        pending = add_pending(local, args.depth * args.txs)
+        connect(local, make_branch(ancestor, args.depth, 'miner-a', 'a', args.difficulty), args.txs, pending)
+    with remote: connect(remote, make_branch(ancestor, args.depth + 1, 'miner-b', 'b', args.difficulty), 0)
+    before = {r['wallet_public_key']: r['balance'] for r in local.execute("SELECT * FROM users")}
+
+    # TR: Eş tarafı: locator'daki ilk bilinen hash (O(log n) boyut, hash indeksiyle her biri O(log n))
+    # EN: Peer side: the first known hash in the locator (O(log n) size, each O(log n) via the hash index)
+    locator = build_locator(local)
+    page, t_locator = timed(lambda: headers_since(remote, locator, limit=args.depth * 2 + 100))
+    first, last = page['headers'][0]['block_index'], page['headers'][-1]['block_index']
+    blocks = [dict(r) for r in remote.execute("SELECT * FROM blocks WHERE block_index BETWEEN ? AND ? ORDER BY block_index", (first, last))]
+
+    known, t_bisect = timed(lambda: common_prefix(local, blocks))
+    def linear():
+        rows = dict(local.execute("SELECT block_index, block_hash FROM blocks WHERE block_index BETWEEN ? AND ?", (first, last)).fetchall())
+        k = 0
+        while k < len(blocks) and rows.get(blocks[k]['block_index']) == blocks[k]['block_hash']: k += 1
+        return k
+    known_linear, t_linear = timed(linear)
+    assert known == known_linear and blocks[known - 1]['block_hash'] == ancestor['block_hash'], (known, known_linear)
+
+    validator = BlockValidator(args.difficulty, 1)
+    fork_choice = ForkChoice(validator, max_reorg_blocks=args.depth * 2)
+    plan, t_plan = timed(lambda: fork_choice.plan(local, blocks))
+    assert plan['action'] == 'reorg' and plan['ancestor'] == ancestor['block_index'], plan['action']
+
+    def execute():
+        with local:
+            removed, unconfirmed = disconnect_blocks(local, plan['ancestor'])
+            connect(local, plan['blocks'], args.txs, unconfirmed)
+        return removed, unconfirmed
+    (removed, unconfirmed), t_exec = timed(execute)
+
+    after = {r['wallet_public_key']: r['balance'] for r in local.execute("SELECT * FROM users")}
+    stats = read_chain_stats(local)
+    assert stats == reindex_chain_stats(local), "chain_stats drifted"
+    assert removed == args.depth and len(unconfirmed) == args.depth * args.txs
+    assert after['bob'] == before['bob'] and after['miner-a'] == before['miner-a'] - args.depth * REWARD
+    assert after['miner-b'] == (args.depth + 1) * REWARD
+    tip = local.execute("SELECT block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()[0]
+    assert tip == remote.execute("SELECT block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()[0]
+
+    print(f"{args.blocks} common blocks, reorg {args.depth} deep ({args.depth * args.txs} txs back to pending), branch {len(plan['blocks'])}")
+    print(f"locator: {len(locator)} hashes, fork point {page['fork_index']} ({ancestor['block_index'] - page['fork_index']} below the ancestor)")
+    print(f"{'step':<34}{'ms':>10}")
+    for name, ms in (("fork point (peer, locator)", t_locator), ("common ancestor, binary search", t_bisect),
+                     ("common ancestor, linear scan", t_linear), ("fork choice plan (validate)", t_plan),
+                     ("disconnect + connect (1 tx)", t_exec)):
+        print(f"{name:<34}{ms:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+TR: Eşten gelen blok aralıklarının doğrulama + yazma hızını (blok/sn) ölçer: doğrulamasız eski yazma,
+    tek süreçte doğrulama ve süreç havuzuyla doğrulama.
+EN: Measures validate + write throughput (blocks/s) for block ranges from peers: the old unvalidated write,
+    single-process validation and process-pool validation.
+
+    python benchmarks/bench_validate.py --blocks 20000 --workers 4
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghost_chain import BlockValidator, POW_CHUNK_BLOCKS
+from ghost_miner import scan_block, valid_proof
+
+GENESIS_HASH = hashlib.sha256(b'GhostGenesis').hexdigest()
+GENESIS_PROOF = 100
+
+def build_chain(count, difficulty):
+    # TR: Zincir düşük zorlukta üretilir; doğrulama maliyeti zorluktan bağımsızdır (blok başına tek hash)
+    # EN: The chain is generated at low difficulty; validation cost does not depend on it (one hash per block)
+    blocks, prev_hash, prev_proof = [], GENESIS_HASH, GENESIS_PROOF
+    for index in range(2, count + 2):
+        block = 0
+        while True:
+            proof = scan_block(prev_proof, difficulty, block)
+            if proof is not None: break
+            block += 1
+        block_hash = hashlib.sha256(f"{index}{prev_hash}{proof}".encode()).hexdigest()
+        blocks.append({'block_index': index, 'timestamp': time.time(), 'previous_hash': prev_hash,
+                       'block_hash': block_hash, 'proof': proof, 'miner_key': 'bench'})
+        prev_hash, prev_proof = block_hash, proof
+    return blocks
+
+def fresh_db():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE blocks (block_index INTEGER PRIMARY KEY, timestamp REAL, previous_hash TEXT, block_hash TEXT, proof INTEGER, miner_key TEXT)")
+    conn.execute("CREATE TABLE block_headers (block_index INTEGER PRIMARY KEY, block_hash BLOB NOT NULL)")
+    conn.execute("INSERT INTO blocks VALUES (1, 0, '0', ?, ?, 'GhostProtocol_System')", (GENESIS_HASH, GENESIS_PROOF))
+    return conn
+
+def write(conn, blocks):
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(b['block_index'], b['timestamp'], b['previous_hash'], b['block_hash'], b['proof'], b['miner_key']) for b in blocks])
+
+def run(blocks, page, validator=None):
+    conn = fresh_db()
+    started = time.perf_counter()
+    for i in range(0, len(blocks), page):
+        chunk = blocks[i:i + page]
+        if validator is not None:
+            chunk, _, error = validator.validate(conn, chunk)
+            assert error is None, error
+        write(conn, chunk)
+    elapsed = time.perf_counter() - started
+    assert conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0] == len(blocks) + 1
+    return len(blocks) / elapsed
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--blocks', type=int, default=20000)
+    ap.add_argument('--page', type=int, default=2000, help="blocks per header page (one validate + one transaction)")
+    ap.add_argument('--difficulty', type=int, default=2)
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+    blocks = build_chain(args.blocks, args.difficulty)
+
+    # TR: Geçersiz bir kanıt sadece öneki kabul ettirmeli; kontrol zinciri --blocks'tan bağımsız olarak iki parça uzunluğundadır
+    # EN: One invalid proof must leave only the prefix accepted; the check chain is two chunks long regardless of --blocks
+    sample = POW_CHUNK_BLOCKS * 2
+    bad = [dict(b) for b in (blocks if len(blocks) >= sample else build_chain(sample, args.difficulty))[:sample]]
+    broken = POW_CHUNK_BLOCKS + 7
+    while valid_proof(bad[broken - 1]['proof'], bad[broken]['proof'], args.difficulty): bad[broken]['proof'] += 1
+    pooled = BlockValidator(args.difficulty, max(2, args.workers), parallel_min_blocks=1)
+    valid, _, error = pooled.validate(fresh_db(), bad)
+    assert error is not None, "invalid proof accepted"
+    assert len(valid) == broken, len(valid)
+    pooled.shutdown()
+
+    results = [('no validation', run(blocks, args.page))]
+    results.append(('inline', run(blocks, args.page, BlockValidator(args.difficulty, 1))))
+    pooled = BlockValidator(args.difficulty, args.workers)
+    results.append((f'pool x{args.workers}', run(blocks, args.page, pooled)))
+    pooled.shutdown()
+    print(f"{args.blocks} blocks, {args.page} per page")
+    print(f"{'mode':<16}{'blocks/s':>12}")
+    for name, rate in results: print(f"{name:<16}{rate:>12,.0f}")
+
+if __name__ == '__main__':
+    main()
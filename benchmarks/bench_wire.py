@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+TR: Başlık sayfası (/api/headers) ve blok akışı (/api/blocks) için JSON ile ikili biçimin kodlama/çözme hızını (başlık/sn)
+    ve bant genişliğini (başlık başına bayt, ham ve gzip) karşılaştırır.
+EN: Compares JSON and the binary format for the header page (/api/headers) and the block stream (/api/blocks):
+    encode/decode throughput (headers/s) and bandwidth (bytes per header, raw and gzip).
+
+    python benchmarks/bench_wire.py --headers 2000 --rounds 50
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghost_wire import decode_blocks, decode_headers_page, encode_blocks, encode_headers_page
+
+def make_blocks(count):
+    blocks, prev = [], hashlib.sha256(b'GhostGenesis').hexdigest()
+    for index in range(2, count + 2):
+        block_hash = hashlib.sha256(f"{index}{prev}".encode()).hexdigest()
+        blocks.append({'block_index': index, 'timestamp': time.time(), 'previous_hash': prev, 'block_hash': block_hash,
+                       'proof': 100000 + index * 37, 'miner_key': f"GHST{block_hash[:20]}", 'merkle_root': hashlib.sha256(block_hash.encode()).hexdigest()})
+        prev = block_hash
+    return blocks
+
+def rate(func, count, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds): func()
+    return count * rounds / (time.perf_counter() - started)
+
+def compare(name, count, rounds, json_encode, json_decode, bin_encode, bin_decode):
+    json_data, bin_data = json_encode(), bin_encode()
+    assert json_decode(json_data) == bin_decode(bin_data), "round trip mismatch"
+    rows = []
+    for fmt, data, enc, dec in (('json', json_data, json_encode, json_decode), ('binary', bin_data, bin_encode, bin_decode)):
+        rows.append((fmt, rate(enc, count, rounds), rate(lambda: dec(data), count, rounds),
+                     len(data) / count, len(gzip.compress(data)) / count))
+    print(f"\n{name}: {count} headers x {rounds} rounds")
+    print(f"{'format':<8}{'encode/s':>14}{'decode/s':>14}{'B/header':>10}{'gzip B/h':>10}")
+    for fmt, enc, dec, raw, gz in rows: print(f"{fmt:<8}{enc:>14,.0f}{dec:>14,.0f}{raw:>10.1f}{gz:>10.1f}")
+    print(f"binary / json bytes: {rows[1][3] / rows[0][3]:.2f} raw, {rows[1][4] / rows[0][4]:.2f} gzip")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--headers', type=int, default=2000, help="headers per page / blocks per stream")
+    ap.add_argument('--rounds', type=int, default=50)
+    args = ap.parse_args()
+    blocks = make_blocks(args.headers)
+    page = {'fork_index': 1, 'headers': [{k: b[k] for k in ('block_index', 'block_hash', 'previous_hash')} for b in blocks],
+            'more': True, 'tip_index': blocks[-1]['block_index'] + 500, 'tip_hash': blocks[-1]['block_hash']}
+
+    compare("header page (/api/headers)", len(blocks), args.rounds,
+            lambda: json.dumps(page, separators=(',', ':')).encode(), json.loads,
+            lambda: encode_headers_page(page), decode_headers_page)
+    compare("block stream (/api/blocks)", len(blocks), args.rounds,
+            lambda: "".join(json.dumps(b, separators=(',', ':')) + "\n" for b in blocks).encode(),
+            lambda data: [json.loads(line) for line in data.split(b"\n") if line],
+            lambda: encode_blocks(blocks), decode_blocks)
+
+if __name__ == '__main__':
+    main()
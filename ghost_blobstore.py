@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Blob Store
+TR: Varlık içerikleri için içerik adresli (sha256) disk deposu. Aynı içerik bir kez saklanır.
+EN: Content-addressed (sha256) on-disk store for asset contents. Identical content is stored once.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger("GhostBlobStore")
+
+# TR: Yeni yazılmış ama henüz bir satıra bağlanmamış bloblar bu süre boyunca silinmez
+# EN: Freshly written blobs not yet referenced by a row are not removed within this window
+ORPHAN_GRACE_SECONDS = 3600
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+class BlobTooLarge(ValueError):
+    def __init__(self, limit):
+        super().__init__(f"content exceeds {limit} bytes")
+        self.limit = limit
+
+def iter_file(fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk: break
+        yield chunk
+
+class BlobSpool:
+    """
+    TR: Deponun tmp dizininde, yazılırken hash'lenen geçici dosya. Form ayrıştırıcısı yüklemeyi doğrudan buraya yazar;
+        BlobStore.put_spool onu yeniden kopyalamadan (yeniden adlandırarak) depoya alır. Alınmadan kapatılırsa silinir.
+    EN: Temp file in the store's tmp directory, hashed while it is written. The form parser writes the upload straight into it;
+        BlobStore.put_spool takes it into the store without copying again (by renaming). Removed if closed without being taken.
+    """
+    def __init__(self, tmp_dir):
+        fd, self.tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        self._f = os.fdopen(fd, 'w+b')
+        self._h = hashlib.sha256()
+        self.size = 0
+        self.committed = False
+
+    def write(self, data):
+        self.size += len(data)
+        self._h.update(data)
+        return self._f.write(data)
+
+    def hexdigest(self):
+        return self._h.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+    def __iter__(self):
+        return iter(self._f)
+
+    def close(self):
+        if not self._f.closed: self._f.close()
+        if not self.committed and os.path.exists(self.tmp_path): os.unlink(self.tmp_path)
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def is_valid_hash(content_hash):
+        return isinstance(content_hash, str) and len(content_hash) == 64 and all(c in '0123456789abcdef' for c in content_hash)
+
+    def path(self, content_hash):
+        # TR: İki seviyeli parçalama: ab/cd/abcd... (dizin başına dosya sayısını sınırlar)
+        # EN: Two-level sharding: ab/cd/abcd... (bounds files per directory)
+        if not self.is_valid_hash(content_hash): raise ValueError("invalid content hash")
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def exists(self, content_hash):
+        try: return os.path.isfile(self.path(content_hash))
+        except ValueError: return False
+
+    def size(self, content_hash):
+        return os.path.getsize(self.path(content_hash))
+
+    def _commit_tmp(self, tmp_path, content_hash):
+        final = self.path(content_hash)
+        if os.path.exists(final):
+            # TR: Tekrarlanan yükleme; mevcut dosyayı koru, sadece zamanını tazele (GC süresi için)
+            # EN: Duplicate upload; keep the existing file, just refresh its mtime (for the GC grace window)
+            os.unlink(tmp_path)
+            try: os.utime(final, None)
+            except OSError: pass
+            return content_hash
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+        return content_hash
+
+    def put_bytes(self, data):
+        content_hash = hashlib.sha256(data).hexdigest()
+        if self.exists(content_hash):
+            try: os.utime(self.path(content_hash), None)
+            except OSError: pass
+            return content_hash
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return self._commit_tmp(tmp_path, content_hash)
+
+    def put_chunks(self, chunks, expected_hash=None, max_bytes=None):
+        """
+        TR: Parça parça yazar ve hash'i artımlı hesaplar; içerik hiçbir zaman tamamen bellekte tutulmaz.
+            max_bytes aşılır aşılmaz BlobTooLarge fırlatılır ve geçici dosya silinir.
+        EN: Writes chunk by chunk, hashing incrementally; the content is never held in memory as a whole.
+            Raises BlobTooLarge as soon as max_bytes is exceeded and removes the temp file.
+        """
+        h = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if not chunk: continue
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes: raise BlobTooLarge(max_bytes)
+                    h.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            content_hash = h.hexdigest()
+            if expected_hash and content_hash != expected_hash:
+                raise ValueError(f"content hash mismatch ({content_hash} != {expected_hash})")
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return self._commit_tmp(tmp_path, content_hash), size
+
+    def spool(self):
+        return BlobSpool(self.tmp_dir)
+
+    def put_spool(self, spool, max_bytes=None):
+        if max_bytes is not None and spool.size > max_bytes: raise BlobTooLarge(max_bytes)
+        spool.flush()
+        os.fsync(spool.fileno())
+        spool.committed = True
+        spool.close()
+        return self._commit_tmp(spool.tmp_path, spool.hexdigest()), spool.size
+
+    def put_file(self, fileobj, max_bytes=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        return self.put_chunks(iter_file(fileobj, chunk_size), max_bytes=max_bytes)
+
+    def read_bytes(self, content_hash):
+        with open(self.path(content_hash), 'rb') as f: return f.read()
+
+    def open(self, content_hash):
+        return open(self.path(content_hash), 'rb')
+
+    def delete_if_orphan(self, content_hash, referenced, grace=ORPHAN_GRACE_SECONDS):
+        """
+        TR: Başka satır referans vermiyorsa ve GC süresi geçtiyse blobu siler.
+        EN: Removes the blob when no row references it and the grace window has passed.
+        """
+        if referenced or not self.exists(content_hash): return False
+        path = self.path(content_hash)
+        if time.time() - os.path.getmtime(path) < grace: return False
+        try: os.unlink(path)
+        except OSError: return False
+        return True
+
+    def sweep(self, referenced_hashes, grace=ORPHAN_GRACE_SECONDS):
+        removed = 0
+        now = time.time()
+        for shard1 in os.listdir(self.root):
+            d1 = os.path.join(self.root, shard1)
+            if shard1 == 'tmp' or not os.path.isdir(d1): continue
+            for shard2 in os.listdir(d1):
+                d2 = os.path.join(d1, shard2)
+                for name in os.listdir(d2):
+                    p = os.path.join(d2, name)
+                    if name in referenced_hashes: continue
+                    try:
+                        if now - os.path.getmtime(p) >= grace:
+                            os.unlink(p)
+                            removed += 1
+                    except OSError: pass
+        # TR: Yarıda kalmış yüklemelerin geçici dosyaları
+        # EN: Temp files of interrupted uploads
+        for name in os.listdir(self.tmp_dir):
+            p = os.path.join(self.tmp_dir, name)
+            try:
+                if now - os.path.getmtime(p) >= grace: os.unlink(p)
+            except OSError: pass
+        if removed: logger.info(f"Blob sweep removed {removed} orphan blobs")
+        return removed
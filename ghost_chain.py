@@ -0,0 +1,696 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Chain Sync Helpers
+TR: Sunucu ve Mesh düğümü için ortak zincir senkronizasyon yardımcıları (blok bulucu / locator, başlık sayfaları).
+EN: Shared chain sync helpers for the server and mesh node (block locator, header pages).
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from ghost_db import SYSTEM_SENDER
+from ghost_miner import POOL_RETRIES, pool_context, valid_proof
+from ghost_wire import ACCEPT_BINARY, BLOCKS_MAGIC, decode_blocks, decode_headers_page, encode_block, is_binary
+
+logger = logging.getLogger("GhostChain")
+
+HEADER_COLUMNS = "block_index, block_hash, previous_hash"
+MAX_HEADERS_PER_PAGE = 2000
+MAX_LOCATOR_HASHES = 64
+MAX_BLOCKS_PER_STREAM = 5000
+BLOCK_STREAM_FETCH = 256
+# TR: Senkronizasyon turu varsayılanları (uygulamalar kendi ayarlarını verir)
+# EN: Sync round defaults (the apps pass their own settings)
+DEFAULT_SYNC_PARALLELISM = 8
+DEFAULT_SYNC_ROUND_DEADLINE = 45
+DEFAULT_SYNC_CHUNK_BLOCKS = 250
+REQUEST_TIMEOUT = 3
+STREAM_TIMEOUT = 30
+# TR: Locator'da ucun hemen gerisindeki bu kadar blok tek tek yer alır, sonra adım ikiye katlanır
+# EN: The locator lists this many blocks behind the tip one by one, then the step doubles
+LOCATOR_DENSE_BLOCKS = 10
+# TR: Blok doğrulama: PoW kontrolleri bu sayıdan kısa aralıklarda süreç havuzuna gönderilmez; havuza parça parça gider
+# EN: Block validation: ranges shorter than this skip the process pool; longer ones go to the pool in chunks
+DEFAULT_VALIDATION_WORKERS = os.cpu_count() or 1
+POW_PARALLEL_MIN_BLOCKS = 512
+POW_CHUNK_BLOCKS = 1024
+BLOCK_HASH_RE = re.compile(r'[0-9a-f]{64}')
+# TR: Budama: uçtan geride tam tutulan blok sayısı, tam satır kontrol noktası aralığı ve bir geçişte budanan en fazla blok
+# EN: Pruning: blocks kept in full behind the tip, full-row checkpoint interval and the most blocks pruned in one pass
+DEFAULT_PRUNE_KEEP_BLOCKS = 2000
+DEFAULT_PRUNE_CHECKPOINT_INTERVAL = 1000
+DEFAULT_PRUNE_BATCH_BLOCKS = 5000
+# TR: Çatal seçimi: en derin yeniden düzenleme (reorg), bellekte tutulan yan dalların ömrü ve sayısı
+# EN: Fork choice: deepest reorg accepted, lifetime and number of side branches kept in memory
+DEFAULT_MAX_REORG_BLOCKS = 5000
+DEFAULT_SIDE_BRANCH_TTL = 600
+MAX_SIDE_BRANCHES = 16
+
+def locator_indexes(tip_index):
+    indexes, step, index = [], 1, tip_index
+    while index > 1:
+        indexes.append(index)
+        if len(indexes) >= LOCATOR_DENSE_BLOCKS: step *= 2
+        index -= step
+    indexes.append(1)
+    return indexes
+
+# --- BUDANMIŞ BAŞLIKLAR / PRUNED HEADERS ---
+# TR: Budama modunda pencerenin gerisindeki bloklar blocks'tan silinir ve block_headers'ta (indeks, 32 baytlık hash) kalır.
+#     previous_hash saklanmaz; bir önceki başlığın hash'idir. Başlık sorguları önce blocks'a, sonra block_headers'a bakar.
+# EN: In pruning mode blocks behind the window are deleted from blocks and stay in block_headers (index, 32-byte hash).
+#     previous_hash is not stored; it is the previous header's hash. Header queries look in blocks first, then block_headers.
+def pack_hash(block_hash):
+    return bytes.fromhex(block_hash) if isinstance(block_hash, str) and BLOCK_HASH_RE.fullmatch(block_hash) else block_hash
+
+def unpack_hash(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+def _pruned_hashes(conn, indexes):
+    placeholders = ",".join("?" * len(indexes))
+    rows = conn.execute(f"SELECT block_index, block_hash FROM block_headers WHERE block_index IN ({placeholders})", list(indexes)).fetchall()
+    return {r['block_index']: unpack_hash(r['block_hash']) for r in rows}
+
+def merkle_root_at(conn, index, block_hash):
+    # TR: Sadece hash'i eşleşen (zincirdeki) bloğun kökü; tam satır veya budanmış başlıktan
+    # EN: Only the root of the block whose hash matches (on our chain); from the full row or the pruned header
+    row = conn.execute("SELECT block_hash, merkle_root FROM blocks WHERE block_index = ?", (index,)).fetchone()
+    if row is None: row = conn.execute("SELECT block_hash, merkle_root FROM block_headers WHERE block_index = ?", (index,)).fetchone()
+    if row is None or unpack_hash(row['block_hash']) != block_hash: return None
+    return unpack_hash(row['merkle_root'])
+
+def block_hash_at(conn, index):
+    row = conn.execute("SELECT block_hash FROM blocks WHERE block_index = ?", (index,)).fetchone()
+    if row: return row['block_hash']
+    return _pruned_hashes(conn, [index]).get(index)
+
+def common_prefix(conn, blocks):
+    """
+    TR: Yerel zincirde zaten olan baştaki blok sayısı. Bağlı bir aralıkta eşleşme önekten sonra bir daha başlamaz,
+        bu yüzden ikili arama yeterlidir: sayfa boyu n için O(log n) nokta sorgusu (aralığın tamamı okunmaz).
+    EN: The number of leading blocks already on the local chain. In a linked range a match never resumes after the prefix,
+        so a binary search is enough: O(log n) point lookups for a page of n (the range is not read in full).
+    """
+    low, high = 0, len(blocks)
+    while low < high:
+        mid = (low + high) // 2
+        block = blocks[mid]
+        if isinstance(block, dict) and _is_int(block.get('block_index')) and block_hash_at(conn, block['block_index']) == block.get('block_hash'):
+            low = mid + 1
+        else: high = mid
+    return low
+
+def build_locator(conn):
+    """
+    TR: Uçtan geriye üstel aralıklı blok hash'leri (en yeni önce); O(log n) boyutunda. Budanmış aralık için ikinci bir sorgu yapılır.
+    EN: Block hashes at exponentially growing distance back from the tip (newest first); O(log n) size. Pruned ranges take one more query.
+    """
+    tip = conn.execute("SELECT MAX(block_index) FROM blocks").fetchone()[0]
+    if tip is None: return []
+    indexes = locator_indexes(tip)
+    placeholders = ",".join("?" * len(indexes))
+    found = dict(conn.execute(f"SELECT block_index, block_hash FROM blocks WHERE block_index IN ({placeholders})", indexes).fetchall())
+    missing = [i for i in indexes if i not in found]
+    if missing: found.update(_pruned_hashes(conn, missing))
+    return [found[i] for i in indexes if i in found]
+
+def find_fork_point(conn, locator):
+    # TR: Locator'daki ilk bilinen hash ortak atadır; eşitlenmiş bir eş için bu ilk hash (uç) olur: O(1)
+    # EN: The first known hash in the locator is the common ancestor; for a peer in sync it is the first hash (tip): O(1)
+    for block_hash in locator[:MAX_LOCATOR_HASHES]:
+        row = conn.execute("SELECT block_index FROM blocks WHERE block_hash = ?", (block_hash,)).fetchone()
+        if row is None: row = conn.execute("SELECT block_index FROM block_headers WHERE block_hash = ?", (pack_hash(block_hash),)).fetchone()
+        if row: return row['block_index']
+    return 0
+
+def _header_rows(conn, after_index, count):
+    # TR: after_index'ten sonraki en fazla count başlık; budanmış kısım için previous_hash bir önceki başlıktan türetilir
+    # EN: Up to count headers after after_index; for the pruned part previous_hash is derived from the preceding header
+    headers = []
+    first_full = conn.execute("SELECT MIN(block_index) FROM blocks").fetchone()[0]
+    if first_full is not None and after_index + 1 < first_full:
+        rows = conn.execute("SELECT block_index, block_hash FROM block_headers WHERE block_index >= ? AND block_index < ? ORDER BY block_index ASC LIMIT ?",
+                            (after_index, first_full, count + 1)).fetchall()
+        prev = None
+        for r in rows:
+            block_hash = unpack_hash(r['block_hash'])
+            if r['block_index'] > after_index:
+                headers.append({'block_index': r['block_index'], 'block_hash': block_hash, 'previous_hash': prev or block_hash_at(conn, r['block_index'] - 1) or '0'})
+            prev = block_hash
+    if len(headers) < count:
+        start = headers[-1]['block_index'] if headers else after_index
+        rows = conn.execute(f"SELECT {HEADER_COLUMNS} FROM blocks WHERE block_index > ? ORDER BY block_index ASC LIMIT ?", (start, count - len(headers))).fetchall()
+        headers.extend(dict(r) for r in rows)
+    return headers
+
+def headers_since(conn, locator=None, since_index=None, since_hash=None, limit=MAX_HEADERS_PER_PAGE):
+    """
+    TR: Çatallanma noktasından sonraki başlıklar (en fazla limit). since_index/since_hash verilirse önce o denenir.
+    EN: Headers after the fork point (at most limit). since_index/since_hash is tried first when given.
+    """
+    limit = max(1, min(int(limit), MAX_HEADERS_PER_PAGE))
+    fork_index = None
+    if since_index is not None and since_hash:
+        if block_hash_at(conn, since_index) == since_hash: fork_index = since_index
+    if fork_index is None: fork_index = find_fork_point(conn, locator or [])
+    rows = _header_rows(conn, fork_index, limit + 1)
+    tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+    return {
+        'fork_index': fork_index,
+        'headers': rows[:limit],
+        'more': len(rows) > limit,
+        'tip_index': tip['block_index'] if tip else 0,
+        'tip_hash': tip['block_hash'] if tip else None,
+    }
+
+def parse_locator(value):
+    return [h for h in (value or "").split(",") if h][:MAX_LOCATOR_HASHES]
+
+def request_headers(base_url, locator, limit=MAX_HEADERS_PER_PAGE, timeout=3):
+    """
+    TR: Bir eşten başlık sayfası ister. Eş /api/headers desteklemiyorsa (eski sürüm) None döner.
+    EN: Requests a header page from a peer. Returns None when the peer lacks /api/headers (old version).
+    """
+    resp = requests.get(f"{base_url}/api/headers", params={'locator': ",".join(locator[:MAX_LOCATOR_HASHES]), 'limit': limit},
+                        headers={'Accept': ACCEPT_BINARY}, timeout=timeout)
+    if resp.status_code == 404: return None
+    resp.raise_for_status()
+    return decode_headers_page(resp.content) if is_binary(resp) else resp.json()
+
+def clamp_block_range(start, end):
+    start = max(1, int(start))
+    end = min(int(end), start + MAX_BLOCKS_PER_STREAM - 1)
+    return start, end
+
+def iter_blocks_ndjson(connect, start, end):
+    """
+    TR: [start, end] aralığındaki blokları NDJSON satırları olarak üretir. İmleç parça parça okunur; liste oluşturulmaz.
+        Bağlantı connect() ile üretici ilk çalıştığında alınır ve bittiğinde (veya istemci koptuğunda) kapatılır; hiç başlamayan
+        bir üretici (HEAD isteği, ilk parçadan önce kopan istemci) havuzdan bağlantı almaz.
+    EN: Yields the blocks in [start, end] as NDJSON lines. The cursor is read in chunks; no list is built.
+        The connection is taken with connect() when the generator first runs and closed when it finishes (or the client
+        disconnects); a generator that never starts (a HEAD request, a client gone before the first chunk) takes none from the pool.
+    """
+    pool_conn = connect()
+    try:
+        cursor = pool_conn.execute("SELECT * FROM blocks WHERE block_index BETWEEN ? AND ? ORDER BY block_index ASC", (start, end))
+        while True:
+            rows = cursor.fetchmany(BLOCK_STREAM_FETCH)
+            if not rows: break
+            yield "".join(json.dumps(dict(r), separators=(',', ':')) + "\n" for r in rows)
+    finally: pool_conn.close()
+
+def iter_blocks_binary(connect, start, end):
+    """
+    TR: iter_blocks_ndjson'un ikili karşılığı (ghost_wire tam başlık kayıtları). Kodlanamayan bir satırda akış orada biter;
+        kayıtlar bütün olduğundan istemci geçerli bir önek alır. Bağlantı iter_blocks_ndjson'daki gibi üretici içinde alınır.
+    EN: Binary counterpart of iter_blocks_ndjson (ghost_wire full-header records). The stream stops at a row that cannot be encoded;
+        records are whole, so the client gets a valid prefix. The connection is taken inside the generator as in iter_blocks_ndjson.
+    """
+    pool_conn = connect()
+    try:
+        yield BLOCKS_MAGIC
+        cursor = pool_conn.execute("SELECT * FROM blocks WHERE block_index BETWEEN ? AND ? ORDER BY block_index ASC", (start, end))
+        while True:
+            rows = cursor.fetchmany(BLOCK_STREAM_FETCH)
+            if not rows: break
+            chunk = []
+            for r in rows:
+                try: chunk.append(encode_block(r))
+                except ValueError as e:
+                    logger.warning(f"Block {r['block_index']} has no binary form, stream cut: {e}")
+                    yield b''.join(chunk)
+                    return
+            yield b''.join(chunk)
+    finally: pool_conn.close()
+
+def request_blocks(base_url, start, end, timeout=30):
+    """
+    TR: Bir blok aralığını tek istekte akış olarak indirir ve satır satır çözer. Eş /api/blocks desteklemiyorsa None döner.
+    EN: Downloads a block range as one streamed request and decodes it line by line. Returns None if the peer lacks /api/blocks.
+    """
+    with requests.get(f"{base_url}/api/blocks", params={'from': start, 'to': end}, headers={'Accept': ACCEPT_BINARY}, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 404: return None
+        resp.raise_for_status()
+        if is_binary(resp): return decode_blocks(resp.content)
+        return [json.loads(line) for line in resp.iter_lines() if line]
+
+def time_left(deadline, cap):
+    # TR: İstek zaman aşımı hem kendi üst sınırını hem de turun bitiş zamanını aşmaz
+    # EN: A request timeout never exceeds its own cap nor the round deadline
+    remaining = deadline - time.time()
+    if remaining <= 0: raise FutureTimeout("sync round deadline reached")
+    return min(cap, remaining)
+
+def download_blocks(base_url, headers, timeout=STREAM_TIMEOUT, deadline=None):
+    """
+    TR: Başlık listesinin blokları tek NDJSON akışıyla; /api/blocks olmayan eşlerde blok blok (deadline verilirse her istek turun
+        kalanıyla sınırlanır ve süre dolunca durulur). Sadece başlıklardaki hash'ler döner.
+    EN: The blocks of a header list in one NDJSON stream; block by block for peers without /api/blocks (with a deadline every request
+        is capped by what is left of the round and it stops once the time is up). Only hashes in headers are returned.
+    """
+    blocks = request_blocks(base_url, headers[0]['block_index'], headers[-1]['block_index'], timeout=timeout)
+    if blocks is None:
+        blocks = []
+        for h in headers:
+            b_timeout = time_left(deadline, REQUEST_TIMEOUT) if deadline else min(timeout, REQUEST_TIMEOUT)
+            b_resp = requests.get(f"{base_url}/api/block/{h['block_hash']}", timeout=b_timeout)
+            if b_resp.status_code == 200: blocks.append(b_resp.json())
+    wanted = {h['block_hash'] for h in headers}
+    return [b for b in blocks if b.get('block_hash') in wanted]
+
+class SyncScheduler:
+    """
+    TR: Eşlerle eşzamanlı konuşan senkronizasyon zamanlayıcısı. Paralellik sabit boyutlu bir iş parçacığı havuzuyla sınırlıdır
+        ve her turun bir bitiş zamanı vardır; ölü bir eş turu durduramaz. Eksik her blok aralığı ve varlık tur başına bir kez istenir
+        (sadece hata olursa sıradaki eşe devredilir).
+    EN: Sync scheduler that talks to peers concurrently. Parallelism is bounded by a fixed-size thread pool and every round
+        has a deadline; one dead peer cannot stall the round. Each missing block range and asset is requested once per round
+        (handed to the next peer only on failure).
+    """
+    def __init__(self, port, parallelism=DEFAULT_SYNC_PARALLELISM, round_deadline=DEFAULT_SYNC_ROUND_DEADLINE, chunk_blocks=DEFAULT_SYNC_CHUNK_BLOCKS):
+        self.port = port
+        self.round_deadline = round_deadline
+        self.chunk_blocks = chunk_blocks
+        self.parallelism = parallelism
+        self.executor = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='ghost-sync')
+        self._executor_lock = threading.Lock()
+
+    def base_url(self, peer_ip):
+        return f"http://{peer_ip}:{self.port}"
+
+    def new_deadline(self):
+        return time.time() + self.round_deadline
+
+    def _guarded(self, func, item, deadline):
+        if time.time() >= deadline: raise FutureTimeout("sync round deadline reached")
+        return func(item)
+
+    def map(self, func, items, deadline):
+        """
+        TR: func(item) her öğe için havuzda çalışır; {item: sonuç} döner. Hata veren veya süreyi aşan öğeler atlanır.
+            Süre dolduğunda hâlâ çalışan görevler durdurulamaz (f.cancel() sadece bekleyenleri iptal eder); sonraki turlar onların
+            iş parçacıklarını beklemesin diye havuz yenisiyle değiştirilir. Eski havuz, görevler kendi zaman aşımlarıyla bitince kapanır.
+        EN: Runs func(item) for every item on the pool; returns {item: result}. Items that fail or miss the deadline are skipped.
+            Tasks still running at the deadline cannot be stopped (f.cancel() only cancels queued ones); the pool is swapped for
+            a fresh one so later rounds do not wait on their threads. The old pool winds down as the tasks hit their own timeouts.
+        """
+        executor = self.executor
+        futures = {executor.submit(self._guarded, func, item, deadline): item for item in items}
+        results = {}
+        try:
+            for f in as_completed(futures, timeout=max(0.0, deadline - time.time())):
+                try: results[futures[f]] = f.result()
+                except Exception as e: logger.debug(f"Sync task failed ({futures[f]}): {e}")
+        except FutureTimeout:
+            running = sum(1 for f in futures if not f.cancel() and not f.done())
+            logger.warning(f"Sync round deadline reached; {len(futures) - len(results)} tasks abandoned, {running} still running")
+            if running: self._replace_executor(executor)
+        return results
+
+    def _replace_executor(self, executor):
+        with self._executor_lock:
+            if self.executor is not executor: return
+            self.executor = ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix='ghost-sync')
+        executor.shutdown(wait=False)
+
+    def sync_blocks(self, peers, locator, apply_blocks, deadline):
+        """
+        TR: Tüm eşlerden başlıklar eşzamanlı istenir; en yüksek uca sahip eşler grubu blok aralıklarını paylaşır.
+            apply_blocks(blocks) her başlık sayfası için bir kez (tek işlem) çağrılır ve kabul edilen blok sayısını döner.
+            (uygulanan blok sayısı, eski eşler, yanıt veren eşler) döner; yanıt vermeyenler turun kalanında atlanabilir.
+        EN: Headers are requested from all peers concurrently; the peers sharing the highest tip split the block ranges.
+            apply_blocks(blocks) is called once per header page (one transaction) and returns the number of blocks accepted.
+            Returns (blocks applied, legacy peers, responsive peers); unresponsive ones can be skipped for the rest of the round.
+        """
+        probes = self.map(lambda ip: request_headers(self.base_url(ip), locator, timeout=time_left(deadline, REQUEST_TIMEOUT)), peers, deadline)
+        alive = [ip for ip in peers if ip in probes]
+        legacy = [ip for ip, page in probes.items() if page is None]
+        probes = {ip: page for ip, page in probes.items() if page}
+        if not probes: return 0, legacy, alive
+        best_ip = max(probes, key=lambda ip: probes[ip]['tip_index'])
+        page = probes[best_ip]
+        group = [ip for ip, pg in probes.items() if pg['tip_hash'] == page['tip_hash']]
+        applied, turn = 0, 0
+        while page['headers']:
+            blocks = self._download_page(page['headers'], group, deadline)
+            accepted = apply_blocks(blocks) if blocks else 0
+            applied += accepted
+            # TR: Doğrulamada reddedilen blok varsa bu eşin sayfalarına devam edilmez
+            # EN: If validation rejected any block, this peer's pages are not followed further
+            if accepted < len(blocks) or len(blocks) < len(page['headers']) or not page['more']: break
+            turn += 1
+            next_ip = group[turn % len(group)]
+            try: page = request_headers(self.base_url(next_ip), [page['headers'][-1]['block_hash']], timeout=time_left(deadline, REQUEST_TIMEOUT))
+            except Exception as e:
+                logger.debug(f"Header page failed ({next_ip}): {e}")
+                break
+            if not page: break
+        return applied, legacy, alive
+
+    def _download_page(self, headers, group, deadline):
+        # TR: Sayfa parçalara bölünür ve parçalar gruba sırayla dağıtılır; her parça bir kez istenir, hata olursa sonraki eşe geçer.
+        #     Sadece baştan kesintisiz tamamlanan parçalar döner (bloklar sırayla uygulanır).
+        # EN: The page is cut into chunks handed to the group round-robin; each chunk is requested once and moves to the next
+        #     peer only on failure. Only the contiguous completed prefix is returned (blocks are applied in order).
+        chunks = [headers[i:i + self.chunk_blocks] for i in range(0, len(headers), self.chunk_blocks)]
+        def fetch(k):
+            last_error = None
+            for attempt in range(len(group)):
+                ip = group[(k + attempt) % len(group)]
+                try:
+                    blocks = download_blocks(self.base_url(ip), chunks[k], timeout=time_left(deadline, STREAM_TIMEOUT), deadline=deadline)
+                    if len(blocks) == len(chunks[k]): return blocks
+                    last_error = f"{ip} returned {len(blocks)}/{len(chunks[k])} blocks"
+                except FutureTimeout: raise
+                except Exception as e: last_error = e
+            raise RuntimeError(last_error)
+        results = self.map(fetch, range(len(chunks)), deadline)
+        blocks = []
+        for k in range(len(chunks)):
+            if k not in results: break
+            blocks.extend(results[k])
+        return blocks
+
+    def fetch_once(self, wanted, fetch, deadline):
+        """
+        TR: wanted = {anahtar: [eşler]}. Her anahtar için fetch(eş, anahtar) sırayla eşler üzerinde, başarılı olana kadar denenir;
+            aynı anahtar birden çok eşe aynı anda istenmez. Başarılı anahtarları döner.
+        EN: wanted = {key: [peers]}. For each key fetch(peer, key) is tried on its peers in turn until one succeeds;
+            the same key is never requested from several peers at once. Returns the keys that succeeded.
+        """
+        def run(key):
+            for ip in wanted[key]:
+                try:
+                    if fetch(ip, key): return True
+                except FutureTimeout: raise
+                except Exception as e: logger.debug(f"Fetch {key} from {ip} failed: {e}")
+            return False
+        return [k for k, ok in self.map(run, list(wanted), deadline).items() if ok]
+
+# --- BLOK DOĞRULAMA / BLOCK VALIDATION ---
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def check_structure(blocks, parent_index, parent_hash):
+    """
+    TR: Sütunlar üzerinde tek geçişte yapı ve bağ kontrolü: alan tipleri, ardışık indeks, hash biçimi,
+        previous_hash == bir önceki bloğun hash'i (ilki için ebeveyn). İlk hatalı bloğun sırası ve nedeni döner
+        (hepsi geçerliyse len(blocks), None).
+    EN: Structural and linkage checks in one pass over the columns: field types, consecutive indexes, hash format,
+        previous_hash == the previous block's hash (the parent for the first one). Returns the position of the first bad
+        block and why (len(blocks), None when all pass).
+    """
+    if not all(isinstance(b, dict) for b in blocks):
+        return next(i for i, b in enumerate(blocks) if not isinstance(b, dict)), "not an object"
+    indexes = [b.get('block_index') for b in blocks]
+    hashes = [b.get('block_hash') for b in blocks]
+    prev_hashes = [b.get('previous_hash') for b in blocks]
+    proofs = [b.get('proof') for b in blocks]
+    timestamps = [b.get('timestamp') for b in blocks]
+    miners = [b.get('miner_key') for b in blocks]
+    roots = [b.get('merkle_root') for b in blocks]
+    checks = (
+        ("bad field types", [_is_int(i) and _is_int(p) and isinstance(t, (int, float)) and isinstance(m, str) and p >= 0
+                             for i, p, t, m in zip(indexes, proofs, timestamps, miners)]),
+        ("index not consecutive", [i == parent_index + 1 + k for k, i in enumerate(indexes)]),
+        ("bad block hash", [isinstance(h, str) and BLOCK_HASH_RE.fullmatch(h) is not None for h in hashes]),
+        ("bad merkle root", [r is None or (isinstance(r, str) and BLOCK_HASH_RE.fullmatch(r) is not None) for r in roots]),
+        ("previous_hash does not link", [p == h for p, h in zip(prev_hashes, [parent_hash] + hashes[:-1])]),
+    )
+    first, reason = len(blocks), None
+    for name, oks in checks:
+        bad = next((k for k, ok in enumerate(oks) if not ok), None)
+        if bad is not None and bad < first: first, reason = bad, name
+    return first, reason
+
+def first_invalid_pow(last_proofs, proofs, difficulty):
+    # TR: Süreç havuzu işçisi; ilk geçersiz kanıtın sırasını veya -1 döner
+    # EN: Process pool worker; returns the position of the first invalid proof or -1
+    for k, (last_proof, proof) in enumerate(zip(last_proofs, proofs)):
+        if not valid_proof(last_proof, proof, difficulty): return k
+    return -1
+
+class BlockValidator:
+    """
+    TR: Eşten indirilen blok aralıkları için doğrulama hattı:
+        1) zaten sahip olunan baştaki bloklar ayıklanır, ebeveyn yerel zincirden okunur,
+        2) yapı ve bağ kontrolü tek geçişte (check_structure),
+        3) PoW kontrolleri (ebeveyn kanıtı -> kanıt, min_difficulty ile) büyük aralıklarda süreç havuzuna dağıtılır.
+        Sadece baştan kesintisiz geçerli önek döner; çağıran onu tek işlemde yazar.
+        Zorluk blokta saklanmadığı için PoW, her geçerli bloğun sağladığı taban zorlukla (BASE_DIFFICULTY) kontrol edilir.
+        Blok hash'i saklanan alanlardan yeniden üretilemez (sunucu ve düğüm farklı girdiler hash'ler); biçimi ve bağı kontrol edilir.
+    EN: Validation pipeline for block ranges downloaded from peers:
+        1) leading blocks we already have are dropped and the parent is read from the local chain,
+        2) structural and linkage checks in one pass (check_structure),
+        3) PoW checks (parent proof -> proof, at min_difficulty) fan out to a process pool for large ranges.
+        Only the contiguous valid prefix is returned; the caller writes it in one transaction.
+        Difficulty is not stored in blocks, so PoW is checked at the floor every valid block meets (BASE_DIFFICULTY).
+        The block hash cannot be recomputed from stored fields (server and node hash different inputs); its format and linkage are checked.
+    """
+    def __init__(self, min_difficulty, workers=DEFAULT_VALIDATION_WORKERS, parallel_min_blocks=POW_PARALLEL_MIN_BLOCKS,
+                 chunk_blocks=POW_CHUNK_BLOCKS):
+        self.min_difficulty = min_difficulty
+        self.workers = max(1, int(workers or 1))
+        self.parallel_min_blocks = parallel_min_blocks
+        self.chunk_blocks = chunk_blocks
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {'validated': 0, 'rejected': 0, 'known': 0}
+        self._ctx = pool_context()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx)
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool: self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def check_pow(self, parent_proof, blocks):
+        proofs = [b['proof'] for b in blocks]
+        last_proofs = [parent_proof] + proofs[:-1]
+        if self.workers > 1 and len(blocks) >= self.parallel_min_blocks:
+            # TR: Bir işçi ölürse (OOM, sinyal) havuz yeniden kurulur; yine bozulursa aralık bu süreçte kontrol edilir
+            # EN: If a worker dies (OOM, signal) the pool is recreated; if it breaks again the range is checked in-process
+            for attempt in range(POOL_RETRIES + 1):
+                pool = self._get_pool()
+                try: return self._check_pow_parallel(pool, last_proofs, proofs)
+                except BrokenProcessPool:
+                    logger.warning(f"PoW validation pool broke (attempt {attempt + 1}); recreating it")
+                    self._discard_pool(pool)
+        bad = first_invalid_pow(last_proofs, proofs, self.min_difficulty)
+        return len(blocks) if bad < 0 else bad
+
+    def _check_pow_parallel(self, pool, last_proofs, proofs):
+        starts = range(0, len(proofs), self.chunk_blocks)
+        results = pool.map(first_invalid_pow, [last_proofs[i:i + self.chunk_blocks] for i in starts],
+                           [proofs[i:i + self.chunk_blocks] for i in starts], [self.min_difficulty] * len(starts))
+        for start, bad in zip(starts, results):
+            if bad >= 0: return start + bad
+        return len(proofs)
+
+    def validate(self, conn, blocks, parent=None):
+        """
+        TR: (yeni geçerli bloklar, zaten bilinen blok sayısı, hata veya None) döner. parent verilirse (yan dalın ucu) aralık
+            yerel zincire değil ona bağlanır ve bilinen önek aranmaz.
+        EN: Returns (new valid blocks, number of already known blocks, error or None). When parent is given (a side branch tip)
+            the range links to it instead of the local chain and no known prefix is looked for.
+        """
+        if not blocks: return [], 0, None
+        first = blocks[0].get('block_index') if isinstance(blocks[0], dict) else None
+        if not _is_int(first) or first < 1: return [], 0, "bad first block index"
+        known = 0 if parent is not None else common_prefix(conn, blocks)
+        self.stats['known'] += known
+        blocks = blocks[known:]
+        if not blocks: return [], known, None
+        if parent is None:
+            parent = conn.execute("SELECT block_index, block_hash, proof FROM blocks WHERE block_index = ?", (first + known - 1,)).fetchone()
+        if parent is None:
+            self.stats['rejected'] += len(blocks)
+            return [], known, f"parent {first + known - 1} unknown"
+        valid, reason = check_structure(blocks, parent['block_index'], parent['block_hash'])
+        if valid:
+            pow_valid = self.check_pow(parent['proof'], blocks[:valid])
+            if pow_valid < valid: valid, reason = pow_valid, f"proof of work below difficulty {self.min_difficulty}"
+        if reason:
+            logger.warning(f"Block range rejected at index {parent['block_index'] + 1 + valid}: {reason}")
+        self.stats['validated'] += valid
+        self.stats['rejected'] += len(blocks) - valid
+        return blocks[:valid], known, reason
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+# --- ÇATAL SEÇİMİ / FORK CHOICE ---
+def reward_tx_id(index, previous_hash, proof):
+    # TR: Ödül işlemi kimliği blok verisinden türetilir; her sunucuda aynı yaprak (ve aynı kök) oluşur, geri almada da bulunur
+    # EN: The reward transaction id is derived from the block data; every server builds the same leaf (and the same root), and a rollback finds it
+    return hashlib.sha256(f"reward:{index}:{previous_hash}:{proof}".encode()).hexdigest()
+
+def hash_block(index, timestamp, previous_hash, proof, miner_key, merkle_root=None):
+    # TR: Blok hash'i kökü de kapsar; kök böylece hash'e bağlanır ve yoldaki bir eş onu değiştiremez
+    # EN: The block hash covers the root too; the root is thereby bound to the hash and a peer on the path cannot swap it
+    block_string = json.dumps({'index': index, 'timestamp': timestamp, 'previous_hash': previous_hash, 'proof': proof, 'miner': miner_key,
+                               'merkle_root': merkle_root}, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+def committed_root(block):
+    """
+    TR: Bloğun hash'inin gerçekten bağladığı kök veya None. Hash'i hash_block ile yeniden üretilemeyen bloklarda (eski biçimler)
+        kök doğrulanamaz ve güvenilmez; çağıran onu yok sayar.
+    EN: The root the block's hash actually commits to, or None. For blocks whose hash cannot be recomputed with hash_block
+        (old formats) the root cannot be verified and is not trusted; the caller ignores it.
+    """
+    root = block.get('merkle_root')
+    if not root: return None
+    try: recomputed = hash_block(block['block_index'], block['timestamp'], block['previous_hash'], block['proof'], block['miner_key'], root)
+    except (KeyError, TypeError, ValueError): return None
+    return root if recomputed == block['block_hash'] else None
+
+def chain_work(block_count, difficulty):
+    # TR: Zorluk blokta saklanmaz; her geçerli bloğun kanıtladığı iş taban zorluğunkidir (16^d beklenen hash).
+    #     Bulunan hash'teki fazladan sıfırlar sayılmaz: şans eseri tek bir blok uzun bir zinciri geçemez.
+    # EN: Difficulty is not stored in blocks; the work every valid block proves is that of the floor (16^d expected hashes).
+    #     Extra zeros in the found hash do not count: one lucky block cannot outweigh a long chain.
+    return block_count * 16 ** difficulty
+
+def disconnect_blocks(conn, after_index):
+    """
+    TR: after_index'ten sonraki blokları bakiye etkileriyle birlikte geri alır (yazma işlemi içinde): ödül işlemleri silinir,
+        onaylanan işlemler bekleyene döner, her ikisinin alıcıya yazdığı tutar düşülür. (silinen blok sayısı, bekleyene dönen işlemler) döner.
+        idx_tx_block sayesinde maliyet geri alınan işlem sayısıyla orantılıdır.
+    EN: Rolls back the blocks after after_index together with their balance effects (inside a write transaction): reward transactions
+        are deleted, confirmed ones go back to pending, and the amount both credited to recipients is debited. Returns
+        (blocks removed, transactions back to pending). Thanks to idx_tx_block the cost is proportional to the transactions rolled back.
+    """
+    rows = conn.execute("SELECT tx_id, sender, recipient, amount, timestamp FROM transactions WHERE block_index > ? ORDER BY block_index, rowid",
+                        (after_index,)).fetchall()
+    debits = {}
+    for r in rows: debits[r['recipient']] = debits.get(r['recipient'], 0) + (r['amount'] or 0)
+    conn.executemany("UPDATE users SET balance = balance - ? WHERE wallet_public_key = ?", [(amount, key) for key, amount in debits.items()])
+    conn.execute("DELETE FROM transactions WHERE block_index > ? AND sender = ?", (after_index, SYSTEM_SENDER))
+    conn.execute("UPDATE transactions SET block_index = 0 WHERE block_index > ?", (after_index,))
+    removed = conn.execute("DELETE FROM blocks WHERE block_index > ?", (after_index,)).rowcount
+    return removed, [dict(r) for r in rows if r['sender'] != SYSTEM_SENDER]
+
+class ForkChoice:
+    """
+    TR: En çok iş kuralı. Yerel uca bağlanmayan geçerli bir aralık çatallanmadır: ortak ata (locator + common_prefix) bulunur,
+        dalın işi atadan sonraki yerel blokların işiyle karşılaştırılır. Dal daha ağırsa 'reorg' planı döner; değilse bellekte
+        yan dal olarak tutulur ve sonraki sayfalar ona eklenir (eşit işte ilk görülen kalır). Plan sözlüğü:
+        action ('extend' | 'reorg' | 'side' | 'none'), blocks (bağlanacak bloklar), known, accepted, ancestor, tip_hash, error.
+        Yürütme (geri alma + bağlama) uygulamanın yazma işlemindedir; tip_hash değişmişse plan geçersizdir.
+    EN: Most-work rule. A valid range that does not link to the local tip is a fork: the common ancestor is found (locator +
+        common_prefix) and the branch's work is compared with the work of the local blocks after the ancestor. If the branch is
+        heavier a 'reorg' plan is returned; otherwise it is kept in memory as a side branch and later pages extend it (on equal
+        work the first seen stays). Plan dict: action ('extend' | 'reorg' | 'side' | 'none'), blocks (blocks to connect),
+        known, accepted, ancestor, tip_hash, error. Execution (disconnect + connect) is in the app's write transaction;
+        the plan is void if tip_hash changed.
+    """
+    def __init__(self, validator, max_reorg_blocks=DEFAULT_MAX_REORG_BLOCKS, side_branch_ttl=DEFAULT_SIDE_BRANCH_TTL):
+        self.validator = validator
+        self.max_reorg_blocks = max_reorg_blocks
+        self.side_branch_ttl = side_branch_ttl
+        self.branches = {}
+        self._lock = threading.Lock()
+        self.stats = {'forks': 0, 'reorgs': 0, 'reorged_blocks': 0, 'deepest_reorg': 0, 'side_blocks': 0}
+
+    def _expire(self):
+        cutoff = time.time() - self.side_branch_ttl
+        for tip_hash in [h for h, b in self.branches.items() if b['updated'] < cutoff]: del self.branches[tip_hash]
+        while len(self.branches) > MAX_SIDE_BRANCHES:
+            del self.branches[min(self.branches, key=lambda h: self.branches[h]['updated'])]
+
+    def plan(self, conn, blocks):
+        tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+        result = {'action': 'none', 'blocks': [], 'known': 0, 'accepted': 0, 'ancestor': tip['block_index'], 'tip_hash': tip['block_hash'], 'error': None}
+        if not blocks: return result
+        with self._lock:
+            self._expire()
+            branch = self.branches.get(blocks[0].get('previous_hash')) if isinstance(blocks[0], dict) else None
+            # TR: Yan dalın atası artık yerel zincirde değilse dal geçersizdir
+            # EN: A side branch whose ancestor is no longer on the local chain is void
+            if branch is not None and block_hash_at(conn, branch['ancestor']) != branch['blocks'][0]['previous_hash']:
+                del self.branches[branch['blocks'][-1]['block_hash']]
+                branch = None
+        if branch is not None:
+            new_blocks, known, error = self.validator.validate(conn, blocks, parent=branch['blocks'][-1])
+            ancestor, chain = branch['ancestor'], branch['blocks'] + new_blocks
+        else:
+            new_blocks, known, error = self.validator.validate(conn, blocks)
+            ancestor, chain = (new_blocks[0]['block_index'] - 1 if new_blocks else tip['block_index']), new_blocks
+        result.update(known=known, accepted=known, error=error)
+        if not new_blocks: return result
+        if branch is None and ancestor == tip['block_index']:
+            result.update(action='extend', blocks=new_blocks, accepted=known + len(new_blocks))
+            return result
+
+        depth = tip['block_index'] - ancestor
+        with self._lock:
+            if branch is not None: self.branches.pop(branch['blocks'][-1]['block_hash'], None)
+            else:
+                self.stats['forks'] += 1
+                logger.info(f"Fork detected at block {ancestor}: local {depth} blocks vs branch {len(chain)}")
+            if max(depth, len(chain)) > self.max_reorg_blocks:
+                logger.warning(f"Fork at block {ancestor} exceeds max reorg depth {self.max_reorg_blocks}; branch dropped")
+                result['error'] = "reorg too deep"
+                return result
+            result.update(ancestor=ancestor, accepted=known + len(new_blocks))
+            if chain_work(len(chain), self.validator.min_difficulty) > chain_work(depth, self.validator.min_difficulty):
+                result.update(action='reorg', blocks=chain)
+                return result
+            self.branches[chain[-1]['block_hash']] = {'ancestor': ancestor, 'blocks': chain, 'updated': time.time()}
+            self.stats['side_blocks'] += len(new_blocks)
+            result['action'] = 'side'
+        return result
+
+    def record_reorg(self, ancestor, removed, connected):
+        with self._lock:
+            self.stats['reorgs'] += 1
+            self.stats['reorged_blocks'] += removed
+            self.stats['deepest_reorg'] = max(self.stats['deepest_reorg'], removed)
+        logger.warning(f"Reorg at block {ancestor}: {removed} blocks disconnected, {connected} connected")
+
+# --- BUDAMA / PRUNING ---
+
+def prune_blocks(conn, keep_blocks=DEFAULT_PRUNE_KEEP_BLOCKS, checkpoint_interval=DEFAULT_PRUNE_CHECKPOINT_INTERVAL,
+                 batch_blocks=DEFAULT_PRUNE_BATCH_BLOCKS):
+    """
+    TR: Uçtan keep_blocks gerideki en eski en fazla batch_blocks bloğu başlığa indirger (çağıranın yazma işleminde).
+        Genesis ve her checkpoint_interval'daki blok tam satır olarak block_checkpoints'e kopyalanır.
+        Silinen satırlar ardışık olduğu için sayfalar tümden boşalır ve incremental_vacuum ile geri verilebilir.
+        chain_stats'taki blok sayısı değişmez (başlıklar zincirin parçasıdır). Budanan blok sayısı döner.
+    EN: Reduces the oldest (at most batch_blocks) blocks more than keep_blocks behind the tip to headers (in the caller's write transaction).
+        Genesis and every checkpoint_interval-th block are copied as full rows to block_checkpoints.
+        Deleted rows are contiguous, so whole pages become free and can be released with incremental_vacuum.
+        The block count in chain_stats does not change (headers are part of the chain). Returns the number of blocks pruned.
+    """
+    tip = conn.execute("SELECT MAX(block_index) FROM blocks").fetchone()[0]
+    if tip is None: return 0
+    cutoff = conn.execute("SELECT MIN(block_index) FROM blocks").fetchone()[0] + batch_blocks - 1
+    cutoff = min(cutoff, tip - max(1, keep_blocks))
+    rows = conn.execute("SELECT block_index, block_hash, merkle_root FROM blocks WHERE block_index <= ? ORDER BY block_index ASC", (cutoff,)).fetchall()
+    if not rows: return 0
+    # TR: Merkle kökü başlıkta kalır; budanmış bloklardaki ödemeler de kanıtla doğrulanabilir
+    # EN: The Merkle root stays in the header; payments in pruned blocks can still be verified with a proof
+    conn.executemany("INSERT OR REPLACE INTO block_headers (block_index, block_hash, merkle_root) VALUES (?, ?, ?)",
+                     [(r['block_index'], pack_hash(r['block_hash']), pack_hash(r['merkle_root'])) for r in rows])
+    conn.execute("INSERT OR REPLACE INTO block_checkpoints (block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root) "
+                 "SELECT block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root FROM blocks "
+                 "WHERE block_index <= ? AND (block_index = 1 OR block_index % ? = 0)", (cutoff, max(1, checkpoint_interval)))
+    conn.execute("DELETE FROM blocks WHERE block_index <= ?", (cutoff,))
+    conn.execute("UPDATE chain_stats SET block_count = block_count + ? WHERE id = 1", (len(rows),))
+    return len(rows)
@@ -0,0 +1,677 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Database Layer (GDB)
+TR: Sunucu ve Mesh düğümü için ortak SQLite bağlantı katmanı (WAL, kalıcı bağlantılar, okuma havuzu).
+EN: Shared SQLite connection layer for the server and mesh node (WAL, persistent connections, read pool).
+"""
+import json
+import os
+import sqlite3
+import threading
+import queue
+import time
+import logging
+from contextlib import contextmanager
+import ghost_search
+import ghost_merkle
+
+logger = logging.getLogger("GhostDB")
+
+# --- VARSAYILAN AYARLAR / DEFAULT SETTINGS ---
+DEFAULT_READ_POOL_SIZE = 8
+DEFAULT_BUSY_TIMEOUT_MS = 30000
+DEFAULT_CACHE_SIZE_KB = 16384          # PRAGMA cache_size = -16384 (16 MB)
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # 256 MB
+DEFAULT_SYNCHRONOUS = 'NORMAL'         # TR: WAL ile güvenli / EN: Safe with WAL
+WRITE_RETRY_ATTEMPTS = 8
+
+WRITE_KEYWORDS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'ALTER', 'DROP')
+
+def _is_write_statement(sql):
+    head = sql.lstrip().split(None, 1)
+    return bool(head) and head[0].upper() in WRITE_KEYWORDS
+
+def _is_lock_error(e):
+    msg = str(e).lower()
+    return 'locked' in msg or 'busy' in msg
+
+
+class PooledConnection:
+    """
+    TR: sqlite3.Connection sarmalayıcısı. close() bağlantıyı kapatmaz, havuza iade eder.
+        Yazma bağlantısında ilk yazma ifadesi süreç içi kilidi alır ve BEGIN IMMEDIATE açar.
+    EN: sqlite3.Connection wrapper. close() does not close, it returns the connection to its pool.
+        On the write connection the first write statement takes the in-process lock and opens BEGIN IMMEDIATE.
+    """
+    def __init__(self, pool, raw, readonly):
+        self._pool = pool
+        self._raw = raw
+        self._readonly = readonly
+        self._depth = 0
+        self._holds_lock = False
+        self._cursors = []
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def _begin_write(self):
+        if self._readonly:
+            raise sqlite3.OperationalError("attempt to write a readonly database")
+        if self._raw.in_transaction: return
+        self._pool._write_lock.acquire()
+        self._holds_lock = True
+        try:
+            self._pool._begin_immediate(self._raw)
+        except Exception:
+            self._release_lock()
+            raise
+
+    def _release_lock(self):
+        if self._holds_lock:
+            self._holds_lock = False
+            self._pool._write_lock.release()
+
+    def execute(self, sql, params=()):
+        if not self._readonly and _is_write_statement(sql): self._begin_write()
+        cur = self._raw.execute(sql, params)
+        self._cursors.append(cur)
+        return cur
+
+    def executemany(self, sql, seq):
+        if not self._readonly and _is_write_statement(sql): self._begin_write()
+        cur = self._raw.executemany(sql, seq)
+        self._cursors.append(cur)
+        return cur
+
+    def _reset_cursors(self):
+        # TR: Yarım kalan SELECT'ler okuma anlık görüntüsünü (snapshot) açık tutar; havuza dönmeden kapat.
+        # EN: Half-read SELECTs keep a read snapshot open; close them before returning to the pool.
+        for cur in self._cursors:
+            try: cur.close()
+            except sqlite3.Error: pass
+        self._cursors = []
+
+    def executescript(self, script):
+        # TR: executescript kendi COMMIT'ini yapar; kilidi yine de tutuyoruz.
+        # EN: executescript issues its own COMMIT; we still hold the lock around it.
+        with self._pool._write_lock:
+            return self._raw.executescript(script)
+
+    def cursor(self):
+        return _PooledCursor(self)
+
+    def commit(self):
+        try:
+            if self._raw.in_transaction: self._raw.execute("COMMIT")
+        finally:
+            self._release_lock()
+
+    def rollback(self):
+        try:
+            if self._raw.in_transaction: self._raw.execute("ROLLBACK")
+        finally:
+            self._release_lock()
+
+    def close(self):
+        self._depth -= 1
+        if self._depth > 0: return
+        self._depth = 0
+        try: self.rollback()
+        except sqlite3.Error: pass
+        self._reset_cursors()
+        self._pool._release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _PooledCursor:
+    # TR: init_db gibi eski kodların kullandığı cursor() arayüzü
+    # EN: cursor() interface used by legacy code such as init_db
+    def __init__(self, conn):
+        self._conn = conn
+        self._cur = None
+
+    def execute(self, sql, params=()):
+        self._cur = self._conn.execute(sql, params)
+        return self._cur
+
+    def executemany(self, sql, seq):
+        self._cur = self._conn.executemany(sql, seq)
+        return self._cur
+
+    def fetchone(self): return self._cur.fetchone() if self._cur else None
+    def fetchall(self): return self._cur.fetchall() if self._cur else []
+
+    @property
+    def rowcount(self): return self._cur.rowcount if self._cur else -1
+
+    @property
+    def lastrowid(self): return self._cur.lastrowid if self._cur else None
+
+
+class ConnectionPool:
+    """
+    TR: İş parçacığı başına kalıcı yazma bağlantısı + salt okunur bağlantı havuzu.
+    EN: Per-thread persistent write connection + read-only connection pool.
+    """
+    def __init__(self, db_file, read_pool_size=DEFAULT_READ_POOL_SIZE, busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS,
+                 cache_size_kb=DEFAULT_CACHE_SIZE_KB, mmap_size=DEFAULT_MMAP_SIZE, synchronous=DEFAULT_SYNCHRONOUS):
+        self.db_file = db_file
+        self.read_pool_size = read_pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.synchronous = synchronous
+
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+
+        # TR: WAL kalıcıdır; dosya başına bir kez ayarlamak yeterli.
+        # EN: WAL is persistent; setting it once per file is enough.
+        raw = self._open(readonly=False)
+        mode = raw.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if str(mode).lower() != 'wal': logger.warning(f"WAL not enabled for {db_file} (mode={mode})")
+        self._local.conn = PooledConnection(self, raw, readonly=False)
+
+    def _open(self, readonly):
+        if readonly:
+            raw = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True, check_same_thread=False,
+                                  timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+        else:
+            raw = sqlite3.connect(self.db_file, check_same_thread=False,
+                                  timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+        raw.row_factory = sqlite3.Row
+        raw.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        raw.execute(f"PRAGMA synchronous={self.synchronous}")
+        raw.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        raw.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        raw.execute("PRAGMA temp_store=MEMORY")
+        if readonly: raw.execute("PRAGMA query_only=ON")
+        return raw
+
+    def _begin_immediate(self, raw):
+        # TR: Yazma kilidini işlem başında al; kilit yükseltme kilitlenmesini (deadlock) önler.
+        # EN: Take the write lock up front; avoids the deferred-upgrade deadlock that skips the busy handler.
+        delay = 0.05
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                raw.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not _is_lock_error(e) or attempt == WRITE_RETRY_ATTEMPTS - 1: raise
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    # --- YAZMA / WRITE ---
+    def get_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = PooledConnection(self, self._open(readonly=False), readonly=False)
+            self._local.conn = conn
+        conn._depth += 1
+        return conn
+
+    @contextmanager
+    def write(self):
+        """
+        TR: Tek bir IMMEDIATE işlem içinde yazma. Hata olursa geri alınır.
+        EN: Write inside a single IMMEDIATE transaction. Rolled back on error.
+        """
+        conn = self.get_connection()
+        nested = conn.in_transaction
+        if not nested: conn._begin_write()
+        try:
+            yield conn
+            if not nested: conn.commit()
+        except Exception:
+            if not nested: conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # --- OKUMA / READ ---
+    def get_read_connection(self):
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock: self._readers_created += 1
+            conn = PooledConnection(self, self._open(readonly=True), readonly=True)
+        conn._depth = 1
+        return conn
+
+    def _release(self, conn):
+        if not conn._readonly: return
+        if self._readers.qsize() < self.read_pool_size:
+            self._readers.put(conn)
+        else:
+            with self._readers_lock: self._readers_created -= 1
+            try: conn._raw.close()
+            except sqlite3.Error: pass
+
+    def checkpoint(self, mode='PASSIVE'):
+        conn = self.get_connection()
+        try: return conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        finally: conn.close()
+
+    # --- DİSK ALANI / DISK SPACE ---
+    def enable_incremental_vacuum(self):
+        """
+        TR: auto_vacuum=INCREMENTAL açar. Mevcut bir dosyada mod ancak tam bir VACUUM ile değişir (tek seferlik, dosyayı yeniden yazar).
+            Sonrasında boş sayfalar incremental_vacuum ile parça parça dosyadan atılır. Mod değiştiyse True döner.
+        EN: Turns on auto_vacuum=INCREMENTAL. On an existing file the mode only changes with a full VACUUM (one-off, rewrites the file).
+            Afterwards free pages are released from the file piecewise by incremental_vacuum. Returns True if the mode changed.
+        """
+        with self._write_lock:
+            conn = self.get_connection()
+            try:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2: return False
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                started = time.time()
+                conn.execute("VACUUM")
+                logger.info(f"auto_vacuum=INCREMENTAL enabled for {self.db_file} ({time.time() - started:.2f}s)")
+                return True
+            finally: conn.close()
+
+    def incremental_vacuum(self, pages=0):
+        # TR: pages=0 tüm boş sayfaları bırakır; WAL checkpoint'inden sonra dosya küçülür.
+        #     execute() pragmayı tek adım çalıştırır (tek sayfa); executescript sonuna kadar yürütür.
+        # EN: pages=0 releases every free page; the file shrinks after the WAL checkpoint.
+        #     execute() steps the pragma once (one page); executescript runs it to completion.
+        conn = self.get_connection()
+        try: conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        finally: conn.close()
+        self.checkpoint('TRUNCATE')
+
+    def footprint(self):
+        """
+        TR: Disk kullanımı (bayt): ana dosya, WAL ve geri kazanılabilir boş sayfalar.
+        EN: Disk usage (bytes): main file, WAL and reclaimable free pages.
+        """
+        conn = self.get_read_connection()
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        finally: conn.close()
+        sizes = {suffix: os.path.getsize(self.db_file + suffix) if os.path.exists(self.db_file + suffix) else 0 for suffix in ('', '-wal')}
+        return {'db_bytes': sizes[''], 'wal_bytes': sizes['-wal'], 'free_bytes': free_pages * page_size,
+                'page_size': page_size, 'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, auto_vacuum)}
+
+
+# --- GRUP COMMIT YAZMA KUYRUĞU / GROUP-COMMIT WRITE QUEUE ---
+DEFAULT_WRITE_QUEUE_SIZE = 10000
+DEFAULT_WRITE_BATCH_ROWS = 500
+DEFAULT_WRITE_BATCH_MS = 20
+DEFAULT_WRITE_PUT_TIMEOUT = 2.0
+
+class WriteQueueFull(Exception):
+    pass
+
+class WriteTicket:
+    __slots__ = ('func', 'args', 'on_commit', 'event', 'result', 'error')
+
+    def __init__(self, func, args, on_commit=None):
+        self.func = func
+        self.args = args
+        self.on_commit = on_commit
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    def wait(self, timeout=None):
+        """
+        TR: Yazma diske işlenene (COMMIT) kadar bekler; fonksiyonun sonucunu döndürür.
+        EN: Waits until the write is committed; returns the function's result.
+        """
+        if not self.event.wait(timeout): raise TimeoutError("write not committed in time")
+        if self.error is not None: raise self.error
+        return self.result
+
+
+class WriteQueue:
+    """
+    TR: Tek yazar iş parçacığı. Gelen yazmaları her batch_ms'de veya batch_rows satırda bir işlemde toplar.
+        Her öğe kendi SAVEPOINT'inde çalışır; biri hata verirse diğerleri etkilenmez.
+    EN: Single writer thread. Batches inbound writes into one transaction every batch_ms or batch_rows items.
+        Each item runs in its own SAVEPOINT so one failure does not poison the batch.
+    """
+    def __init__(self, pool, max_pending=DEFAULT_WRITE_QUEUE_SIZE, batch_rows=DEFAULT_WRITE_BATCH_ROWS,
+                 batch_ms=DEFAULT_WRITE_BATCH_MS, put_timeout=DEFAULT_WRITE_PUT_TIMEOUT):
+        self.pool = pool
+        self.batch_rows = batch_rows
+        self.batch_ms = batch_ms
+        self.put_timeout = put_timeout
+        self._q = queue.Queue(maxsize=max_pending)
+        self.stats = {'items': 0, 'batches': 0, 'failed': 0, 'rejected': 0, 'max_batch': 0}
+        threading.Thread(target=self._run, name="GhostWriteQueue", daemon=True).start()
+
+    def submit(self, func, *args, wait=False, timeout=None, on_commit=None):
+        """
+        TR: func(conn, *args) yazar iş parçacığında çalışır. Kuyruk doluysa put_timeout kadar bekler,
+            sonra WriteQueueFull fırlatır (geri basınç). on_commit(result) sadece öğe COMMIT edildiyse (geri alınmadıysa) çağrılır.
+        EN: func(conn, *args) runs on the writer thread. When the queue is full it blocks up to put_timeout,
+            then raises WriteQueueFull (backpressure). on_commit(result) is called only if the item was committed (not rolled back).
+        """
+        ticket = WriteTicket(func, args, on_commit)
+        try:
+            self._q.put(ticket, timeout=self.put_timeout)
+        except queue.Full:
+            self.stats['rejected'] += 1
+            raise WriteQueueFull(f"write queue full ({self._q.maxsize} pending)")
+        if wait: return ticket.wait(timeout)
+        return ticket
+
+    def flush(self, timeout=None):
+        return self.submit(lambda conn: None, wait=True, timeout=timeout)
+
+    def pending(self):
+        return self._q.qsize()
+
+    def _run(self):
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.batch_ms / 1000.0
+            while len(batch) < self.batch_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try: batch.append(self._q.get(timeout=remaining))
+                except queue.Empty: break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            with self.pool.write() as conn:
+                for ticket in batch:
+                    conn.execute("SAVEPOINT ghost_wq")
+                    try:
+                        ticket.result = ticket.func(conn, *ticket.args)
+                        conn.execute("RELEASE ghost_wq")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO ghost_wq")
+                        conn.execute("RELEASE ghost_wq")
+                        ticket.error = e
+                        self.stats['failed'] += 1
+        except Exception as e:
+            logger.error(f"Write batch of {len(batch)} failed: {e}")
+            for ticket in batch:
+                if ticket.error is None: ticket.result, ticket.error = None, e
+        self.stats['items'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+        for ticket in batch:
+            if ticket.error is None and ticket.on_commit is not None:
+                try: ticket.on_commit(ticket.result)
+                except Exception as e: logger.warning(f"Write commit hook failed: {e}")
+            ticket.event.set()
+
+
+# --- ŞEMA GÖÇLERİ / SCHEMA MIGRATIONS ---
+# TR: Her göç (sürüm, açıklama, fonksiyon) üçlüsüdür ve kendi IMMEDIATE işleminde bir kez çalışır.
+#     Sunucu ve Mesh düğümü aynı listeyi paylaşır; sadece bir tarafta olan tablolar _table_exists ile korunur.
+#     Fonksiyonlar (conn, ctx) alır; ctx uygulamanın verdiği kaynaklardır (ör. 'blob_store').
+# EN: Each migration is a (version, description, function) triple run once inside its own IMMEDIATE transaction.
+#     Server and mesh node share the same list; tables that exist on only one side are guarded with _table_exists.
+#     Functions take (conn, ctx); ctx holds resources supplied by the app (e.g. 'blob_store').
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+def _column_exists(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})").fetchall())
+
+def _m001_hot_path_indexes(conn, ctx):
+    # TR: Son işlemler (gönderen VEYA alıcı, zamana göre) ve madencilik arzı toplamı
+    # EN: Last transactions (sender OR recipient by time) and the mined-supply aggregate
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_sender_ts ON transactions(sender, timestamp, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_recipient_ts ON transactions(recipient, timestamp)")
+    # TR: Bekleyen işlem taraması (block_index = 0 OR IS NULL) için kısmi, kapsayan indeks
+    # EN: Partial covering index for the pending-tx scan (block_index = 0 OR IS NULL)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_pending ON transactions(tx_id, sender, recipient, amount) "
+                 "WHERE block_index = 0 OR block_index IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_pair_ts ON messages(sender, recipient, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_peers_last_seen ON mesh_peers(last_seen, ip_address)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blocks_hash ON blocks(block_hash)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_owner_ctime ON assets(owner_pub_key, creation_time)")
+    if _table_exists(conn, 'contracts'):
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_contracts_owner ON contracts(owner_key, creation_time)")
+    conn.execute("ANALYZE")
+
+def _m002_asset_blobs_to_store(conn, ctx):
+    # TR: Varlık içeriği diske (içerik adresli) taşınır; satırda sadece hash kalır
+    # EN: Asset content moves to disk (content-addressed); the row keeps only the hash
+    if not _column_exists(conn, 'assets', 'content_hash'):
+        conn.execute("ALTER TABLE assets ADD COLUMN content_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_assets_content_hash ON assets(content_hash)")
+    store = ctx.get('blob_store')
+    if store is None: raise RuntimeError("blob_store required for migration 2")
+    moved = 0
+    ids = [r[0] for r in conn.execute("SELECT asset_id FROM assets WHERE content IS NOT NULL").fetchall()]
+    for asset_id in ids:
+        # TR: Satır satır okunur; tüm BLOB'lar aynı anda belleğe alınmaz
+        # EN: Read row by row; never holds all BLOBs in memory at once
+        row = conn.execute("SELECT content FROM assets WHERE asset_id = ?", (asset_id,)).fetchone()
+        content = row[0]
+        if isinstance(content, str): content = content.encode('utf-8')
+        content_hash = store.put_bytes(bytes(content))
+        conn.execute("UPDATE assets SET content_hash = ?, content = NULL, storage_size = ? WHERE asset_id = ?",
+                     (content_hash, len(content), asset_id))
+        moved += 1
+    if moved: logger.info(f"Moved {moved} asset BLOBs to the blob store")
+
+def _m003_asset_search_index(conn, ctx):
+    # TR: LIKE '%q%' taraması yerine FTS5 dizini; mevcut varlıklar bir kez dizinlenir
+    # EN: FTS5 index instead of LIKE '%q%' scans; existing assets are indexed once
+    if not ghost_search.create_index(conn): return
+    store = ctx.get('blob_store')
+    if store is None: raise RuntimeError("blob_store required for migration 3")
+    indexed = ghost_search.rebuild_index(conn, store)
+    if indexed: logger.info(f"Indexed {indexed} assets for full-text search")
+
+# --- ZİNCİR İSTATİSTİKLERİ / CHAIN STATISTICS ---
+# TR: Tek satırlık chain_stats tablosu tetikleyicilerle güncellenir; blok veya işlem ekleyen her yazma
+#     aynı işlemde sayaçları da günceller. Okuma O(1); SUM(...) taraması yok.
+# EN: The single-row chain_stats table is maintained by triggers; every write that appends a block or a transaction
+#     updates the counters in the same transaction. Reads are O(1); no SUM(...) scan.
+SYSTEM_SENDER = 'GhostProtocol_System'
+CHAIN_STATS_COLUMNS = ('circulating_supply', 'block_count', 'treasury_total', 'tx_count')
+
+def _tx_delta(row, sign):
+    return (f"tx_count = tx_count {sign} 1, "
+            f"circulating_supply = circulating_supply {sign} (CASE WHEN {row}.sender = '{SYSTEM_SENDER}' THEN COALESCE({row}.amount, 0) ELSE 0 END), "
+            f"treasury_total = treasury_total {sign} (CASE WHEN {row}.recipient = treasury_key THEN COALESCE({row}.amount, 0) ELSE 0 END)")
+
+def create_chain_stats(conn, treasury_key):
+    conn.execute("CREATE TABLE IF NOT EXISTS chain_stats (id INTEGER PRIMARY KEY CHECK (id = 1), treasury_key TEXT, "
+                 "circulating_supply REAL DEFAULT 0, block_count INTEGER DEFAULT 0, treasury_total REAL DEFAULT 0, tx_count INTEGER DEFAULT 0)")
+    conn.execute("INSERT OR IGNORE INTO chain_stats (id, treasury_key) VALUES (1, ?)", (treasury_key,))
+    conn.execute("CREATE TRIGGER IF NOT EXISTS trg_stats_block_insert AFTER INSERT ON blocks BEGIN "
+                 "UPDATE chain_stats SET block_count = block_count + 1 WHERE id = 1; END")
+    conn.execute("CREATE TRIGGER IF NOT EXISTS trg_stats_block_delete AFTER DELETE ON blocks BEGIN "
+                 "UPDATE chain_stats SET block_count = block_count - 1 WHERE id = 1; END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_tx_insert AFTER INSERT ON transactions BEGIN "
+                 f"UPDATE chain_stats SET {_tx_delta('NEW', '+')} WHERE id = 1; END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_tx_delete AFTER DELETE ON transactions BEGIN "
+                 f"UPDATE chain_stats SET {_tx_delta('OLD', '-')} WHERE id = 1; END")
+    # TR: Tutar/taraf değişirse eski katkı çıkarılıp yenisi eklenir (tx_count değişmez)
+    # EN: If amount/parties change the old contribution is removed and the new one added (tx_count unchanged)
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_stats_tx_update AFTER UPDATE OF sender, recipient, amount ON transactions BEGIN "
+                 f"UPDATE chain_stats SET {_tx_delta('OLD', '-')} WHERE id = 1; "
+                 f"UPDATE chain_stats SET {_tx_delta('NEW', '+')} WHERE id = 1; END")
+
+def reindex_chain_stats(conn):
+    """
+    TR: Sayaçları tablolardan baştan hesaplar (tam tarama); yönetim komutu ve göç için.
+    EN: Recomputes the counters from the tables (full scan); for the admin command and the migration.
+    """
+    treasury_key = conn.execute("SELECT treasury_key FROM chain_stats WHERE id = 1").fetchone()[0]
+    row = conn.execute("SELECT COUNT(*), COALESCE(SUM(CASE WHEN sender = ? THEN amount ELSE 0 END), 0), "
+                       "COALESCE(SUM(CASE WHEN recipient = ? THEN amount ELSE 0 END), 0) FROM transactions",
+                       (SYSTEM_SENDER, treasury_key)).fetchone()
+    block_count = conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+    # TR: Budanmış geçmiş (sadece başlık) de zincirin parçasıdır
+    # EN: Pruned history (headers only) is still part of the chain
+    if _table_exists(conn, 'block_headers'): block_count += conn.execute("SELECT COUNT(*) FROM block_headers").fetchone()[0]
+    conn.execute("UPDATE chain_stats SET tx_count = ?, circulating_supply = ?, treasury_total = ?, block_count = ? WHERE id = 1",
+                 (row[0], row[1], row[2], block_count))
+    return read_chain_stats(conn)
+
+def read_chain_stats(conn):
+    row = conn.execute(f"SELECT {', '.join(CHAIN_STATS_COLUMNS)} FROM chain_stats WHERE id = 1").fetchone()
+    return dict(zip(CHAIN_STATS_COLUMNS, row)) if row else None
+
+def _m004_chain_stats(conn, ctx):
+    treasury_key = ctx.get('treasury_key')
+    if treasury_key is None: raise RuntimeError("treasury_key required for migration 4")
+    create_chain_stats(conn, treasury_key)
+    stats = reindex_chain_stats(conn)
+    logger.info(f"Chain stats indexed: {stats['block_count']} blocks, {stats['tx_count']} transactions")
+
+def _m005_block_headers(conn, ctx):
+    # TR: Budama modu: eski bloklar sadece başlık olarak (32 baytlık ikili hash) tutulur; ara sıra tam satır kontrol noktası olarak saklanır
+    # EN: Pruning mode: old blocks are kept as headers only (32-byte binary hash); every so often a full row is kept as a checkpoint
+    conn.execute("CREATE TABLE IF NOT EXISTS block_headers (block_index INTEGER PRIMARY KEY, block_hash BLOB NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_block_headers_hash ON block_headers(block_hash)")
+    conn.execute("CREATE TABLE IF NOT EXISTS block_checkpoints (block_index INTEGER PRIMARY KEY, timestamp REAL, previous_hash TEXT, "
+                 "block_hash TEXT, proof INTEGER, miner_key TEXT)")
+
+def _m006_merkle_roots(conn, ctx):
+    # TR: Bloklar onayladıkları işlemlerin Merkle köküne bağlanır; kanıt için blok başına işlemler tx_id sırasıyla okunur
+    # EN: Blocks commit to the Merkle root of the transactions they confirm; proofs read a block's transactions in tx_id order
+    for table, column_type in (('blocks', 'TEXT'), ('block_checkpoints', 'TEXT'), ('block_headers', 'BLOB')):
+        if not _column_exists(conn, table, 'merkle_root'): conn.execute(f"ALTER TABLE {table} ADD COLUMN merkle_root {column_type}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tx_block ON transactions(block_index, tx_id)")
+    # TR: Geçmiş kökler sadece tam işlem geçmişi olan tarafta (sunucu) hesaplanır; düğümün yerel işlemleri eksiktir, kökler eşlerden gelir
+    # EN: Historical roots are only computed where the full transaction history exists (the server); a node's local transactions
+    #     are incomplete, its roots come from peers
+    if not ctx.get('merkle_backfill'): return
+    cursor = conn.execute(f"SELECT {ghost_merkle.TX_LEAF_COLUMNS}, block_index FROM transactions WHERE block_index > 0 ORDER BY block_index, tx_id")
+    roots, current, leaves = [], None, []
+    for row in cursor:
+        if row['block_index'] != current:
+            if leaves: roots.append((ghost_merkle.merkle_root(leaves), current))
+            current, leaves = row['block_index'], []
+        leaves.append(ghost_merkle.tx_leaf(row))
+    if leaves: roots.append((ghost_merkle.merkle_root(leaves), current))
+    conn.executemany("UPDATE blocks SET merkle_root = ? WHERE block_index = ?", roots)
+    conn.execute("UPDATE blocks SET merkle_root = ? WHERE merkle_root IS NULL", (ghost_merkle.EMPTY_ROOT,))
+    logger.info(f"Merkle roots computed for {len(roots)} blocks with transactions")
+
+# --- VARLIK DEĞİŞİM GÜNLÜĞÜ / ASSET CHANGE LOG ---
+# TR: assets tablosundaki her ekleme, içerik/meta güncellemesi ve silme tetikleyicilerle asset_changes'a artan bir seq ile yazılır.
+#     Varlık başına sadece son değişiklik tutulur (eskisi silinir), silmeler mezar taşı olarak kalır; günlük varlık sayısıyla sınırlıdır.
+#     AUTOINCREMENT seq'in silinen satırlardan sonra bile geri gitmemesini sağlar; düğüm eş başına son gördüğü seq'i saklar.
+# EN: Every insert, content/metadata update and delete on assets is written to asset_changes by triggers with an increasing seq.
+#     Only the latest change per asset is kept (the older one is deleted) and deletes stay as tombstones; the log is bounded by the asset count.
+#     AUTOINCREMENT keeps seq from going back even after rows are deleted; a node stores the last seq it saw per peer.
+MAX_ASSET_CHANGES_PER_PAGE = 1000
+ASSET_META_COLUMNS = ('owner_pub_key', 'type', 'name', 'content_hash', 'storage_size', 'creation_time', 'expiry_time', 'keywords')
+# TR: Julian gün -> Unix zamanı (unixepoch() eski SQLite sürümlerinde yok)
+# EN: Julian day -> Unix time (unixepoch() is missing on older SQLite versions)
+_SQL_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+
+def create_asset_changes(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS asset_changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT NOT NULL, op TEXT NOT NULL, changed_at REAL)")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_asset_changes_asset ON asset_changes(asset_id)")
+    # TR: Tetikleyici içinde OR REPLACE kullanılmaz: dıştaki INSERT OR IGNORE onu ezer; önce silmek her durumda çalışır
+    # EN: No OR REPLACE inside the triggers: an outer INSERT OR IGNORE would override it; deleting first always works
+    for name, event, row, op in (('insert', 'INSERT', 'NEW', 'upsert'),
+                                 ('update', 'UPDATE OF owner_pub_key, name, content_hash, storage_size, expiry_time, keywords', 'NEW', 'upsert'),
+                                 ('delete', 'DELETE', 'OLD', 'delete')):
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_asset_change_{name} AFTER {event} ON assets BEGIN "
+                     f"DELETE FROM asset_changes WHERE asset_id = {row}.asset_id; "
+                     f"INSERT INTO asset_changes (asset_id, op, changed_at) VALUES ({row}.asset_id, '{op}', {_SQL_NOW}); END")
+
+def read_asset_changes(conn, since=0, limit=MAX_ASSET_CHANGES_PER_PAGE):
+    """
+    TR: since'ten sonraki değişiklikler (seq sırasıyla, en fazla limit). 'upsert' kayıtları varlığın güncel meta verisini taşır,
+        'delete' kayıtları sadece asset_id. next bir sonraki isteğin since değeridir.
+    EN: Changes after since (in seq order, at most limit). 'upsert' records carry the asset's current metadata,
+        'delete' records only the asset_id. next is the since value for the following request.
+    """
+    limit = max(1, min(int(limit), MAX_ASSET_CHANGES_PER_PAGE))
+    columns = ", ".join(f"a.{c}" for c in ASSET_META_COLUMNS)
+    rows = conn.execute(f"SELECT c.seq, c.asset_id, c.op, c.changed_at, {columns} FROM asset_changes c LEFT JOIN assets a ON a.asset_id = c.asset_id "
+                        "WHERE c.seq > ? ORDER BY c.seq LIMIT ?", (since, limit + 1)).fetchall()
+    changes = [{k: r[k] for k in ('seq', 'asset_id', 'op', 'changed_at') + (ASSET_META_COLUMNS if r['op'] == 'upsert' else ())} for r in rows[:limit]]
+    latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM asset_changes").fetchone()[0]
+    return {'changes': changes, 'next': changes[-1]['seq'] if changes else since, 'more': len(rows) > limit, 'latest': latest}
+
+def read_sync_cursor(conn, peer, stream):
+    row = conn.execute("SELECT position FROM sync_cursors WHERE peer = ? AND stream = ?", (peer, stream)).fetchone()
+    return row[0] if row else 0
+
+def write_sync_cursor(conn, peer, stream, position):
+    conn.execute("INSERT OR REPLACE INTO sync_cursors (peer, stream, position, updated_at) VALUES (?, ?, ?, ?)", (peer, stream, position, time.time()))
+
+# TR: İçeriği alınamayan değişiklikler (blob hiçbir eşte yok, eş hata veriyor) eş başına park edilir; imleç onları beklemeden ilerler.
+#     Varlık başına tek kayıt tutulur: aynı varlık için daha yeni bir değişiklik eskisinin yerine geçer.
+# EN: Changes whose content cannot be fetched (blob on no peer, peer erroring) are parked per peer; the cursor advances without them.
+#     One record per asset is kept: a newer change for the same asset replaces the older one.
+def read_parked_changes(conn, peer, stream, now):
+    rows = conn.execute("SELECT change, attempts FROM parked_changes WHERE peer = ? AND stream = ? AND retry_at <= ? ORDER BY retry_at",
+                        (peer, stream, now)).fetchall()
+    return [(json.loads(r[0]), r[1]) for r in rows]
+
+def park_change(conn, peer, stream, item_id, change, attempts, retry_at):
+    conn.execute("INSERT OR REPLACE INTO parked_changes (peer, stream, item_id, change, attempts, retry_at) VALUES (?, ?, ?, ?, ?, ?)",
+                 (peer, stream, item_id, json.dumps(change), attempts, retry_at))
+
+def unpark_change(conn, peer, stream, item_id):
+    conn.execute("DELETE FROM parked_changes WHERE peer = ? AND stream = ? AND item_id = ?", (peer, stream, item_id))
+
+def _m007_asset_changes(conn, ctx):
+    create_asset_changes(conn)
+    # TR: Mevcut varlıklar oluşturulma sırasıyla günlüğe girer; ilk senkronizasyon since=0 ile hepsini alır
+    # EN: Existing assets enter the log in creation order; the first sync with since=0 gets all of them
+    conn.execute("INSERT INTO asset_changes (asset_id, op, changed_at) SELECT asset_id, 'upsert', creation_time FROM assets "
+                 "WHERE asset_id NOT IN (SELECT asset_id FROM asset_changes) ORDER BY creation_time")
+    conn.execute("CREATE TABLE IF NOT EXISTS sync_cursors (peer TEXT NOT NULL, stream TEXT NOT NULL, position INTEGER NOT NULL, updated_at REAL, "
+                 "PRIMARY KEY (peer, stream))")
+
+def _m008_parked_changes(conn, ctx):
+    conn.execute("CREATE TABLE IF NOT EXISTS parked_changes (peer TEXT NOT NULL, stream TEXT NOT NULL, item_id TEXT NOT NULL, change TEXT NOT NULL, "
+                 "attempts INTEGER NOT NULL, retry_at REAL NOT NULL, PRIMARY KEY (peer, stream, item_id))")
+
+MIGRATIONS = [
+    (1, "hot-path secondary indexes", _m001_hot_path_indexes),
+    (2, "asset content moved to content-addressed blob store", _m002_asset_blobs_to_store),
+    (3, "FTS5 full-text index over assets", _m003_asset_search_index),
+    (4, "trigger-maintained chain_stats table", _m004_chain_stats),
+    (5, "header-only storage for pruned block history", _m005_block_headers),
+    (6, "per-block transaction Merkle roots", _m006_merkle_roots),
+    (7, "asset change log and per-peer sync cursors", _m007_asset_changes),
+    (8, "parked sync changes awaiting content", _m008_parked_changes),
+]
+
+def get_schema_version(conn):
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def run_migrations(pool, migrations=None, context=None):
+    """
+    TR: Eksik göçleri sırayla uygular; mevcut veritabanı dosyalarını yerinde yükseltir.
+    EN: Applies pending migrations in order; upgrades existing database files in place.
+    """
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m[0])
+    context = context or {}
+    with pool.write() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description TEXT, applied_at REAL)")
+
+    applied = []
+    for version, description, func in migrations:
+        # TR: Sürüm kontrolü işlem içinde tekrarlanır; birden çok gunicorn işçisi aynı anda başlayabilir.
+        # EN: The version check is repeated inside the transaction; several gunicorn workers may start at once.
+        with pool.write() as conn:
+            if get_schema_version(conn) >= version: continue
+            started = time.time()
+            func(conn, context)
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (version, description, time.time()))
+            logger.info(f"Schema migration {version} applied: {description} ({time.time() - started:.2f}s)")
+            applied.append(version)
+    return applied
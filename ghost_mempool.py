@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Mempool
+TR: Bekleyen işlemlerin (block_index = 0) bellek içi dizini. Blok oluşturma tüm tabloyu taramak yerine buradan seçer.
+EN: In-memory index of pending transactions (block_index = 0). Block assembly selects from here instead of scanning the table.
+"""
+import threading
+import time
+import logging
+from collections import OrderedDict
+from itertools import chain
+
+logger = logging.getLogger("GhostMempool")
+
+DEFAULT_MAX_BLOCK_TXS = 1000
+DEFAULT_MAX_BLOCK_TXS_PER_SENDER = 100
+DEFAULT_MAX_TXS = 50000
+DEFAULT_TX_TTL = 259200
+
+PENDING_COLUMNS = "rowid, tx_id, sender, recipient, amount, timestamp"
+
+class Mempool:
+    """
+    TR: İşlemler geliş sırasıyla tutulur (tx_id -> kayıt) ve gönderene göre ayrıca dizinlenir.
+        İşlem biçiminde nonce yoktur; bir gönderenin sırası geliş sırasıdır ve seçim bu sırayı asla bozmaz.
+        Yeni satırlar rowid filigranıyla artımlı okunur (refresh); böylece işlem ekleyen her kod yolu
+        ayrıca bağlanmak zorunda kalmaz. TTL'i geçen veya kapasiteyi aşan en eski kayıtlar bellekten atılır. Süresi dolanlar
+        DB'de bekler durumda kalır ve hiç seçilmez; kapasite taşması ise hâlâ geçerlidir: bellekteki küme bir bloğun altına
+        inince DB'den (en eskiden başlayarak) geri okunur.
+    EN: Transactions are kept in arrival order (tx_id -> entry) and additionally indexed by sender.
+        The tx format has no nonce; a sender's sequence is its arrival order and selection never reorders it.
+        New rows are read incrementally by a rowid watermark (refresh), so every code path that inserts
+        a transaction does not need its own hook. The oldest entries past the TTL or over capacity are dropped
+        from memory. Expired ones stay pending in the DB and are never selected. Capacity overflow is still valid: once
+        the in-memory set drains below one block it is read back from the DB (oldest first).
+    """
+    def __init__(self, max_block_txs=DEFAULT_MAX_BLOCK_TXS, max_per_sender=DEFAULT_MAX_BLOCK_TXS_PER_SENDER,
+                 max_txs=DEFAULT_MAX_TXS, ttl=DEFAULT_TX_TTL):
+        self.max_block_txs = max_block_txs
+        self.max_per_sender = max_per_sender
+        self.max_txs = max_txs
+        self.ttl = ttl
+        self._txs = OrderedDict()
+        self._by_sender = {}
+        self._last_rowid = 0
+        self._overflow = False
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.stats = {'added': 0, 'confirmed': 0, 'evicted': 0}
+
+    def load(self, conn):
+        """
+        TR: Başlangıçta bekleyen işlemlerden yeniden kurulur (tek tam tarama).
+        EN: Rebuilt from pending transactions at startup (the one full scan).
+        """
+        with self._lock:
+            self._txs.clear()
+            self._by_sender.clear()
+            self._last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions").fetchone()[0]
+            rows = conn.execute(f"SELECT {PENDING_COLUMNS} FROM transactions WHERE (block_index = 0 OR block_index IS NULL) "
+                                "AND timestamp >= ? ORDER BY rowid", (time.time() - self.ttl,)).fetchall()
+            for row in rows: self._add(row)
+            self._evict()
+        logger.info(f"Mempool rebuilt: {len(self._txs)} pending transactions")
+        return len(self._txs)
+
+    def refresh(self, conn):
+        """
+        TR: Sadece filigrandan sonraki satırları okur. conn kesinleşmiş veriyi görmeli (ayrı okuma bağlantısı):
+            geri alınan bir işlemin rowid'i yeniden kullanılabilir ve filigranın ötesinde kalmamalıdır.
+        EN: Reads only rows past the watermark. conn must see committed data (a separate read connection):
+            a rolled-back insert's rowid can be reused and must not be left behind the watermark.
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = conn.execute(f"SELECT {PENDING_COLUMNS}, block_index FROM transactions WHERE rowid > ? ORDER BY rowid",
+                                (self._last_rowid,)).fetchall()
+            for row in rows:
+                self._last_rowid = row['rowid']
+                if not row['block_index'] and (row['timestamp'] or 0) >= cutoff: self._add(row)
+            self._evict()
+            if self._overflow and len(self._txs) < self.max_block_txs: self._reload(conn, cutoff)
+            return len(rows)
+
+    def _reload(self, conn, cutoff):
+        # TR: Kapasite yüzünden atılan kayıtlar filigranın gerisindedir; bekleyenlerden bellekte olmayanlar boş yer kadar geri okunur
+        # EN: Entries evicted for capacity are behind the watermark; pending rows not in memory are read back to fill the free room
+        room, older = self.max_txs - len(self._txs), []
+        rows = conn.execute(f"SELECT {PENDING_COLUMNS} FROM transactions WHERE (block_index = 0 OR block_index IS NULL) "
+                            "AND timestamp >= ? AND rowid <= ? ORDER BY rowid", (cutoff, self._last_rowid))
+        for row in rows:
+            if row['tx_id'] in self._txs: continue
+            if len(older) >= room: break
+            older.append(row)
+        else: self._overflow = False
+        self._prepend(older)
+        logger.info(f"Mempool reloaded {len(older)} overflow transactions")
+
+    def _add(self, row):
+        tx_id = row['tx_id']
+        if tx_id in self._txs: return
+        self._txs[tx_id] = {'tx_id': tx_id, 'sender': row['sender'], 'recipient': row['recipient'],
+                            'amount': row['amount'], 'timestamp': row['timestamp'] or 0}
+        self._by_sender.setdefault(row['sender'], OrderedDict())[tx_id] = None
+        self.stats['added'] += 1
+
+    def _drop(self, tx_id):
+        entry = self._txs.pop(tx_id, None)
+        if entry is None: return False
+        self._pinned.discard(tx_id)
+        sender_txs = self._by_sender.get(entry['sender'])
+        if sender_txs is not None:
+            sender_txs.pop(tx_id, None)
+            if not sender_txs: del self._by_sender[entry['sender']]
+        return True
+
+    def _evict(self):
+        # TR: En eski kayıtlar öndedir; TTL veya kapasite sınırında O(sabitlenen + atılan). Geri alınan bloklardan dönen (sabitlenen)
+        #     işlemler daha önce onaylanmıştı: kapasiteye sayılmaz, TTL ile de atılmaz
+        # EN: The oldest entries are at the front; O(pinned + evicted) at the TTL or capacity limit. Transactions back from disconnected
+        #     blocks (pinned) were confirmed before: they do not count against capacity and are not expired by the TTL
+        cutoff = time.time() - self.ttl
+        excess, victims = len(self._txs) - len(self._pinned) - self.max_txs, []
+        for tx_id, entry in self._txs.items():
+            if tx_id in self._pinned: continue
+            if excess > 0:
+                if entry['timestamp'] >= cutoff: self._overflow = True
+                excess -= 1
+            elif entry['timestamp'] >= cutoff: break
+            victims.append(tx_id)
+        for tx_id in victims: self._drop(tx_id)
+        self.stats['evicted'] += len(victims)
+
+    def select(self, limit=None, skip=None, extra=()):
+        """
+        TR: Geliş sırasında en fazla limit işlem seçer; gönderen başına sınırı dolan gönderenin sonraki
+            işlemleri atlanır (sıra korunur). Maliyet O(seçilen + atlanan). extra, mempool'a henüz girmemiş
+            (ör. aynı işlemde geri alınan) adaylardır ve önce gelir.
+        EN: Selects up to limit transactions in arrival order; once a sender hits its per-block cap its later
+            transactions are skipped (order is preserved). Cost is O(selected + skipped). extra holds candidates
+            not in the mempool yet (e.g. rolled back in the same transaction) and comes first.
+        """
+        limit = self.max_block_txs if limit is None else limit
+        selected, per_sender = [], {}
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            candidates = chain(((tx['tx_id'], tx, True) for tx in extra if tx['tx_id'] not in self._txs),
+                               ((tx_id, entry, tx_id in self._pinned) for tx_id, entry in self._txs.items()))
+            for tx_id, entry, pinned in candidates:
+                if len(selected) >= limit: break
+                if (skip and tx_id in skip) or (not pinned and entry['timestamp'] < cutoff): continue
+                sender = entry['sender']
+                if per_sender.get(sender, 0) >= self.max_per_sender: continue
+                per_sender[sender] = per_sender.get(sender, 0) + 1
+                selected.append(entry)
+        return selected
+
+    def remove(self, tx_ids):
+        with self._lock:
+            removed = sum(1 for tx_id in tx_ids if self._drop(tx_id))
+            self.stats['confirmed'] += removed
+            return removed
+
+    def restore(self, txs):
+        """
+        TR: Geri alınan bloklardan bekleyene dönen işlemler en öne konur: bir gönderenin onaylanmış işlemleri bekleyenlerden
+            önce gelmiştir, sıra böylece korunur. Satırların rowid'i filigranın gerisinde olduğundan refresh onları görmez;
+            bu yüzden sabitlenirler ve kapasite veya TTL ile atılmazlar. Sadece COMMIT'ten sonra çağrılmalıdır.
+        EN: Transactions back to pending from disconnected blocks go to the front: a sender's confirmed transactions arrived
+            before its pending ones, so the order is kept. Their rowids are behind the watermark, so refresh would not see them;
+            they are therefore pinned and never evicted by capacity or the TTL. Call only after COMMIT.
+        """
+        with self._lock:
+            self._prepend(txs)
+            self._pinned.update(tx['tx_id'] for tx in txs)
+            self._evict()
+            return len(txs)
+
+    def _prepend(self, txs):
+        rest = list(self._txs.items())
+        self._txs.clear()
+        self._by_sender.clear()
+        for tx in txs: self._add(tx)
+        for tx_id, entry in rest:
+            if tx_id in self._txs: continue
+            self._txs[tx_id] = entry
+            self._by_sender.setdefault(entry['sender'], OrderedDict())[tx_id] = None
+
+    def pending_for(self, sender):
+        with self._lock:
+            return [self._txs[tx_id] for tx_id in self._by_sender.get(sender, ())]
+
+    def __len__(self):
+        return len(self._txs)
+
+    def snapshot(self):
+        with self._lock:
+            d = dict(self.stats)
+            d.update({'size': len(self._txs), 'overflow': self._overflow, 'restored': len(self._pinned), 'senders': len(self._by_sender), 'max_block_txs': self.max_block_txs,
+                      'max_txs': self.max_txs, 'ttl': self.ttl})
+            return d
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Transaction Merkle Trees
+TR: Her blok, onayladığı işlemlerin Merkle köküne bağlanır. Yapraklar tx_id sırasıyla dizilir; /api/tx_proof bir işlemin
+    kapsama yolunu (O(log n) kardeş hash) döner ve hafif düğüm sadece blok başlığındaki köke karşı doğrular.
+EN: Every block commits to the Merkle root of the transactions it confirms. Leaves are ordered by tx_id; /api/tx_proof returns
+    a transaction's inclusion path (O(log n) sibling hashes) and a light node verifies it against the root in the block header alone.
+"""
+import hashlib
+import json
+
+# TR: Yaprak ve iç düğüm önekleri farklıdır (ikinci ön görüntü saldırısına karşı); tek kalan düğüm kopyalanmaz, üst seviyeye aynen geçer
+# EN: Leaf and inner node prefixes differ (against second-preimage attacks); an odd node is not duplicated, it moves up unchanged
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+TX_LEAF_COLUMNS = "tx_id, sender, recipient, amount, timestamp"
+
+def tx_leaf(tx):
+    # TR: Kanonik biçim: sabit alan sırası, sayılar float; DB satırı ve JSON'dan gelen kayıt aynı yaprağı verir
+    # EN: Canonical form: fixed field order, numbers as float; a DB row and a record decoded from JSON give the same leaf
+    amount, timestamp = tx['amount'], tx['timestamp']
+    fields = [tx['tx_id'], tx['sender'], tx['recipient'], None if amount is None else float(amount), None if timestamp is None else float(timestamp)]
+    return hashlib.sha256(LEAF_PREFIX + json.dumps(fields, separators=(',', ':')).encode('utf-8')).digest()
+
+def _parent(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _levels(leaves):
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([_parent(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)])
+    return levels
+
+def merkle_root(leaves):
+    if not leaves: return EMPTY_ROOT
+    return _levels(leaves)[-1][0].hex()
+
+def tx_root(txs):
+    # TR: txs tx_id'ye göre sıralı olmalı (SQL: ORDER BY tx_id)
+    # EN: txs must be sorted by tx_id (SQL: ORDER BY tx_id)
+    return merkle_root([tx_leaf(tx) for tx in txs])
+
+def merkle_path(leaves, position):
+    """
+    TR: position'daki yaprağın kök yolu: [kardeş hash (hex), kardeş sağda mı] listesi; tek kalan seviyelerde adım yoktur.
+    EN: The root path of the leaf at position: a list of [sibling hash (hex), sibling is on the right]; levels where it is odd have no step.
+    """
+    path = []
+    for level in _levels(leaves)[:-1]:
+        sibling = position ^ 1
+        if sibling < len(level): path.append([level[sibling].hex(), sibling > position])
+        position //= 2
+    return path
+
+def verify_path(leaf, path, root):
+    node = leaf
+    for sibling_hex, sibling_right in path:
+        sibling = bytes.fromhex(sibling_hex)
+        node = _parent(node, sibling) if sibling_right else _parent(sibling, node)
+    return node.hex() == root
+
+def block_root(conn, block_index):
+    rows = conn.execute(f"SELECT {TX_LEAF_COLUMNS} FROM transactions WHERE block_index = ? ORDER BY tx_id", (block_index,)).fetchall()
+    return tx_root(rows)
+
+def tx_proof(conn, tx_id):
+    """
+    TR: Onaylanmış bir işlemin kapsama kanıtı veya None. Yerel işlem kümesi bloğun saklı kökünü üretmiyorsa (ör. başka bir sunucunun
+        kazdığı blok) kanıt verilmez; yanlış bir kanıt yerine None.
+    EN: The inclusion proof of a confirmed transaction, or None. If the local transaction set does not reproduce the block's stored root
+        (e.g. a block mined by another server) no proof is given; None rather than a wrong proof.
+    """
+    tx = conn.execute(f"SELECT {TX_LEAF_COLUMNS}, block_index FROM transactions WHERE tx_id = ?", (tx_id,)).fetchone()
+    if tx is None or not tx['block_index']: return None
+    block = conn.execute("SELECT block_index, block_hash, merkle_root FROM blocks WHERE block_index = ?", (tx['block_index'],)).fetchone()
+    if block is None or not block['merkle_root']: return None
+    rows = conn.execute(f"SELECT {TX_LEAF_COLUMNS} FROM transactions WHERE block_index = ? ORDER BY tx_id", (tx['block_index'],)).fetchall()
+    leaves = [tx_leaf(r) for r in rows]
+    if merkle_root(leaves) != block['merkle_root']: return None
+    position = next(i for i, r in enumerate(rows) if r['tx_id'] == tx_id)
+    return {'tx': {k: tx[k] for k in ('tx_id', 'sender', 'recipient', 'amount', 'timestamp')}, 'block_index': block['block_index'],
+            'block_hash': block['block_hash'], 'merkle_root': block['merkle_root'], 'leaf_count': len(leaves), 'path': merkle_path(leaves, position)}
+
+def verify_tx_proof(proof, merkle_root_hex):
+    """
+    TR: Kanıtı, düğümün kendi başlık zincirindeki köke karşı doğrular (sunucunun gönderdiği köke değil). O(log n) hash.
+    EN: Verifies a proof against the root from the node's own header chain (not the root the server sent). O(log n) hashes.
+    """
+    if not merkle_root_hex or not isinstance(proof, dict): return False
+    try: return verify_path(tx_leaf(proof['tx']), proof['path'], merkle_root_hex)
+    except (KeyError, TypeError, ValueError): return False
@@ -8,6 +8,7 @@ Decentralized, Unstoppable Internet. / Merkeziyetsiz, Durdurulamaz İnternet.
 """
 
 import hashlib
+import itertools
 import json
 import time
 import sqlite3
@@ -16,12 +17,23 @@ import random
 import re
 import logging
 import os
+import sys
 import requests
 import threading
 import socket
 from uuid import uuid4
 from datetime import timedelta, datetime
 from typing import Optional, Tuple, Dict, Any, List
+from ghost_db import (ConnectionPool, park_change, read_chain_stats, read_parked_changes, read_sync_cursor, reindex_chain_stats, run_migrations,
+                      unpark_change, write_sync_cursor)
+from ghost_blobstore import BlobStore
+import ghost_search
+from ghost_miner import MiningEngine
+from ghost_net import OutboundPool
+from ghost_chain import (BlockValidator, ForkChoice, SyncScheduler, block_hash_at, build_locator, committed_root, disconnect_blocks, hash_block,
+                         merkle_root_at, prune_blocks, reward_tx_id, time_left)
+from ghost_merkle import tx_root, verify_tx_proof
+from ghost_snapshot import download_snapshot, fetch_manifest, import_snapshot
 
 # --- CİHAZ ÖZELİNDE MESH MODÜLLERİ (OPSİYONEL) / DEVICE SPECIFIC MESH MODULES ---
 try:
@@ -37,6 +49,45 @@ logger = logging.getLogger("GhostMeshNode")
 # --- YAPILANDIRMA / CONFIGURATION ---
 NODE_ID = hashlib.sha256(socket.gethostname().encode()).hexdigest()[:10]
 DB_FILE = os.path.join(os.getcwd(), f"ghost_node_{NODE_ID}.db")
+BLOB_DIR = os.path.join(os.getcwd(), f"ghost_blobs_{NODE_ID}")
+SEARCH_PAGE_SIZE = 20
+# TR: Senkronizasyon: eşzamanlı eş isteği sayısı, tur süresi sınırı (sn) ve eşler arasında bölünen blok parçası boyutu
+# EN: Sync: concurrent peer requests, round deadline (s) and the block chunk size split across peers
+SYNC_PARALLELISM = 8
+SYNC_ROUND_DEADLINE = 45
+SYNC_CHUNK_BLOCKS = 250
+# TR: Varlık değişiklikleri (/api/assets_changes) istek başına sayfa boyutu
+# EN: Page size per request for asset changes (/api/assets_changes)
+ASSET_CHANGES_PAGE = 500
+# TR: İçeriği alınamayan varlık değişiklikleri park edilir: ilk yeniden deneme gecikmesi (sn, her denemede iki katı) ve en fazla deneme
+# EN: Asset changes whose content cannot be fetched are parked: first retry delay (s, doubled per attempt) and max attempts
+ASSET_RETRY_DELAY = 60
+ASSET_RETRY_ATTEMPTS = 8
+# TR: Giden yayınlar: işçi sayısı, kuyruk kapasitesi ve kuyruk doluyken bekleme süresi (sn)
+# EN: Outbound gossip: worker count, queue capacity and how long to wait while the queue is full (s)
+OUTBOUND_WORKERS = 4
+OUTBOUND_QUEUE_SIZE = 5000
+OUTBOUND_PUT_TIMEOUT = 1.0
+# TR: Toplu yayın: eş başına biriktirme süresi (sn) ve bir istekteki en fazla öğe
+# EN: Batched gossip: per-peer coalescing window (s) and max items per request
+GOSSIP_BATCH_WINDOW = 0.05
+GOSSIP_BATCH_MAX_ITEMS = 500
+# TR: İlk açılışta (sadece genesis varken) eşin durum anlık görüntüsünden başla; sonra sadece H sonrası bloklar indirilir
+# EN: On first start (genesis only) bootstrap from a peer's state snapshot; afterwards only blocks past H are downloaded
+SNAPSHOT_BOOTSTRAP = True
+SNAPSHOT_DOWNLOAD_DIR = os.path.join(os.getcwd(), f"ghost_snapshots_{NODE_ID}")
+SNAPSHOT_DOWNLOAD_TIMEOUT = 120
+# TR: Hiçbir eş anlık görüntü sunmadığında (genç ağ) tekrar denemeden önce beklenen süre
+# EN: Wait before trying again when no peer offers a snapshot (young network)
+SNAPSHOT_RETRY_INTERVAL = 600
+# TR: Budama modu (--prune): uçtan geride tam tutulan blok sayısı; daha eskiler başlığa indirgenir, her PRUNE_CHECKPOINT_INTERVAL'da
+#     bir tam satır kontrol noktası kalır. Bir geçiş PRUNE_BATCH_BLOCKS bloğu tek işlemde budar.
+# EN: Pruning mode (--prune): blocks kept in full behind the tip; older ones are reduced to headers, with a full-row checkpoint
+#     every PRUNE_CHECKPOINT_INTERVAL blocks. One pass prunes PRUNE_BATCH_BLOCKS blocks in one transaction.
+PRUNE_MODE = False
+PRUNE_KEEP_BLOCKS = 2000
+PRUNE_CHECKPOINT_INTERVAL = 1000
+PRUNE_BATCH_BLOCKS = 5000
 GHOST_PORT = 5000 
 
 # TR: Veri ve işlem eşleşmesi için bilinen sunucular
@@ -50,9 +101,24 @@ DOMAIN_EXPIRY_SECONDS = 15552000 # 6 Ay / 6 Months
 # EN: Initial balance zero (Earned via mining)
 INITIAL_USER_BALANCE = 0.0
 BASE_DIFFICULTY = 4
+# TR: PoW arayan süreç sayısı (varsayılan: tüm çekirdekler)
+# EN: Number of processes searching for PoW (default: all cores)
+MINING_WORKERS = os.cpu_count() or 1
+# TR: Eşten gelen blok aralıklarında PoW doğrulayan süreç sayısı
+# EN: Number of processes verifying PoW for block ranges from peers
+VALIDATION_WORKERS = os.cpu_count() or 1
+# TR: Çatal seçimi: kabul edilen en derin yeniden düzenleme ve bellekteki yan dalların ömrü (sn)
+# EN: Fork choice: deepest reorg accepted and the lifetime of in-memory side branches (s)
+MAX_REORG_BLOCKS = 5000
+SIDE_BRANCH_TTL = 600
 INITIAL_BLOCK_REWARD = 50.0
 HALVING_INTERVAL = 2000
 TOTAL_SUPPLY = 100000000.0
+# TR: SQLite bağlantı katmanı ayarları (küçük cihazlar için mütevazı)
+# EN: SQLite connection layer settings (modest for small devices)
+DB_READ_POOL_SIZE = 4
+DB_CACHE_SIZE_KB = 8192
+DB_MMAP_SIZE = 64 * 1024 * 1024
 
 # TR: Ağ gelirlerinin birikeceği Hazine Cüzdanı Adresi
 # EN: Treasury Wallet Address where network revenues will accumulate
@@ -73,12 +139,13 @@ LANGUAGES = {
         'register_success': "Kayıt Başarılı! İşlem ağa yayınlandı.", 'register_fail': "Kayıt Başarısız: ",
         'search_query': "Arama (Domain/Kelime): ", 'no_results': "Sonuç bulunamadı.",
         'results_found': "Sonuçlar:", 'view_content': "İçeriği Görüntüle (ID girin, iptal için 0): ",
+        'verify_hint': "(Ödeme doğrulamak için: v)", 'verify_tx_id': "İşlem ID: ", 'verify_ok': "Blokta doğrulandı", 'verify_fail': "Doğrulanamadı (onaysız, bilinmiyor veya başlık eksik)",
         'recipient': "Alıcı Cüzdan Adresi: ", 'amount': "Miktar: ", 'sent_success': "Gönderildi ve ağa yayınlandı!",
         'mining_start': "Madencilik Başlatılıyor...", 'block_found': "BLOK BULUNDU!", 
         'assets_title': "Kayıtlı Varlıklarım", 'fee': "Ücret", 'type': "Tür",
         'stats_total_supply': "Toplam Arz", 'stats_circulating': "Dolaşımdaki Arz",
         'stats_block_reward': "Blok Ödülü", 'stats_solved_blocks': "Çözülen Blok",
-        'stats_last_block': "Son Blok Hash", 'stats_halving': "Yarılanmaya Kalan",
+        'stats_last_block': "Son Blok Hash", 'stats_halving': "Yarılanmaya Kalan", 'stats_disk': "Disk Kullanımı", 'stats_headers_only': "sadece başlık",
         'back_to_menu': "0. Ana Menüye Dön", 'asset_cost': "Maliyet", 'asset_expiry': "Bitiş",
         'enter_0_to_cancel': "(İptal etmek için 0 girin)",
         'login_title': "--- GHOST PROTOCOL GİRİŞ ---", 'login_user': "Kullanıcı Adı: ", 
@@ -106,12 +173,13 @@ LANGUAGES = {
         'register_success': "Registration Successful! Transaction broadcasted.", 'register_fail': "Registration Failed: ",
         'search_query': "Search (Domain/Keyword): ", 'no_results': "No results found.",
         'results_found': "Results:", 'view_content': "View Content (Enter ID, 0 to cancel): ",
+        'verify_hint': "(To verify a payment: v)", 'verify_tx_id': "Transaction ID: ", 'verify_ok': "Verified in block", 'verify_fail': "Not verified (unconfirmed, unknown or header missing)",
         'recipient': "Recipient Address: ", 'amount': "Amount: ", 'sent_success': "Sent and broadcasted!",
         'mining_start': "Starting Mining...", 'block_found': "BLOCK FOUND!",
         'assets_title': "My Registered Assets", 'fee': "Fee", 'type': "Type",
         'stats_total_supply': "Total Supply", 'stats_circulating': "Circulating Supply",
         'stats_block_reward': "Block Reward", 'stats_solved_blocks': "Solved Blocks",
-        'stats_last_block': "Last Block Hash", 'stats_halving': "Blocks to Halving",
+        'stats_last_block': "Last Block Hash", 'stats_halving': "Blocks to Halving", 'stats_disk': "Disk Usage", 'stats_headers_only': "headers only",
         'back_to_menu': "0. Back to Main Menu", 'asset_cost': "Cost", 'asset_expiry': "Expires",
         'enter_0_to_cancel': "(Enter 0 to cancel)",
         'login_title': "--- GHOST PROTOCOL LOGIN ---", 'login_user': "Username: ", 
@@ -139,12 +207,13 @@ LANGUAGES = {
         'register_success': "Успешно! Транзакция отправлена.", 'register_fail': "Ошибка: ",
         'search_query': "Поиск: ", 'no_results': "Нет результатов.",
         'results_found': "Результаты:", 'view_content': "Просмотр (ID): ",
+        'verify_hint': "(Проверить платеж: v)", 'verify_tx_id': "ID транзакции: ", 'verify_ok': "Подтверждено в блоке", 'verify_fail': "Не подтверждено (не в блоке, неизвестно или нет заголовка)",
         'recipient': "Адрес получателя: ", 'amount': "Сумма: ", 'sent_success': "Отправлено и транслировано!",
         'mining_start': "Майнинг начат...", 'block_found': "БЛОК НАЙДЕН!",
         'assets_title': "Мои активы", 'fee': "Плата", 'type': "Тип",
         'stats_total_supply': "Общее предложение", 'stats_circulating': "В обращении",
         'stats_block_reward': "Награда за блок", 'stats_solved_blocks': "Решено блоков",
-        'stats_last_block': "Хеш последнего блока", 'stats_halving': "До халвинга",
+        'stats_last_block': "Хеш последнего блока", 'stats_halving': "До халвинга", 'stats_disk': "Использование диска", 'stats_headers_only': "только заголовки",
         'back_to_menu': "0. Вернуться в главное меню", 'asset_cost': "Стоимость", 'asset_expiry': "Истекает",
         'enter_0_to_cancel': "(Введите 0 для отмены)",
         'login_title': "--- ВХОД В GHOST PROTOCOL ---", 'login_user': "Имя пользователя: ", 
@@ -172,12 +241,13 @@ LANGUAGES = {
         'register_success': "Հաջողվեց! Գործարքը հեռարձակվեց:", 'register_fail': "Ձախողվեց: ",
         'search_query': "Որոնում: ", 'no_results': "Արդյունք չկա:",
         'results_found': "Արդյունքներ:", 'view_content': "Դիտել (ID): ",
+        'verify_hint': "(Վճարումը ստուգելու համար՝ v)", 'verify_tx_id': "Գործարքի ID: ", 'verify_ok': "Հաստատված է բլոկում", 'verify_fail': "Չհաստատվեց (չհաստատված, անհայտ կամ վերնագիրը բացակայում է)",
         'recipient': "Ստացող: ", 'amount': "Գումար: ", 'sent_success': "Ուղարկվեց և հեռարձակվեց!",
         'mining_start': "Մայնինգ...", 'block_found': "ԲԼՈԿԸ ԳՏՆՎԵՑ!",
         'assets_title': "Իմ Ակտիվները", 'fee': "Վճար", 'type': "Տեսակ",
         'stats_total_supply': "Ընդհանուր առաջարկ", 'stats_circulating': "Շրջանառվող առաջարկ",
         'stats_block_reward': "Բլոկի պարգև", 'stats_solved_blocks': "Լուծված բլոկներ",
-        'stats_last_block': "Վերջին բլոկի հեշ", 'stats_halving': "Մինչ կիսումը",
+        'stats_last_block': "Վերջին բլոկի հեշ", 'stats_halving': "Մինչ կիսումը", 'stats_disk': "Սկավառակի օգտագործում", 'stats_headers_only': "միայն վերնագրեր",
         'back_to_menu': "0. Վերադառնալ գլխավոր մենյու", 'asset_cost': "Արժեք", 'asset_expiry': "Լրանում է",
         'enter_0_to_cancel': "(Մուտքագրեք 0 չեղարկելու համար)",
         'login_title': "--- GHOST PROTOCOL ՄՈՒՏՔ ---", 'login_user': "Օգտանուն: ", 
@@ -219,14 +289,22 @@ def calculate_asset_fee(size_bytes, asset_type):
 
 # --- VERİTABANI YÖNETİCİSİ / DATABASE MANAGER ---
 class DatabaseManager:
-    def __init__(self, db_file):
+    def __init__(self, db_file, blob_store):
         self.db_file = db_file
+        self.blob_store = blob_store
+        self.pool = ConnectionPool(db_file, read_pool_size=DB_READ_POOL_SIZE, cache_size_kb=DB_CACHE_SIZE_KB, mmap_size=DB_MMAP_SIZE)
         self.init_db()
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=20)
-        conn.row_factory = sqlite3.Row
-        return conn
+        # TR: İş parçacığına ait kalıcı yazma bağlantısı (close() havuza iade eder)
+        # EN: Thread-owned persistent write connection (close() returns it to the pool)
+        return self.pool.get_connection()
+
+    def get_read_connection(self):
+        return self.pool.get_read_connection()
+
+    def write(self):
+        return self.pool.write()
 
     def init_db(self):
         conn = self.get_connection()
@@ -265,14 +343,18 @@ class DatabaseManager:
         conn.commit()
         conn.close()
 
+        # TR: Şema göçleri (indeksler vb.) mevcut dosyaları yerinde yükseltir
+        # EN: Schema migrations (indexes etc.) upgrade existing files in place
+        run_migrations(self.pool, context={'blob_store': self.blob_store, 'treasury_key': TREASURY_WALLET_KEY})
+
     def get_my_user(self):
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         user = conn.execute("SELECT * FROM users LIMIT 1").fetchone() 
         conn.close()
         return dict(user) if user else None
     
     def login_user(self, username, password):
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         user = conn.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password)).fetchone()
         conn.close()
         return dict(user) if user else None
@@ -298,12 +380,25 @@ class DatabaseManager:
         conn.close()
 
     def get_fee(self, fee_type):
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         res = conn.execute("SELECT amount FROM network_fees WHERE fee_type = ?", (fee_type,)).fetchone()
         conn.close()
         if res: return res['amount']
         return 0.00001 
 
+    def get_sync_cursor(self, peer, stream):
+        conn = self.get_read_connection()
+        try: return read_sync_cursor(conn, peer, stream)
+        finally: conn.close()
+
+    def set_sync_cursor(self, peer, stream, position):
+        with self.write() as conn: write_sync_cursor(conn, peer, stream, position)
+
+    def get_parked_changes(self, peer, stream):
+        conn = self.get_read_connection()
+        try: return read_parked_changes(conn, peer, stream, time.time())
+        finally: conn.close()
+
 # --- MANAGER SINIFLARI / MANAGER CLASSES ---
 
 class NodeMessengerManager:
@@ -334,7 +429,7 @@ class NodeMessengerManager:
         return True, "Davet ağa iletildi."
 
     def get_friends(self, user_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         friends = conn.execute("SELECT * FROM friends WHERE user_key = ?", (user_key,)).fetchall()
         conn.close()
         return [dict(f) for f in friends]
@@ -376,7 +471,7 @@ class NodeMessengerManager:
         return True, "Mesaj ağa gönderildi."
 
     def get_messages(self, user_key, friend_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         msgs = conn.execute("SELECT * FROM messages WHERE (sender=? AND recipient=?) OR (sender=? AND recipient=?) ORDER BY timestamp ASC",
                             (user_key, friend_key, friend_key, user_key)).fetchall()
         conn.close()
@@ -393,6 +488,13 @@ class NodeAssetManager:
         self.db = db_mgr
         self.chain_mgr = blockchain_mgr
         self.mesh_mgr = mesh_mgr 
+        self.blobs = db_mgr.blob_store
+
+    def read_content(self, asset):
+        # TR: İçerik diskte (içerik adresli); satırda sadece content_hash var
+        # EN: Content lives on disk (content-addressed); the row only carries content_hash
+        if not asset or not asset['content_hash'] or not self.blobs.exists(asset['content_hash']): return b""
+        return self.blobs.read_bytes(asset['content_hash'])
 
     def register_asset(self, current_user, asset_type, name, content):
         if asset_type == 'domain' and not name.endswith('.ghost'): name += '.ghost'
@@ -414,8 +516,10 @@ class NodeAssetManager:
             timestamp = time.time()
             sender_key = current_user['wallet_public_key']
 
-            conn.execute("INSERT OR REPLACE INTO assets (asset_id, owner_pub_key, type, name, content, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                         (asset_id, sender_key, asset_type, name, content_bytes, size, timestamp, timestamp + DOMAIN_EXPIRY_SECONDS, keywords))
+            content_hash = self.blobs.put_bytes(content_bytes)
+            conn.execute("INSERT OR REPLACE INTO assets (asset_id, owner_pub_key, type, name, content, content_hash, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)",
+                         (asset_id, sender_key, asset_type, name, content_hash, size, timestamp, timestamp + DOMAIN_EXPIRY_SECONDS, keywords))
+            ghost_search.index_asset(conn, asset_id, name, keywords, asset_type, content_bytes)
             
             # TR: Ücreti kullanıcıdan düş
             # EN: Deduct fee from user
@@ -440,55 +544,107 @@ class NodeAssetManager:
         finally: conn.close()
 
     def get_local_assets(self, owner_pub_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         assets = conn.execute("SELECT * FROM assets WHERE owner_pub_key = ? ORDER BY creation_time DESC", (owner_pub_key,)).fetchall()
         conn.close()
         return assets
     
-    def search_assets(self, query):
-        conn = self.db.get_connection()
-        s = f"%{query}%"
-        results = conn.execute("SELECT * FROM assets WHERE name LIKE ? OR keywords LIKE ?", (s, s)).fetchall()
-        conn.close()
+    def search_assets(self, query, page=1):
+        # TR: BM25 sıralı FTS5 araması; sadece meta veri döner, içerik görüntülenirken diskten okunur
+        # EN: BM25-ranked FTS5 search; returns metadata only, content is read from disk when viewed
+        conn = self.db.get_read_connection()
+        try: results, _ = ghost_search.search(conn, query, page, SEARCH_PAGE_SIZE)
+        finally: conn.close()
         return results
     
     def sync_asset(self, asset_data):
+        # TR: Yeni sunucular içeriği /api/blob ile akıtır (blob önceden yazılmıştır); eski sunucular base64 gönderir.
+        #     Varlık zaten varsa meta veri ve içerik güncellenir (değişiklik akışındaki güncellemeler); eski blob artık kullanılmıyorsa silinir.
+        # EN: New servers stream content via /api/blob (blob already written); old servers send base64.
+        #     If the asset already exists its metadata and content are updated (updates from the change feed); the old blob is released if unused.
+        # TR: Eski sunucunun boş içeriği ('') de base64 yoludur; doğruluk değeri değil varlığı kontrol edilir
+        # EN: An old server's empty content ('') also takes the base64 path; presence is tested, not truthiness
         conn = self.db.get_connection()
         try:
-            content_bytes = base64.b64decode(asset_data['content'])
-            conn.execute("INSERT OR IGNORE INTO assets (asset_id, owner_pub_key, type, name, content, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                         (asset_data['asset_id'], asset_data['owner_pub_key'], asset_data['type'], asset_data['name'], content_bytes, 
-                          len(content_bytes), asset_data['creation_time'], asset_data['expiry_time'], asset_data.get('keywords', '')))
+            if asset_data.get('content') is not None:
+                content_bytes = base64.b64decode(asset_data['content'])
+                content_hash, size = self.blobs.put_bytes(content_bytes), len(content_bytes)
+            else:
+                content_hash = asset_data['content_hash']
+                size = self.blobs.size(content_hash)
+                content_bytes = self.blobs.read_bytes(content_hash) if asset_data['type'] == 'domain' else None
+            old = conn.execute("SELECT content_hash, name, expiry_time, keywords FROM assets WHERE asset_id = ?", (asset_data['asset_id'],)).fetchone()
+            if old is None:
+                conn.execute("INSERT INTO assets (asset_id, owner_pub_key, type, name, content, content_hash, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)",
+                             (asset_data['asset_id'], asset_data['owner_pub_key'], asset_data['type'], asset_data['name'], content_hash, 
+                              size, asset_data['creation_time'], asset_data['expiry_time'], asset_data.get('keywords', '')))
+            elif (old['content_hash'], old['name'], old['expiry_time'], old['keywords']) != (content_hash, asset_data['name'], asset_data['expiry_time'], asset_data.get('keywords', '')):
+                conn.execute("UPDATE assets SET name = ?, content_hash = ?, storage_size = ?, expiry_time = ?, keywords = ? WHERE asset_id = ?",
+                             (asset_data['name'], content_hash, size, asset_data['expiry_time'], asset_data.get('keywords', ''), asset_data['asset_id']))
+            else:
+                conn.rollback()
+                return
+            ghost_search.index_asset(conn, asset_data['asset_id'], asset_data['name'], asset_data.get('keywords', ''), asset_data['type'], content_bytes)
             conn.commit()
+            if old is not None and old['content_hash'] != content_hash: self._release_blob(conn, old['content_hash'])
         except: pass
         finally: conn.close()
 
-    def get_all_assets_meta(self):
+    def remove_synced_asset(self, asset_id):
+        # TR: Eşin değişiklik akışındaki silme; arama indeksinden de düşülür
+        # EN: A delete from a peer's change feed; also dropped from the search index
         conn = self.db.get_connection()
+        try:
+            old = conn.execute("SELECT content_hash FROM assets WHERE asset_id = ?", (asset_id,)).fetchone()
+            if old is None: return False
+            conn.execute("DELETE FROM assets WHERE asset_id = ?", (asset_id,))
+            ghost_search.remove_asset(conn, asset_id)
+            conn.commit()
+            self._release_blob(conn, old['content_hash'])
+            return True
+        finally: conn.close()
+
+    def _release_blob(self, conn, content_hash):
+        if not content_hash: return
+        still_used = conn.execute("SELECT 1 FROM assets WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone()
+        self.blobs.delete_if_orphan(content_hash, referenced=bool(still_used))
+
+    def get_all_assets_meta(self):
+        conn = self.db.get_read_connection()
         assets = conn.execute("SELECT asset_id FROM assets").fetchall()
         conn.close()
         return [dict(a) for a in assets]
 
+    def get_missing_blobs(self):
+        # TR: Meta verisi olan ama içeriği diskte olmayan varlıklar (ör. anlık görüntüden gelenler)
+        # EN: Assets whose metadata exists but whose content is not on disk (e.g. imported from a snapshot)
+        conn = self.db.get_read_connection()
+        rows = conn.execute("SELECT DISTINCT content_hash FROM assets WHERE content_hash IS NOT NULL").fetchall()
+        conn.close()
+        return [r['content_hash'] for r in rows if not self.blobs.exists(r['content_hash'])]
+
 class NodeBlockchainManager:
     def __init__(self, db_mgr, mesh_mgr=None):
         self.db = db_mgr
         self.mesh_mgr = mesh_mgr
+        self.miner = MiningEngine(MINING_WORKERS)
+        self.validator = BlockValidator(BASE_DIFFICULTY, VALIDATION_WORKERS)
+        self.fork_choice = ForkChoice(self.validator, MAX_REORG_BLOCKS, SIDE_BRANCH_TTL)
 
     def set_mesh_manager(self, mesh_mgr):
         self.mesh_mgr = mesh_mgr
 
     def get_last_block(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         block = conn.execute("SELECT * FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
         conn.close()
         return block
 
     def get_statistics(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         last_block = self.get_last_block()
         
-        mined_rewards = conn.execute("SELECT SUM(amount) FROM transactions WHERE sender = 'GhostProtocol_System'").fetchone()[0] or 0.0
-        mined_supply = mined_rewards 
+        mined_supply = read_chain_stats(conn)['circulating_supply']
         
         current_block_index = last_block['block_index']
         halvings = current_block_index // HALVING_INTERVAL
@@ -503,10 +659,40 @@ class NodeBlockchainManager:
             "block_reward": current_reward,
             "solved_blocks": current_block_index,
             "last_block_hash": last_block['block_hash'][:10] + "...",
-            "blocks_to_halving": blocks_to_halving
+            "blocks_to_halving": blocks_to_halving,
+            "disk": self.get_disk_footprint()
         }
 
-    def mine_block(self, current_user):
+    def get_disk_footprint(self):
+        # TR: Dosya boyutları + tam blok / sadece başlık / kontrol noktası sayıları (aralıklar ardışık; COUNT taraması yok)
+        # EN: File sizes + full block / header-only / checkpoint counts (ranges are contiguous; no COUNT scan)
+        footprint = self.db.pool.footprint()
+        conn = self.db.get_read_connection()
+        try:
+            for key, table in (('full_blocks', 'blocks'), ('header_blocks', 'block_headers')):
+                low, high = conn.execute(f"SELECT MIN(block_index), MAX(block_index) FROM {table}").fetchone()
+                footprint[key] = high - low + 1 if low is not None else 0
+            footprint['checkpoints'] = conn.execute("SELECT COUNT(*) FROM block_checkpoints").fetchone()[0]
+        finally: conn.close()
+        footprint['pruned'] = PRUNE_MODE
+        return footprint
+
+    def prune(self):
+        """
+        TR: Pencerenin gerisini parça parça budar (her parça ayrı kısa yazma işlemi), sonra boş sayfaları dosyadan atar.
+        EN: Prunes behind the window in batches (each a separate short write transaction), then releases free pages from the file.
+        """
+        total = 0
+        while True:
+            with self.db.write() as conn: pruned = prune_blocks(conn, PRUNE_KEEP_BLOCKS, PRUNE_CHECKPOINT_INTERVAL, PRUNE_BATCH_BLOCKS)
+            if not pruned: break
+            total += pruned
+        if total:
+            self.db.pool.incremental_vacuum()
+            logger.info(f"Budandı: {total} blok başlığa indirgendi")
+        return total
+
+    def mine_block(self, current_user, progress=None):
         miner_key = current_user['wallet_public_key']
         last_mined = current_user['last_mined']
         
@@ -516,23 +702,28 @@ class NodeBlockchainManager:
         last_block = self.get_last_block()
         index = last_block['block_index'] + 1
         
-        proof = 0
-        while True:
-            guess = f'{last_block["proof"]}{proof}'.encode()
-            guess_hash = hashlib.sha256(guess).hexdigest()
-            if guess_hash[:BASE_DIFFICULTY] == '0' * BASE_DIFFICULTY: break
-            proof += 1
+        result = self.miner.solve(last_block['proof'], BASE_DIFFICULTY, progress=progress)
+        proof = result['proof']
             
-        block_hash = hashlib.sha256(f"{index}{time.time()}{last_block['block_hash']}{proof}".encode()).hexdigest()
-        
         halvings = index // HALVING_INTERVAL
         reward = INITIAL_BLOCK_REWARD / (2**halvings)
+        # TR: Düğüm bloğa sadece ödül işlemini bağlar; kök onun köküdür ve sunucuların yaptığı gibi blok hash'ine girer.
+        #     Ödül işlemi kaydı, blok bir reorg'da geri alınırsa bakiyeyi düşmek içindir
+        # EN: The node binds only the reward transaction to its blocks; the root is its root and goes into the block hash as on the servers.
+        #     The reward transaction row lets a reorg debit the balance if the block is disconnected
+        timestamp = time.time()
+        reward_tx = {'tx_id': reward_tx_id(index, last_block['block_hash'], proof), 'sender': "GhostProtocol_System", 'recipient': miner_key,
+                     'amount': reward, 'timestamp': timestamp}
+        root = tx_root([reward_tx])
+        block_hash = hash_block(index, timestamp, last_block['block_hash'], proof, miner_key, root)
 
         conn = self.db.get_connection()
         try:
-            conn.execute("INSERT INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key) VALUES (?, ?, ?, ?, ?, ?)",
-                         (index, time.time(), last_block['block_hash'], block_hash, proof, miner_key))
-            conn.execute("UPDATE users SET balance = balance + ?, last_mined = ? WHERE id = ?", (reward, time.time(), current_user['id']))
+            conn.execute("INSERT INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (index, timestamp, last_block['block_hash'], block_hash, proof, miner_key, root))
+            conn.execute("INSERT INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (:tx_id, :sender, :recipient, :amount, :timestamp, :block_index)",
+                         dict(reward_tx, block_index=index))
+            conn.execute("UPDATE users SET balance = balance + ?, last_mined = ? WHERE id = ?", (reward, timestamp, current_user['id']))
             conn.commit()
             return True, block_hash
         except Exception as e: return False, str(e)
@@ -573,6 +764,10 @@ class NodeMeshManager:
         self.chain_mgr = blockchain_mgr
         self.asset_mgr = None
         self.known_peers = KNOWN_PEERS
+        self.scheduler = SyncScheduler(GHOST_PORT, SYNC_PARALLELISM, SYNC_ROUND_DEADLINE, SYNC_CHUNK_BLOCKS)
+        self._snapshot_retry_at = 0
+        self.outbound = OutboundPool(GHOST_PORT, OUTBOUND_WORKERS, OUTBOUND_QUEUE_SIZE, OUTBOUND_PUT_TIMEOUT,
+                                     batch_window=GOSSIP_BATCH_WINDOW, batch_max_items=GOSSIP_BATCH_MAX_ITEMS)
         
         self.start_services()
 
@@ -585,91 +780,288 @@ class NodeMeshManager:
     def _sync_loop(self):
         while True:
             self.sync_with_network()
+            if PRUNE_MODE:
+                try: self.chain_mgr.prune()
+                except Exception as e: logger.warning(f"Budama hatası: {e}")
             time.sleep(60) 
 
     def broadcast_transaction(self, tx_data):
-        def _send():
-            for peer in self.known_peers:
-                try:
-                    url = f"http://{peer}:{GHOST_PORT}/api/send_transaction"
-                    requests.post(url, json=tx_data, timeout=3)
-                    logger.info(f"Transaction sent to {peer}")
-                except Exception as e:
-                    logger.warning(f"Failed to send TX to {peer}: {e}")
-        threading.Thread(target=_send, daemon=True).start()
+        # TR: Kuyruğa alınır; eş başına keep-alive oturumla sabit işçi havuzundan gönderilir
+        # EN: Queued; sent from the fixed worker pool over a keep-alive session per peer
+        sent = self.outbound.broadcast(self.known_peers, "/api/send_transaction", tx_data, batch_path="/api/send_transactions")
+        logger.info(f"Transaction queued for {sent} peers")
 
     def broadcast_message(self, msg_data):
         # TR: Mesajı ağa yay
         # EN: Broadcast message to network
-        def _send():
-            for peer in self.known_peers:
-                try:
-                    url = f"http://{peer}:{GHOST_PORT}/api/messenger/receive_message"
-                    requests.post(url, json=msg_data, timeout=3)
-                    logger.info(f"Message sent to {peer}")
-                except Exception as e:
-                    logger.warning(f"Failed to send MSG to {peer}: {e}")
-        threading.Thread(target=_send, daemon=True).start()
+        sent = self.outbound.broadcast(self.known_peers, "/api/messenger/receive_message", msg_data, batch_path="/api/messenger/receive_messages")
+        logger.info(f"Message queued for {sent} peers")
 
     def broadcast_new_user(self, username, pub_key):
-        # TR: Yeni kullanıcıyı ağa duyur (User Sync Çözümü)
-        # EN: Announce new user to network (User Sync Solution)
-        def _send():
-            logger.info(f"Broadcasting new user: {username}")
-        threading.Thread(target=_send, daemon=True).start()
+        # TR: Yeni kullanıcıyı ağa duyur (User Sync Çözümü); şimdilik sadece kayıt düşülür, iş parçacığı açılmaz
+        # EN: Announce new user to network (User Sync Solution); only logged for now, no thread is started
+        logger.info(f"Broadcasting new user: {username}")
 
     def sync_with_network(self):
-        for peer_ip in self.known_peers:
+        peers = list(self.known_peers)
+        if not peers: return
+        # TR: Eşlerle eşzamanlı konuşulur; tur SYNC_ROUND_DEADLINE saniyede biter, ölü eşler turu durduramaz
+        # EN: Peers are contacted concurrently; the round ends after SYNC_ROUND_DEADLINE seconds, dead peers cannot stall it
+        deadline = self.scheduler.new_deadline()
+
+        # 0. SNAPSHOT BOOTSTRAP
+        if SNAPSHOT_BOOTSTRAP and time.time() >= self._snapshot_retry_at and self.chain_mgr.get_last_block()['block_index'] <= 1:
+            self._bootstrap_from_snapshot(peers, deadline)
+
+        # 1. BLOK SYNC
+        conn = self.db.get_read_connection()
+        try: locator = build_locator(conn)
+        finally: conn.close()
+        try:
+            # TR: Yanıt vermeyen eşler turun kalanında atlanır
+            # EN: Peers that did not answer are skipped for the rest of the round
+            applied, legacy, peers = self.scheduler.sync_blocks(peers, locator, self._save_blocks, deadline)
+            if applied: logger.info(f"Bloklar indirildi: {applied}")
+            if legacy: self.scheduler.map(lambda ip: self._sync_blocks_legacy(ip, deadline), legacy, deadline)
+        except Exception as e:
+            logger.debug(f"Blok senkronizasyon hatası: {e}")
+
+        # 2. ASSET SYNC
+        # TR: Her eşten sadece kayıtlı imleçten sonraki değişiklikler istenir (ekleme, güncelleme, silme);
+        #     /api/assets_changes olmayan eski eşler için tam liste karşılaştırması
+        # EN: Only the changes after the stored cursor are requested from each peer (inserts, updates, deletes);
+        #     full list comparison for old peers without /api/assets_changes
+        if self.asset_mgr:
+            feeds = self.scheduler.map(lambda ip: self._read_asset_changes(ip, deadline), peers, deadline)
+            # TR: Zamanı gelen park edilmiş değişiklikler yeniden denenir; aynı varlık için yeni bir değişiklik geldiyse eskisi atlanır
+            # EN: Parked changes that are due are retried; one is skipped when a newer change for the same asset arrived
+            parked = {}
+            for peer_ip, changes in feeds.items():
+                if changes is None: continue
+                fresh = {change['asset_id'] for change in changes}
+                parked[peer_ip] = [(c, n) for c, n in self.db.get_parked_changes(peer_ip, 'assets') if c['asset_id'] not in fresh]
+            # TR: Eksik içerikler önce indirilir; aynı blob'u ilan eden eşlerden sadece biri ondan istenir
+            # EN: Missing contents are downloaded first; of the peers announcing the same blob only one is asked for it
+            wanted = {}
+            for peer_ip, changes in feeds.items():
+                for change in itertools.chain((c for c, _ in parked.get(peer_ip, ())), changes or ()):
+                    content_hash = change.get('content_hash')
+                    if change['op'] == 'upsert' and content_hash and not self.asset_mgr.blobs.exists(content_hash):
+                        ips = wanted.setdefault(content_hash, [])
+                        if peer_ip not in ips: ips.append(peer_ip)
+            if wanted: self.scheduler.fetch_once(wanted, self._fetch_blob, deadline)
+            applied = sum(self._apply_asset_changes(peer_ip, feeds[peer_ip], retries) for peer_ip, retries in parked.items()
+                          if feeds[peer_ip] or retries)
+            if applied: logger.info(f"Varlık değişiklikleri uygulandı: {applied}")
+            legacy = [ip for ip, changes in feeds.items() if changes is None]
+            if legacy: self._sync_assets_legacy(legacy, deadline)
+            missing = {h: peers for h in self.asset_mgr.get_missing_blobs()}
+            if missing:
+                fetched = self.scheduler.fetch_once(missing, self._fetch_blob, deadline)
+                logger.info(f"Varlık içerikleri indirildi: {len(fetched)}/{len(missing)}")
+
+        # 3. FEE SYNC
+        def _fees(peer_ip):
+            f_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/get_fees", timeout=time_left(deadline, 3))
+            return f_resp.json() if f_resp.status_code == 200 else None
+        for fee_map in self.scheduler.map(_fees, peers, deadline).values():
+            if fee_map: self.db.update_fees(fee_map)
+
+    def _read_asset_changes(self, peer_ip, deadline):
+        # TR: Eşin değişiklik akışı kayıtlı imleçten itibaren sayfa sayfa okunur (sadece meta veri); eş akışı desteklemiyorsa None
+        # EN: The peer's change feed is read page by page from the stored cursor (metadata only); None if the peer has no feed
+        since, changes = self.db.get_sync_cursor(peer_ip, 'assets'), []
+        while time.time() < deadline:
+            resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/assets_changes", params={'since': since, 'limit': ASSET_CHANGES_PAGE},
+                                timeout=time_left(deadline, 3))
+            if resp.status_code == 404: return None
+            if resp.status_code != 200: break
+            page = resp.json()
+            changes.extend(page['changes'])
+            if not page['more'] or page['next'] == since: break
+            since = page['next']
+        return changes
+
+    def _apply_asset_changes(self, peer_ip, changes, parked=()):
+        """
+        TR: Önce zamanı gelen park edilmiş değişiklikler, sonra yeniler seq sırasıyla uygulanır. İçeriği hâlâ alınamayan değişiklik park
+            edilir (gecikme her denemede iki katına çıkar, ASSET_RETRY_ATTEMPTS denemeden sonra bırakılır) ve sıradakine geçilir. İmleç
+            okunan son değişikliğe ilerler: alınamayan bir blob eşi tıkamaz ve kuyruk her tur yeniden indirilmez. Uygulanan sayı döner.
+        EN: Due parked changes are applied first, then the new ones in seq order. A change whose content still cannot be fetched is
+            parked (the delay doubles per attempt, it is dropped after ASSET_RETRY_ATTEMPTS) and the next one is tried. The cursor
+            advances to the last change read: an unfetchable blob cannot block the peer and the tail is not downloaded again every
+            round. Returns the number of changes applied.
+        """
+        outcome = [(change, None if self._apply_asset_change(peer_ip, change) else attempts + 1)
+                   for change, attempts in itertools.chain(parked, ((change, 0) for change in changes))]
+        now = time.time()
+        with self.db.write() as conn:
+            for change, attempts in outcome:
+                if attempts is None: unpark_change(conn, peer_ip, 'assets', change['asset_id'])
+                elif attempts > ASSET_RETRY_ATTEMPTS:
+                    logger.warning(f"Varlık değişikliği bırakıldı ({peer_ip}, {change['asset_id']}): içerik {attempts - 1} denemede alınamadı")
+                    unpark_change(conn, peer_ip, 'assets', change['asset_id'])
+                else: park_change(conn, peer_ip, 'assets', change['asset_id'], change, attempts, now + ASSET_RETRY_DELAY * 2 ** (attempts - 1))
+            if changes: write_sync_cursor(conn, peer_ip, 'assets', changes[-1]['seq'])
+        return sum(1 for _, attempts in outcome if attempts is None)
+
+    def _apply_asset_change(self, peer_ip, change):
+        if change['op'] == 'delete':
+            if self.asset_mgr.remove_synced_asset(change['asset_id']): logger.info(f"Varlık silindi: {change['asset_id']}")
+            return True
+        if not change.get('content_hash'):
+            # TR: İçerik satırda kalmış eski bir varlık: tam veri /api/asset_data ile
+            # EN: An old asset whose content is still in the row: full data via /api/asset_data
+            try: return bool(self._fetch_asset(peer_ip, change['asset_id']))
+            except Exception as e:
+                logger.debug(f"Varlık indirilemedi ({peer_ip}, {change['asset_id']}): {e}")
+                return False
+        if not self.asset_mgr.blobs.exists(change['content_hash']): return False
+        self.asset_mgr.sync_asset(change)
+        return True
+
+    def _sync_assets_legacy(self, peers, deadline):
+        # TR: Eksik her varlık sadece bir eşten istenir; hata olursa onu ilan eden sıradaki eşe geçilir
+        # EN: Each missing asset is requested from one peer only; on failure the next peer advertising it is tried
+        def _assets_meta(peer_ip):
+            a_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/assets_meta", timeout=time_left(deadline, 3))
+            return a_resp.json() if a_resp.status_code == 200 else []
+        local_asset_ids = {a['asset_id'] for a in self.asset_mgr.get_all_assets_meta()}
+        wanted, names = {}, {}
+        for peer_ip, remote_assets in self.scheduler.map(_assets_meta, peers, deadline).items():
+            for ra in remote_assets:
+                if ra['asset_id'] in local_asset_ids: continue
+                wanted.setdefault(ra['asset_id'], []).append(peer_ip)
+                names[ra['asset_id']] = ra.get('name')
+        for asset_id in self.scheduler.fetch_once(wanted, self._fetch_asset, deadline):
+            logger.info(f"Varlık indirildi: {names[asset_id]}")
+
+    def _sync_blocks_legacy(self, peer_ip, deadline):
+        # TR: /api/headers olmayan eski sunucular için tam başlık listesi. Her istek turun kalanıyla sınırlıdır; süre dolunca
+        #     time_left döngüyü keser ve o ana kadar kaydedilen bloklar kalır
+        # EN: Full header list for old servers without /api/headers. Every request is capped by what is left of the round; once
+        #     the time is up time_left ends the loop and the blocks saved so far stay
+        resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/chain_meta", timeout=time_left(deadline, 3))
+        if resp.status_code != 200: return
+        remote_headers = resp.json()
+        local_last = self.chain_mgr.get_last_block()
+        if remote_headers and remote_headers[-1]['block_index'] > local_last['block_index']:
+            for h in remote_headers:
+                if h['block_index'] > local_last['block_index']:
+                    b_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/block/{h['block_hash']}", timeout=time_left(deadline, 3))
+                    if b_resp.status_code == 200:
+                        self._save_block(b_resp.json())
+                        logger.info(f"Blok indirildi: {h['block_index']}")
+
+    def _bootstrap_from_snapshot(self, peers, deadline):
+        # TR: Manifestler tüm eşlerden eşzamanlı ve tur süresi içinde istenir; en yüksek anlık görüntüyü sunan eşler sırayla denenir.
+        #     Sağlama ve blok doğrulaması tek yazma işleminde yapılır, herhangi bir hata tümünü geri alır. Hiçbir eş sunmuyorsa
+        #     SNAPSHOT_RETRY_INTERVAL boyunca tekrar sorulmaz. Başarısızsa normal blok senkronizasyonu sürer.
+        # EN: Manifests are requested from all peers concurrently within the round deadline; the peers offering the highest snapshot
+        #     are tried in turn. The checksum is verified and blocks validated in one write transaction, any error rolls everything back.
+        #     If no peer offers one, none is asked again for SNAPSHOT_RETRY_INTERVAL. On failure normal block sync continues.
+        manifests = self.scheduler.map(lambda ip: fetch_manifest(f"http://{ip}:{GHOST_PORT}", time_left(deadline, 5)), peers, deadline)
+        offers = sorted(((m, ip) for ip, m in manifests.items() if m), key=lambda offer: -int(offer[0]['height']))
+        if not offers:
+            self._snapshot_retry_at = time.time() + SNAPSHOT_RETRY_INTERVAL
+            return False
+        for manifest, peer_ip in offers:
+            if time.time() >= deadline: break
             try:
-                # 1. BLOK SYNC
-                resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/chain_meta", timeout=3)
-                if resp.status_code == 200:
-                    remote_headers = resp.json()
-                    local_last = self.chain_mgr.get_last_block()
-                    
-                    if remote_headers and remote_headers[-1]['block_index'] > local_last['block_index']:
-                        for h in remote_headers:
-                            if h['block_index'] > local_last['block_index']:
-                                b_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/block/{h['block_hash']}", timeout=3)
-                                if b_resp.status_code == 200:
-                                    self._save_block(b_resp.json())
-                                    logger.info(f"Blok indirildi: {h['block_index']}")
-
-                # 2. ASSET SYNC
-                if self.asset_mgr:
-                    a_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/assets_meta", timeout=3)
-                    if a_resp.status_code == 200:
-                        remote_assets = a_resp.json()
-                        local_assets_meta = self.asset_mgr.get_all_assets_meta()
-                        local_asset_ids = {a['asset_id'] for a in local_assets_meta}
-                        
-                        for ra in remote_assets:
-                            if ra['asset_id'] not in local_asset_ids:
-                                content_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/asset_data/{ra['asset_id']}", timeout=3)
-                                if content_resp.status_code == 200:
-                                    self.asset_mgr.sync_asset(content_resp.json())
-                                    logger.info(f"Varlık indirildi: {ra['name']}")
-                                    
-                # 3. FEE SYNC
-                f_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/get_fees", timeout=3)
-                if f_resp.status_code == 200:
-                    self.db.update_fees(f_resp.json())
-                
-            except Exception as e: 
-                logger.debug(f"Senkronizasyon hatası ({peer_ip}): {e}")
+                got = download_snapshot(f"http://{peer_ip}:{GHOST_PORT}", SNAPSHOT_DOWNLOAD_DIR, time_left(deadline, SNAPSHOT_DOWNLOAD_TIMEOUT), manifest)
+            except Exception as e:
+                logger.debug(f"Anlık görüntü indirilemedi ({peer_ip}): {e}")
+                continue
+            if not got: continue
+            path, manifest = got
+            try:
+                with self.db.write() as conn:
+                    if conn.execute("SELECT MAX(block_index) FROM blocks").fetchone()[0] > 1: return False
+                    _, counts = import_snapshot(conn, path, self.chain_mgr.validator, manifest['height'])
+                logger.info(f"Anlık görüntü yüklendi: yükseklik {manifest['height']} ({peer_ip}) {counts}")
+                return True
+            except Exception as e:
+                logger.warning(f"Anlık görüntü reddedildi ({peer_ip}): {e}")
+            finally:
+                try: os.remove(path)
+                except OSError: pass
+        return False
+
+    def verify_payment(self, tx_id):
+        """
+        TR: Bir işlemin onayını tam blok indirmeden doğrular: eşten Merkle kanıtı alınır, kök düğümün kendi zincirinden
+            (tam blok veya budanmış başlık) okunur. Sunucunun gönderdiği köke ve işleme güvenilmez. (doğrulandı mı, kanıt) döner.
+        EN: Verifies a transaction's confirmation without downloading full blocks: the Merkle proof comes from a peer, the root
+            is read from the node's own chain (full block or pruned header). The server's root and tx are not trusted. Returns (verified, proof).
+        """
+        for peer_ip in list(self.known_peers):
+            try:
+                resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/tx_proof/{tx_id}", timeout=5)
+                if resp.status_code != 200: continue
+                proof = resp.json()
+            except Exception as e:
+                logger.debug(f"Kanıt alınamadı ({peer_ip}): {e}")
+                continue
+            if not isinstance(proof, dict) or proof.get('tx', {}).get('tx_id') != tx_id: continue
+            conn = self.db.get_read_connection()
+            try: root = merkle_root_at(conn, proof.get('block_index'), proof.get('block_hash'))
+            finally: conn.close()
+            if verify_tx_proof(proof, root): return True, proof
+        return False, None
+
+    def _fetch_blob(self, peer_ip, content_hash):
+        with requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/blob/{content_hash}", stream=True, timeout=30) as b_resp:
+            if b_resp.status_code != 200: return False
+            self.asset_mgr.blobs.put_chunks(b_resp.iter_content(chunk_size=65536), expected_hash=content_hash)
+        return True
+
+    def _fetch_asset(self, peer_ip, asset_id):
+        # TR: Önce sadece meta veri; içerik diske doğrudan akıtılır ve hash doğrulanır
+        # EN: Metadata first; content is streamed straight to disk and its hash verified
+        meta_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/asset_data/{asset_id}", params={'content': '0'}, timeout=3)
+        if meta_resp.status_code != 200: return False
+        meta = meta_resp.json()
+        content_hash = meta.get('content_hash')
+        if not content_hash:
+            # TR: Eski sunucu: base64 içerik tam JSON içinde gelir
+            # EN: Old server: base64 content arrives inside the full JSON
+            full_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/asset_data/{asset_id}", timeout=30)
+            if full_resp.status_code != 200: return False
+            self.asset_mgr.sync_asset(full_resp.json())
+            return True
+        if not self.asset_mgr.blobs.exists(content_hash) and not self._fetch_blob(peer_ip, content_hash): return False
+        self.asset_mgr.sync_asset(meta)
+        return True
 
     def _save_block(self, block_data):
-        conn = self.db.get_connection()
-        try:
-            conn.execute("INSERT OR IGNORE INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key) VALUES (?, ?, ?, ?, ?, ?)",
-                         (block_data['block_index'], block_data['timestamp'], block_data['previous_hash'], block_data['block_hash'], block_data['proof'], block_data['miner_key']))
-            conn.commit()
+        return self._save_blocks([block_data])
+
+    def _save_blocks(self, blocks):
+        # TR: Aralık önce doğrulanır ve çatal seçimiyle sınıflanır; sadece geçerli önek tek işlemde yazılır. Daha ağır bir dal
+        #     aynı işlemde yerel blokları (ve kendi kazdığımız blokların ödüllerini) geri alıp yerine bağlanır. Kabul edilen blok sayısı döner.
+        # EN: The range is validated and classified by fork choice first; only the valid prefix is written in one transaction. A heavier
+        #     branch disconnects the local blocks (and the rewards of blocks we mined) in the same transaction. Returns the blocks accepted.
+        if not blocks: return 0
+        fork_choice = self.chain_mgr.fork_choice
+        conn = self.db.get_read_connection()
+        try: plan = fork_choice.plan(conn, blocks)
         finally: conn.close()
+        if plan['action'] in ('none', 'side'): return plan['accepted']
+        new_blocks = plan['blocks']
+        with self.db.write() as conn:
+            tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+            if tip['block_hash'] != plan['tip_hash'] or block_hash_at(conn, plan['ancestor']) != new_blocks[0]['previous_hash']: return plan['known']
+            removed = disconnect_blocks(conn, plan['ancestor'])[0] if plan['action'] == 'reorg' else 0
+            conn.executemany("INSERT INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [(b['block_index'], b['timestamp'], b['previous_hash'], b['block_hash'], b['proof'], b['miner_key'], committed_root(b)) for b in new_blocks])
+        if plan['action'] == 'reorg': fork_choice.record_reorg(plan['ancestor'], removed, len(new_blocks))
+        return plan['accepted']
 
 # --- ANA UYGULAMA (TERMINAL ARAYÜZÜ) / MAIN APP (TERMINAL UI) ---
 class GhostMeshNodeApp:
     def __init__(self):
-        self.db = DatabaseManager(DB_FILE)
+        self.db = DatabaseManager(DB_FILE, BlobStore(BLOB_DIR))
+        if PRUNE_MODE: self.db.pool.enable_incremental_vacuum()
         
         self.chain = NodeBlockchainManager(self.db)
         self.mesh = NodeMeshManager(self.db, self.chain)
@@ -751,6 +1143,9 @@ class GhostMeshNodeApp:
         print(f"{self.L['stats_solved_blocks']}: {stats['solved_blocks']}")
         print(f"{self.L['stats_last_block']}: {stats['last_block_hash']}")
         print(f"{self.L['stats_halving']}: {stats['blocks_to_halving']}")
+        disk = stats['disk']
+        print(f"{self.L['stats_disk']}: {(disk['db_bytes'] + disk['wal_bytes']) / (1024 * 1024):,.1f} MB "
+              f"({disk['full_blocks']} / {disk['header_blocks']} {self.L['stats_headers_only']})")
         print("="*40 + "\n")
 
     def display_status(self):
@@ -828,7 +1223,7 @@ class GhostMeshNodeApp:
                 for r in results:
                     if r['asset_id'] == vid:
                         try:
-                            print(f"\n--- {r['name']} ---\n{r['content'].decode('utf-8')}\n----------------")
+                            print(f"\n--- {r['name']} ---\n{self.asset.read_content(r).decode('utf-8')}\n----------------")
                         except:
                             print("Binary content.")
                         input("Enter...")
@@ -836,9 +1231,16 @@ class GhostMeshNodeApp:
     def wallet_screen(self):
         print(f"\n--- {self.L['opt_wallet']} ---")
         print(self.L['back_to_menu'])
+        print(self.L['verify_hint'])
         
         rec = input(self.L['recipient'])
         if rec == '0': return
+        if rec.lower() == 'v':
+            ok, proof = self.mesh.verify_payment(input(self.L['verify_tx_id']).strip())
+            if ok: print(f"✅ {self.L['verify_ok']}: #{proof['block_index']} {proof['tx']['amount']} GHOST → {proof['tx']['recipient']}")
+            else: print(f"❌ {self.L['verify_fail']}")
+            input("Enter...")
+            return
         
         try: 
             amt_str = input(self.L['amount'])
@@ -858,8 +1260,10 @@ class GhostMeshNodeApp:
         confirm = input("Start Mining? (y/n/0): ")
         if confirm == '0' or confirm.lower() == 'n': return
         
-        print(self.L['mining_start'])
-        success, msg = self.chain.mine_block(self.current_user)
+        print(f"{self.L['mining_start']} ({self.chain.miner.workers} workers)")
+        progress = lambda hashes, rate: print(f"\r  {hashes:,} hashes | {rate:,.0f} H/s", end="", flush=True)
+        success, msg = self.chain.mine_block(self.current_user, progress=progress)
+        print()
         if success: print(f"⛏️ {self.L['block_found']} Hash: {msg}")
         else: print(f"❌ {msg}")
         input("Enter...")
@@ -932,6 +1336,12 @@ class GhostMeshNodeApp:
             elif choice == '8': break
 
 if __name__ == '__main__':
+    if '--reindex-stats' in sys.argv:
+        # TR: chain_stats sayaçlarını tablolardan yeniden hesapla ve çık (ağ başlatılmaz)
+        # EN: Recompute the chain_stats counters from the tables and exit (the network is not started)
+        with DatabaseManager(DB_FILE, BlobStore(BLOB_DIR)).write() as conn: print(reindex_chain_stats(conn))
+        sys.exit(0)
+    if '--prune' in sys.argv: PRUNE_MODE = True
     node = GhostMeshNodeApp()
     try:
         node.run()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Mining Engine
+TR: Çok çekirdekli iş kanıtı (PoW) arayıcısı. Nonce alanı bir süreç havuzuna bölünür; ilk çözümde tüm işçiler durur.
+EN: Multi-core proof-of-work solver. The nonce space is split across a process pool; all workers stop at the first solution.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger("GhostMiner")
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+# TR: Nonce alanı 10^BLOCK_DIGITS büyüklüğünde bloklara ayrılır; işçiler durma bayrağını blok başına kontrol eder
+# EN: The nonce space is cut into blocks of 10^BLOCK_DIGITS; workers check the stop flag once per block
+BLOCK_DIGITS = 4
+BLOCK_SIZE = 10 ** BLOCK_DIGITS
+PROGRESS_INTERVAL = 0.5
+
+# TR: Bozulan havuz en fazla bu kadar kez yeniden kurulur; sonra iş bu süreçte tek çekirdekle bitirilir
+# EN: A broken pool is recreated at most this many times; after that the job finishes in-process on one core
+POOL_RETRIES = 1
+
+# TR: Nonce son ekleri bir kez kodlanır: blok 0 için dolgusuz ("7"), diğer bloklar için sıfır dolgulu ("0007")
+# EN: Nonce suffixes are encoded once: unpadded for block 0 ("7"), zero-padded for later blocks ("0007")
+_SUFFIXES_FIRST = tuple(str(i).encode() for i in range(BLOCK_SIZE))
+_SUFFIXES_PADDED = tuple(str(i).zfill(BLOCK_DIGITS).encode() for i in range(BLOCK_SIZE))
+
+def pool_context():
+    """
+    TR: Süreç havuzları için başlatma bağlamı. 'fork' kullanılmaz: sunucu ve düğüm çok iş parçacıklıdır ve çatallanan çocuk
+        başka bir iş parçacığının tuttuğu kilitleri (logging, sqlite, requests) kilitli devralabilir. Varsa forkserver, yoksa spawn.
+    EN: Start context for process pools. 'fork' is not used: server and node are multi-threaded and a forked child can
+        inherit locks held by another thread (logging, sqlite, requests) in the locked state. forkserver if available, else spawn.
+    """
+    return multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def valid_proof(last_proof, proof, difficulty):
+    # TR: Referans kontrol (zincirde kabul edilen kural)
+    # EN: Reference check (the rule accepted on chain)
+    return hashlib.sha256(f'{last_proof}{proof}'.encode()).hexdigest()[:difficulty] == '0' * difficulty
+
+def scan_block(last_proof, difficulty, block):
+    """
+    TR: sha256(f'{last_proof}{nonce}') için blok içindeki nonce'ları sırayla dener; ilk geçerli nonce'u veya None döner.
+        Sabit önek bir kez hash'lenir ve durum (midstate) her nonce için .copy() edilir. Karşılaştırma ham özet
+        baytları üzerinde yapılır: ilk difficulty//2 bayt sıfır ve tek zorlukta sonraki baytın üst yarısı sıfır.
+        Bu, hexdigest()[:difficulty] == '0' * difficulty ile birebir aynı kanıtları kabul eder.
+    EN: Tries the nonces of one block in order for sha256(f'{last_proof}{nonce}'); returns the first valid nonce or None.
+        The constant prefix is hashed once and the midstate is .copy()'d per nonce. The check runs on raw digest bytes:
+        the first difficulty//2 bytes are zero and, for odd difficulty, the high nibble of the next byte is zero.
+        This accepts exactly the proofs hexdigest()[:difficulty] == '0' * difficulty accepts.
+    """
+    if difficulty > 64: return None
+    if block == 0:
+        midstate = hashlib.sha256(str(last_proof).encode())
+        suffixes = _SUFFIXES_FIRST
+    else:
+        midstate = hashlib.sha256(f'{last_proof}{block}'.encode())
+        suffixes = _SUFFIXES_PADDED
+    zeros = bytes(difficulty // 2)
+    copy = midstate.copy
+    if difficulty % 2:
+        full = difficulty // 2
+        for i, suffix in enumerate(suffixes):
+            h = copy()
+            h.update(suffix)
+            d = h.digest()
+            if d.startswith(zeros) and d[full] < 16: return block * BLOCK_SIZE + i
+    else:
+        for i, suffix in enumerate(suffixes):
+            h = copy()
+            h.update(suffix)
+            if h.digest().startswith(zeros): return block * BLOCK_SIZE + i
+    return None
+
+# TR: Süreç havuzu işçilerinde paylaşılan durum (initializer ile kurulur)
+# EN: State shared by pool workers (installed by the initializer)
+_stop = None
+_hashes = None
+
+def _init_worker(stop_event, hash_counter):
+    global _stop, _hashes
+    _stop, _hashes = stop_event, hash_counter
+
+def _search(last_proof, difficulty, start, step):
+    # TR: İşçi i, i + k*step bloklarını tarar; bulduğunda durma bayrağını kaldırır
+    # EN: Worker i scans blocks i + k*step; raises the stop flag when it finds one
+    block = start
+    while not _stop.is_set():
+        proof = scan_block(last_proof, difficulty, block)
+        if proof is not None:
+            _stop.set()
+            with _hashes.get_lock(): _hashes.value += proof - block * BLOCK_SIZE + 1
+            return proof
+        with _hashes.get_lock(): _hashes.value += BLOCK_SIZE
+        block += step
+    return None
+
+def _search_local(last_proof, difficulty, progress=None, cancel=None):
+    block, started, last_report = 0, time.time(), time.time()
+    while True:
+        proof = scan_block(last_proof, difficulty, block)
+        if proof is not None: return proof, proof + 1
+        block += 1
+        if cancel is not None and cancel.is_set(): return None, block * BLOCK_SIZE
+        if progress and time.time() - last_report >= PROGRESS_INTERVAL:
+            last_report = time.time()
+            progress(block * BLOCK_SIZE, block * BLOCK_SIZE / max(last_report - started, 1e-9))
+
+class MiningEngine:
+    """
+    TR: Süreç havuzu tembel oluşturulur ve yeniden kullanılır; aynı anda bir çözüm yürütülür (CPU zaten dolu).
+    EN: The process pool is created lazily and reused; one solve runs at a time (the CPU is saturated anyway).
+    """
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = max(1, int(workers or 1))
+        self._pool = None
+        self._lock = threading.Lock()
+        self._ctx = pool_context()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._stop = self._ctx.Event()
+            self._hashes = self._ctx.Value('Q', 0)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx,
+                                             initializer=_init_worker, initargs=(self._stop, self._hashes))
+        return self._pool
+
+    def solve(self, last_proof, difficulty, progress=None, cancel=None):
+        """
+        TR: progress(hashes, hash_rate) ilerleme sırasında çağrılır; cancel (threading.Event) kurulursa None döner.
+            Sonuç: {'proof', 'hashes', 'elapsed', 'hash_rate'}
+        EN: progress(hashes, hash_rate) is called while searching; returns None if cancel (threading.Event) is set.
+            Result: {'proof', 'hashes', 'elapsed', 'hash_rate'}
+        """
+        started = time.time()
+        with self._lock:
+            if self.workers == 1:
+                proof, hashes = _search_local(last_proof, difficulty, progress, cancel)
+            else:
+                proof, hashes = self._solve_with_retry(last_proof, difficulty, progress, cancel, started)
+        elapsed = time.time() - started
+        if proof is None: return None
+        result = {'proof': proof, 'hashes': hashes, 'elapsed': elapsed, 'hash_rate': hashes / max(elapsed, 1e-9)}
+        logger.info(f"PoW solved: difficulty={difficulty} proof={proof} {result['hash_rate']:,.0f} H/s with {self.workers} workers")
+        return result
+
+    def _solve_with_retry(self, last_proof, difficulty, progress, cancel, started):
+        # TR: Bir işçi ölürse (OOM, sinyal) havuz atılıp yeniden kurulur ve arama baştan yapılır; iş başarısız sayılmaz
+        # EN: If a worker dies (OOM, signal) the pool is discarded and recreated and the search restarts; the job does not fail
+        for attempt in range(POOL_RETRIES + 1):
+            try: return self._solve_parallel(last_proof, difficulty, progress, cancel, started)
+            except BrokenProcessPool:
+                logger.warning(f"Mining pool broke (attempt {attempt + 1}); recreating it")
+                self._discard_pool()
+        return _search_local(last_proof, difficulty, progress, cancel)
+
+    def _discard_pool(self):
+        pool, self._pool = self._pool, None
+        if pool is not None: pool.shutdown(wait=False, cancel_futures=True)
+
+    def _solve_parallel(self, last_proof, difficulty, progress, cancel, started):
+        pool = self._get_pool()
+        self._stop.clear()
+        with self._hashes.get_lock(): self._hashes.value = 0
+        futures = [pool.submit(_search, last_proof, difficulty, i, self.workers) for i in range(self.workers)]
+        proof = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for f in done:
+                found = f.result()
+                if found is not None and proof is None: proof = found
+            if proof is not None or (cancel is not None and cancel.is_set()):
+                self._stop.set()
+            elif progress:
+                hashes = self._hashes.value
+                progress(hashes, hashes / max(time.time() - started, 1e-9))
+        return proof, self._hashes.value
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._stop.set()
+            self._pool.shutdown(wait=True)
+            self._pool = None
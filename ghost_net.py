@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Gossip Network Layer
+TR: Yayınlar için ortak katman: eş başına kalıcı (keep-alive) requests.Session, kuyruktan beslenen sabit boyutlu işçi havuzu
+    ve gelen tekrarları bellekte eleyen görülmüş-kimlik filtresi.
+EN: Shared gossip layer: a keep-alive requests.Session per peer, a fixed-size worker pool fed from a queue
+    and a seen-ID filter that drops inbound duplicates in memory.
+"""
+import hashlib
+import math
+import queue
+import threading
+import time
+import logging
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("GhostNet")
+
+DEFAULT_OUTBOUND_WORKERS = 8
+DEFAULT_OUTBOUND_QUEUE_SIZE = 10000
+DEFAULT_PUT_TIMEOUT = 1.0
+DEFAULT_POST_TIMEOUT = 3
+MAX_PEER_SESSIONS = 256
+# TR: Toplu gönderim: eş başına bekleyen öğeler bu süre dolunca veya bu sayıya ulaşınca tek istekte gider
+# EN: Batching: pending items per peer leave in one request when this window expires or this count is reached
+DEFAULT_BATCH_WINDOW = 0.05
+DEFAULT_BATCH_MAX_ITEMS = 500
+
+class PeerSessions:
+    """
+    TR: Eş başına bir Session; TCP bağlantıları yeniden kullanılır. En uzun süre kullanılmayan oturum sınırda kapatılır.
+    EN: One Session per peer; TCP connections are reused. The least recently used session is closed at the limit.
+    """
+    def __init__(self, pool_size=DEFAULT_OUTBOUND_WORKERS, max_sessions=MAX_PEER_SESSIONS):
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, peer):
+        with self._lock:
+            session = self._sessions.get(peer)
+            if session is not None:
+                self._sessions.move_to_end(peer)
+                return session
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._sessions[peer] = session
+            if len(self._sessions) > self.max_sessions:
+                _, old = self._sessions.popitem(last=False)
+                try: old.close()
+                except Exception: pass
+            return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                try: session.close()
+                except Exception: pass
+            self._sessions.clear()
+
+class OutboundPool:
+    """
+    TR: Giden POST'lar sınırlı bir kuyruğa girer ve sabit sayıda işçi tarafından gönderilir (mesaj başına iş parçacığı yok).
+        Kuyruk doluysa çağıran put_timeout kadar bekler (geri basınç), sonra öğe düşürülür ve sayılır; bir yayın tüm eşler için
+        toplamda en fazla bir put_timeout bekler. Yayınlar en iyi çabadır, senkronizasyon döngüsü eksikleri tamamlar.
+    EN: Outbound POSTs go into a bounded queue and are sent by a fixed number of workers (no thread per message).
+        When the queue is full the caller waits up to put_timeout (backpressure), then the item is dropped and counted; one
+        broadcast waits at most one put_timeout in total across all peers. Gossip is best effort and the sync loop fills the gaps.
+    """
+    def __init__(self, port, workers=DEFAULT_OUTBOUND_WORKERS, max_pending=DEFAULT_OUTBOUND_QUEUE_SIZE,
+                 put_timeout=DEFAULT_PUT_TIMEOUT, post_timeout=DEFAULT_POST_TIMEOUT,
+                 batch_window=DEFAULT_BATCH_WINDOW, batch_max_items=DEFAULT_BATCH_MAX_ITEMS):
+        self.port = port
+        self.put_timeout = put_timeout
+        self.post_timeout = post_timeout
+        self.batch_window = batch_window
+        self.batch_max_items = batch_max_items
+        self.sessions = PeerSessions(pool_size=workers)
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'dropped': 0, 'batches': 0}
+        self._stats_lock = threading.Lock()
+        # TR: (eş, toplu yol) -> [yük listesi, tekil yol, son gönderim zamanı]
+        # EN: (peer, batch path) -> [payload list, single path, flush deadline]
+        self._batches = {}
+        self._batch_cond = threading.Condition()
+        # TR: Toplu uç noktası olmayan (404) eski eşler; onlara tek tek gönderilir
+        # EN: Old peers without the batch endpoint (404); they get items one by one
+        self._no_batch = set()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"ghost-outbound-{i}", daemon=True).start()
+        threading.Thread(target=self._flusher, name="ghost-outbound-flush", daemon=True).start()
+
+    def _count(self, key, n=1):
+        with self._stats_lock: self.stats[key] += n
+
+    def _enqueue(self, peer, path, payload, batch_path=None, count=1, deadline=None):
+        timeout = self.put_timeout if deadline is None else deadline - time.time()
+        try:
+            if timeout > 0: self.queue.put((peer, path, payload, batch_path), timeout=timeout)
+            else: self.queue.put_nowait((peer, path, payload, batch_path))
+            self._count('queued', count)
+            return True
+        except queue.Full:
+            self._count('dropped', count)
+            logger.warning(f"Outbound queue full, dropped {count} x {path} for {peer}")
+            return False
+
+    def post(self, peer, path, payload, batch_path=None, deadline=None):
+        """
+        TR: batch_path verilirse öğe eş başına biriktirilir ve batch_window / batch_max_items ile tek istekte gönderilir.
+            deadline verilirse kuyruk doluyken en fazla o zamana kadar beklenir (sonrasında beklemeden düşürülür).
+        EN: With batch_path the item is buffered per peer and sent in one request by batch_window / batch_max_items.
+            With a deadline a full queue is waited on at most until then (afterwards items are dropped without waiting).
+        """
+        if batch_path is None or self.batch_window <= 0 or peer in self._no_batch:
+            return self._enqueue(peer, path, payload, deadline=deadline)
+        full = None
+        with self._batch_cond:
+            entry = self._batches.get((peer, batch_path))
+            if entry is None:
+                entry = self._batches[(peer, batch_path)] = [[], path, time.time() + self.batch_window]
+                self._batch_cond.notify()
+            entry[0].append(payload)
+            if len(entry[0]) >= self.batch_max_items: full = self._batches.pop((peer, batch_path))
+        if full: return self._enqueue(peer, full[1], full[0], batch_path, count=len(full[0]), deadline=deadline)
+        return True
+
+    def broadcast(self, peers, path, payload, batch_path=None):
+        # TR: Tek bir bekleme bütçesi tüm eşlere paylaştırılır; dolu kuyrukta çağıran eş sayısı x put_timeout kadar bloklanmaz
+        # EN: One wait budget is shared by all peers; a full queue cannot block the caller for peer count x put_timeout
+        deadline = time.time() + self.put_timeout
+        return sum(1 for peer in peers if self.post(peer, path, payload, batch_path, deadline))
+
+    def _flusher(self):
+        while True:
+            due = []
+            with self._batch_cond:
+                if not self._batches: self._batch_cond.wait()
+                now = time.time()
+                next_deadline = None
+                for key in list(self._batches):
+                    if self._batches[key][2] <= now: due.append((key, self._batches.pop(key)))
+                    elif next_deadline is None or self._batches[key][2] < next_deadline: next_deadline = self._batches[key][2]
+                if not due and next_deadline is not None: self._batch_cond.wait(max(0.0, next_deadline - now))
+            for (peer, batch_path), (items, path, _) in due:
+                self._enqueue(peer, path, items, batch_path, count=len(items))
+
+    def pending(self):
+        with self._batch_cond: buffered = sum(len(e[0]) for e in self._batches.values())
+        return self.queue.qsize() + buffered
+
+    def _send(self, peer, path, payload):
+        return self.sessions.get(peer).post(f"http://{peer}:{self.port}{path}", json=payload, timeout=self.post_timeout)
+
+    def _worker(self):
+        while True:
+            peer, path, payload, batch_path = self.queue.get()
+            count = len(payload) if batch_path else 1
+            try:
+                if batch_path:
+                    resp = self._send(peer, batch_path, payload)
+                    if resp.status_code == 404:
+                        # TR: Eski eş: bundan sonra tek tek gönder
+                        # EN: Old peer: send one by one from now on
+                        self._no_batch.add(peer)
+                        for item in payload: resp = self._send(peer, path, item)
+                    else: self._count('batches')
+                else: resp = self._send(peer, path, payload)
+                self._count('sent' if resp.status_code < 500 else 'failed', count)
+            except Exception as e:
+                self._count('failed', count)
+                logger.debug(f"Outbound {batch_path or path} to {peer} failed: {e}")
+            finally: self.queue.task_done()
+
+class BloomFilter:
+    """
+    TR: Sabit boyutlu bit dizisi; m ve k, kapasite ve hedef yanlış pozitif oranından hesaplanır.
+    EN: Fixed-size bit array; m and k are derived from the capacity and the target false-positive rate.
+    """
+    def __init__(self, capacity, fp_rate):
+        self.capacity = capacity
+        self.bits = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # TR: Çift hash: tek blake2b özetinden k konum türetilir
+        # EN: Double hashing: k positions derived from one blake2b digest
+        d = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(d[:8], 'little'), int.from_bytes(d[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key): self.array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class SeenFilter:
+    """
+    TR: Gelen gossip kimlikleri için sınırlı bellek filtresi.
+        - LRU: veritabanında olduğu kesin olan son kimlikler; isabet = tekrar, DB'ye hiç gidilmez.
+        - Dönen Bloom (güncel + önceki): negatif yanıt "kesinlikle yeni" demektir, SELECT atlanır;
+          pozitif yanıt sadece "belki"dir, DB kontrolü yapılır ve yanlış pozitifler sayılır.
+        Güncel filtre kapasitesine ulaşınca öncekinin yerine geçer; bellek sabit kalır.
+    EN: Bounded in-memory filter for inbound gossip ids.
+        - LRU: recent ids known to be in the database; a hit is a duplicate and never reaches the DB.
+        - Rotating Bloom (current + previous): a negative means "definitely new", so the SELECT is skipped;
+          a positive only means "maybe", the DB is checked and false positives are counted.
+        When the current filter reaches capacity it replaces the previous one; memory stays fixed.
+    """
+    def __init__(self, lru_size, bloom_capacity, bloom_fp_rate):
+        self.lru_size = lru_size
+        self.bloom_capacity = bloom_capacity
+        self.bloom_fp_rate = bloom_fp_rate
+        self._lru = OrderedDict()
+        self._current = BloomFilter(bloom_capacity, bloom_fp_rate)
+        self._previous = None
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'lru_hits': 0, 'bloom_negatives': 0, 'bloom_positives': 0, 'false_positives': 0, 'rotations': 0}
+
+    def is_duplicate(self, key):
+        # TR: Sadece LRU'ya bakar (kesin); isabet varsa öğe DB'ye gitmeden atılabilir
+        # EN: Checks the LRU only (exact); on a hit the item can be dropped before touching the DB
+        if not key: return False
+        with self._lock:
+            self.stats['lookups'] += 1
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.stats['lru_hits'] += 1
+                return True
+            return False
+
+    def might_contain(self, key):
+        with self._lock:
+            hit = key in self._current or (self._previous is not None and key in self._previous)
+            self.stats['bloom_positives' if hit else 'bloom_negatives'] += 1
+            return hit
+
+    def record_false_positive(self):
+        with self._lock: self.stats['false_positives'] += 1
+
+    def add(self, key):
+        if not key: return
+        with self._lock:
+            self._lru[key] = None
+            self._lru.move_to_end(key)
+            if len(self._lru) > self.lru_size: self._lru.popitem(last=False)
+            if self._current.count >= self.bloom_capacity:
+                self._previous, self._current = self._current, BloomFilter(self.bloom_capacity, self.bloom_fp_rate)
+                self.stats['rotations'] += 1
+            self._current.add(key)
+
+    def snapshot(self):
+        with self._lock:
+            d = dict(self.stats)
+            d.update({'lru_size': len(self._lru), 'lru_capacity': self.lru_size, 'bloom_items': self._current.count,
+                      'bloom_capacity': self.bloom_capacity, 'bloom_bits': self._current.bits, 'bloom_hashes': self._current.hashes})
+            return d
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Search Index
+TR: Varlık adları, anahtar kelimeleri ve alan adı metinleri üzerinde FTS5 (BM25) tam metin arama.
+EN: FTS5 (BM25) full-text search over asset names, keywords and the text of domain content.
+"""
+import hashlib
+import re
+import sqlite3
+import logging
+
+logger = logging.getLogger("GhostSearch")
+
+FTS_TABLE = 'assets_fts'
+MAX_BODY_CHARS = 65536
+DEFAULT_PAGE_SIZE = 20
+# TR: bm25 sütun ağırlıkları: asset_id (dizinlenmez), name, keywords, body
+# EN: bm25 column weights: asset_id (unindexed), name, keywords, body
+BM25_WEIGHTS = (0.0, 10.0, 5.0, 1.0)
+META_COLUMNS = "a.asset_id, a.owner_pub_key, a.type, a.name, a.content_hash, a.storage_size, a.creation_time, a.expiry_time"
+
+def fts_rowid(asset_id):
+    # TR: asset_id'den türetilen sabit rowid; eşleme tablosu gerektirmez ve VACUUM'dan etkilenmez
+    # EN: Stable rowid derived from asset_id; needs no mapping table and survives VACUUM
+    return int(hashlib.sha256(asset_id.encode('utf-8')).hexdigest()[:15], 16)
+
+def extract_text(content_bytes):
+    try: text = content_bytes.decode('utf-8', errors='ignore')
+    except Exception: return ""
+    text = re.sub(r'<(script|style).*?>.*?</\1>', ' ', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'<.*?>', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text[:MAX_BODY_CHARS]
+
+def fts_available(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (FTS_TABLE,)).fetchone() is not None
+
+def create_index(conn):
+    try:
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                     "asset_id UNINDEXED, name, keywords, body, tokenize = 'unicode61 remove_diacritics 2')")
+        return True
+    except sqlite3.OperationalError as e:
+        # TR: FTS5 olmadan derlenmiş SQLite; arama LIKE'a geri düşer
+        # EN: SQLite built without FTS5; search falls back to LIKE
+        logger.warning(f"FTS5 unavailable, search falls back to LIKE: {e}")
+        return False
+
+def index_asset(conn, asset_id, name, keywords, asset_type, content_bytes=None):
+    if not fts_available(conn): return
+    body = extract_text(content_bytes) if asset_type == 'domain' and content_bytes else ""
+    rowid = fts_rowid(asset_id)
+    conn.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (rowid,))
+    conn.execute(f"INSERT INTO {FTS_TABLE} (rowid, asset_id, name, keywords, body) VALUES (?, ?, ?, ?, ?)",
+                 (rowid, asset_id, name or "", (keywords or "").replace(',', ' '), body))
+
+def remove_asset(conn, asset_id):
+    if not fts_available(conn): return
+    conn.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = ?", (fts_rowid(asset_id),))
+
+def rebuild_index(conn, blob_store):
+    if not fts_available(conn): return 0
+    conn.execute(f"DELETE FROM {FTS_TABLE}")
+    count = 0
+    for row in conn.execute("SELECT asset_id, name, keywords, type, content_hash FROM assets").fetchall():
+        content = None
+        if row['type'] == 'domain' and row['content_hash'] and blob_store.exists(row['content_hash']):
+            content = blob_store.read_bytes(row['content_hash'])
+        index_asset(conn, row['asset_id'], row['name'], row['keywords'], row['type'], content)
+        count += 1
+    return count
+
+def build_match_query(query):
+    # TR: Kullanıcı girdisi FTS5 sözdizimine kaçırılır; her kelime önek eşleşmesi olarak AND'lenir
+    # EN: User input is escaped into FTS5 syntax; each word is ANDed as a prefix match
+    tokens = re.findall(r'\w+', query.lower(), flags=re.UNICODE)
+    return " ".join(f'"{t}"*' for t in tokens[:16])
+
+def search(conn, query, page=1, per_page=DEFAULT_PAGE_SIZE):
+    """
+    TR: BM25 sıralı, sayfalı arama. Sadece meta veri döner (içerik yok). (sonuçlar, toplam) döndürür.
+    EN: BM25-ranked, paginated search. Returns metadata only (no content). Returns (results, total).
+    """
+    page = max(1, int(page))
+    offset = (page - 1) * per_page
+    if fts_available(conn):
+        match = build_match_query(query)
+        if not match: return [], 0
+        total = conn.execute(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,)).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {META_COLUMNS}, bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS rank "
+            f"FROM {FTS_TABLE} JOIN assets a ON a.asset_id = {FTS_TABLE}.asset_id "
+            f"WHERE {FTS_TABLE} MATCH ? ORDER BY rank LIMIT ? OFFSET ?", (match, per_page, offset)).fetchall()
+    else:
+        s = f"%{query}%"
+        total = conn.execute("SELECT COUNT(*) FROM assets WHERE name LIKE ? OR keywords LIKE ?", (s, s)).fetchone()[0]
+        rows = conn.execute(f"SELECT {META_COLUMNS} FROM assets a WHERE name LIKE ? OR keywords LIKE ? "
+                            "ORDER BY creation_time DESC LIMIT ? OFFSET ?", (s, s, per_page, offset)).fetchall()
+    return [dict(r) for r in rows], total
@@ -11,13 +11,27 @@ import os
 import requests 
 import threading
 import socket
+import mimetypes
+import sys
 from typing import Optional, Tuple, Dict, Any, List
-from flask import Flask, jsonify, request, render_template_string, session, redirect, url_for, Response
+from flask import Flask, Request, jsonify, request, render_template_string, session, redirect, url_for, Response, send_file
 from uuid import uuid4
 from datetime import timedelta, datetime
 from markupsafe import Markup 
 from jinja2 import DictLoader, Template 
 from werkzeug.utils import secure_filename
+from flask.sessions import SecureCookieSessionInterface
+from ghost_db import MAX_ASSET_CHANGES_PER_PAGE, ConnectionPool, WriteQueue, WriteQueueFull, read_asset_changes, read_chain_stats, reindex_chain_stats, run_migrations
+from ghost_blobstore import BlobSpool, BlobStore, BlobTooLarge
+import ghost_search
+from ghost_miner import MiningEngine
+from ghost_net import OutboundPool, SeenFilter
+from ghost_mempool import Mempool
+from ghost_snapshot import SnapshotPublisher, latest_manifest, snapshot_name
+from ghost_chain import (MAX_HEADERS_PER_PAGE, BlockValidator, ForkChoice, SyncScheduler, block_hash_at, build_locator, clamp_block_range, committed_root,
+                         disconnect_blocks, hash_block, headers_since, iter_blocks_binary, iter_blocks_ndjson, parse_locator, reward_tx_id, time_left)
+from ghost_wire import BINARY_MIME, encode_headers_page, wants_binary
+from ghost_merkle import block_root, tx_proof, tx_root
 
 # --- YARDIMCI FONKSİYONLAR / HELPER FUNCTIONS ---
 def generate_user_keys(username):
@@ -69,6 +83,70 @@ TOTAL_SUPPLY = 100000000.0
 INITIAL_BLOCK_REWARD = 50.0 
 HALVING_INTERVAL = 2000
 DB_FILE = os.path.join(os.getcwd(), "ghost_cloud_v2.db") 
+# TR: Varlık içerikleri için içerik adresli depo dizini
+# EN: Content-addressed store directory for asset contents
+BLOB_DIR = os.path.join(os.getcwd(), "ghost_blobs")
+# TR: Tek dosya yükleme kotası ve okuma parça boyutu
+# EN: Per-file upload quota and read chunk size
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# TR: Çok parçalı gövdede dosya dışındaki alanlar ve sınırlar için pay
+# EN: Allowance for the non-file fields and boundaries in a multipart body
+UPLOAD_FORM_ALLOWANCE = 1024 * 1024
+# TR: Varlık yanıtları için önbellek süresi (içerik düzenlenebilir; ETag ile yeniden doğrulanır)
+# EN: Cache lifetime for asset responses (content is editable; revalidated via ETag)
+ASSET_CACHE_MAX_AGE = 300
+SEARCH_PAGE_SIZE = 20
+# TR: PoW arayan süreç sayısı (varsayılan: tüm çekirdekler)
+# EN: Number of processes searching for PoW (default: all cores)
+MINING_WORKERS = os.cpu_count() or 1
+# TR: Eşten gelen blok aralıklarında PoW doğrulayan süreç sayısı
+# EN: Number of processes verifying PoW for block ranges from peers
+VALIDATION_WORKERS = os.cpu_count() or 1
+# TR: Çatal seçimi: kabul edilen en derin yeniden düzenleme ve bellekteki yan dalların ömrü (sn)
+# EN: Fork choice: deepest reorg accepted and the lifetime of in-memory side branches (s)
+MAX_REORG_BLOCKS = 5000
+SIDE_BRANCH_TTL = 600
+# TR: Biten madencilik işlerinin durum sorgusu için veritabanında tutulma süresi
+# EN: How long finished mining jobs stay in the database for status polling
+MINING_JOB_TTL = 3600
+# TR: Madencilik işleri: ilerleme yazma / iptal okuma aralığı, sıradaki işin yoklama aralığı ve sahibi ölmüş sayılma süresi (sn)
+# EN: Mining jobs: progress write / cancel check interval, poll interval of a queued job and when its owner counts as dead (s)
+MINING_JOB_HEARTBEAT = 2
+MINING_QUEUE_POLL = 1
+MINING_JOB_STALE = 60
+# TR: Senkronizasyon: eşzamanlı eş isteği sayısı, tur süresi sınırı (sn) ve eşler arasında bölünen blok parçası boyutu
+# EN: Sync: concurrent peer requests, round deadline (s) and the block chunk size split across peers
+SYNC_PARALLELISM = 8
+SYNC_ROUND_DEADLINE = 45
+SYNC_CHUNK_BLOCKS = 250
+# TR: Giden yayınlar: işçi sayısı, kuyruk kapasitesi ve kuyruk doluyken bekleme süresi (sn)
+# EN: Outbound gossip: worker count, queue capacity and how long to wait while the queue is full (s)
+OUTBOUND_WORKERS = 8
+OUTBOUND_QUEUE_SIZE = 10000
+OUTBOUND_PUT_TIMEOUT = 1.0
+# TR: Toplu yayın: eş başına biriktirme süresi (sn) ve bir istekteki en fazla öğe; gelen toplu isteklerin üst sınırı
+# EN: Batched gossip: per-peer coalescing window (s) and max items per request; the cap for inbound batches
+GOSSIP_BATCH_WINDOW = 0.05
+GOSSIP_BATCH_MAX_ITEMS = 500
+MAX_INBOUND_BATCH = 1000
+# TR: Görülmüş-kimlik filtresi (işlem ve mesaj için ayrı): kesin LRU boyutu, Bloom kapasitesi ve hedef yanlış pozitif oranı
+# EN: Seen-ID filter (separate for transactions and messages): exact LRU size, Bloom capacity and target false-positive rate
+SEEN_LRU_SIZE = 100000
+SEEN_BLOOM_CAPACITY = 1000000
+SEEN_BLOOM_FP_RATE = 0.001
+# TR: Mempool: blok başına en fazla işlem, blok başına gönderen sınırı, bellekteki en fazla işlem ve bayatlama süresi (sn)
+# EN: Mempool: max transactions per block, per-sender cap per block, max transactions in memory and staleness TTL (s)
+MAX_BLOCK_TXS = 1000
+MAX_BLOCK_TXS_PER_SENDER = 100
+MEMPOOL_MAX_TXS = 50000
+MEMPOOL_TX_TTL = 259200
+# TR: Durum anlık görüntüleri: dizin, kaç blokta bir üretileceği, saklanan dosya sayısı ve kontrol aralığı (sn)
+# EN: State snapshots: directory, how many blocks between snapshots, files kept and check interval (s)
+SNAPSHOT_DIR = os.path.join(os.getcwd(), "ghost_snapshots")
+SNAPSHOT_EVERY_BLOCKS = 100
+SNAPSHOT_KEEP = 2
+SNAPSHOT_CHECK_INTERVAL = 600
 GHOST_PORT = 5000
 UDP_BROADCAST_PORT = 5001 
 DOMAIN_EXPIRY_SECONDS = 15552000 
@@ -79,6 +157,16 @@ MESSAGE_FEE = 0.00001
 INVITE_FEE = 0.00001
 CONTRACT_DEPLOY_FEE = 2.0         
 CONTRACT_CALL_FEE = 0.001         
+# TR: SQLite bağlantı katmanı ayarları
+# EN: SQLite connection layer settings
+DB_READ_POOL_SIZE = 8
+DB_CACHE_SIZE_KB = 32768
+DB_MMAP_SIZE = 512 * 1024 * 1024
+# TR: Gelen gossip yazmaları için grup commit (her N ms veya M satırda bir işlem)
+# EN: Group commit for inbound gossip writes (one transaction every N ms or M rows)
+GOSSIP_WRITE_QUEUE_SIZE = 10000
+GOSSIP_WRITE_BATCH_ROWS = 500
+GOSSIP_WRITE_BATCH_MS = 20
 
 # TR: Ağ gelirlerinin birikeceği Hazine Cüzdanı Adresi
 # EN: Treasury Wallet Address where network revenues will accumulate
@@ -91,6 +179,9 @@ app.secret_key = 'cloud_super_secret_permanency_fix_2024_FINAL_FULL_V21'
 app.permanent_session_lifetime = timedelta(days=7) 
 app.config['SESSION_COOKIE_SECURE'] = False 
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax' 
+# TR: Form alanları için küçük bir pay; daha büyük gövdeler okunmadan 413 ile reddedilir
+# EN: Small allowance for form fields; larger bodies are rejected with 413 before being read
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + UPLOAD_FORM_ALLOWANCE
 
 # --- ÇOKLU DİL SÖZLÜĞÜ / LANGUAGES ---
 LANGUAGES = {
@@ -105,7 +196,7 @@ LANGUAGES = {
         'media_info': "Desteklenen: .png, .jpg, .css, .js, .woff, .mp4, .mp3", 'register_btn': "Yayınla", 
         'search_title': "🔍 Ghost Arama", 'edit': "Düzenle", 'delete': "Sil",
         'login_prompt': "Giriş Yap", 'username': "Kullanıcı Adı", 'password': "Şifre", 'submit': "Gönder",
-        'asset_fee': "Ücret", 'asset_expires': "Süre Sonu", 'mine_success': "Blok Başarılı", 
+        'asset_fee': "Ücret", 'asset_expires': "Süre Sonu", 'mine_success': "Blok Başarılı", 'mine_running': "Madencilik sürüyor", 'mine_queued': "Sırada bekliyor", 'mine_cancel': "İptal", 'mine_eta': "Tahmini süre", 'mine_cancelled': "Madencilik iptal edildi", 'mine_job_active': "Bu cüzdan için zaten bir madencilik işi çalışıyor.", 
         'mine_message': "Yeni blok bulundu: {{ block_hash }}. Ödül: {{ reward }} GHOST.",
         'mine_limit_error': "Günlük limit dolmadı.", 'wallet_address': "Cüzdan Adresi", 'last_transactions': "Son İşlemler", 
         'tx_id': "İşlem ID", 'tx_sender': "Gönderen", 'tx_recipient': "Alıcı", 'tx_amount': "Miktar", 'tx_timestamp': "Zaman",
@@ -136,7 +227,7 @@ LANGUAGES = {
         'media_info': "Supported: .png, .jpg, .css, .js, .woff, .mp4, .mp3", 'register_btn': "Publish", 
         'search_title': "🔍 Search", 'edit': "Edit", 'delete': "Delete",
         'login_prompt': "Login", 'username': "Username", 'password': "Password", 'submit': "Submit",
-        'asset_fee': "Fee", 'asset_expires': "Expires", 'mine_success': "Block Mined", 
+        'asset_fee': "Fee", 'asset_expires': "Expires", 'mine_success': "Block Mined", 'mine_running': "Mining in progress", 'mine_queued': "Queued", 'mine_cancel': "Cancel", 'mine_eta': "ETA", 'mine_cancelled': "Mining cancelled", 'mine_job_active': "A mining job is already running for this wallet.", 
         'mine_message': "Block found: {{ block_hash }}. Reward: {{ reward }} GHOST.",
         'mine_limit_error': "Daily limit not reached.", 'wallet_address': "Address", 'last_transactions': "Transactions", 
         'tx_id': "Tx ID", 'tx_sender': "Sender", 'tx_recipient': "Recipient", 'tx_amount': "Amount", 'tx_timestamp': "Time",
@@ -167,7 +258,7 @@ LANGUAGES = {
         'media_info': "Поддержка: .png, .jpg, .css, .js, .woff, .mp4, .mp3", 'register_btn': "Опубликовать", 
         'search_title': "🔍 Поиск", 'edit': "Правка", 'delete': "Удалить",
         'login_prompt': "Вход", 'username': "Имя", 'password': "Пароль", 'submit': "Отправить",
-        'asset_fee': "Плата", 'asset_expires': "Срок", 'mine_success': "Блок найден", 
+        'asset_fee': "Плата", 'asset_expires': "Срок", 'mine_success': "Блок найден", 'mine_running': "Идёт майнинг", 'mine_queued': "В очереди", 'mine_cancel': "Отмена", 'mine_eta': "Осталось", 'mine_cancelled': "Майнинг отменён", 'mine_job_active': "Для этого кошелька уже идёт майнинг.", 
         'mine_message': "Блок: {{ block_hash }}. Награда: {{ reward }} GHOST.",
         'mine_limit_error': "Лимит не истек.", 'wallet_address': "Адрес", 'last_transactions': "Транзакции", 
         'tx_id': "ID", 'tx_sender': "Отпр.", 'tx_recipient': "Получ.", 'tx_amount': "Сумма", 'tx_timestamp': "Время",
@@ -198,7 +289,7 @@ LANGUAGES = {
         'media_info': "Աջակցվում է՝ .png, .jpg, .css, .js, .woff, .mp4, .mp3", 'register_btn': "Հրապարակել", 
         'search_title': "🔍 Որոնում", 'edit': "Խմբ.", 'delete': "Ջնջել",
         'login_prompt': "Մուտք", 'username': "Անուն", 'password': "Գաղտնաբառ", 'submit': "Ուղարկել",
-        'asset_fee': "Վճար", 'asset_expires': "Ժամկետ", 'mine_success': "Բլոկ", 
+        'asset_fee': "Վճար", 'asset_expires': "Ժամկետ", 'mine_success': "Բլոկ", 'mine_running': "Մայնինգն ընթացքում է", 'mine_queued': "Հերթում է", 'mine_cancel': "Չեղարկել", 'mine_eta': "Մնաց", 'mine_cancelled': "Մայնինգը չեղարկվեց", 'mine_job_active': "Այս դրամապանակի համար մայնինգն արդեն ընթացքում է:", 
         'mine_message': "Բլոկ: {{ block_hash }}. Պարգև: {{ reward }} GHOST.",
         'mine_limit_error': "Սահմանաչափ:", 'wallet_address': "Հասցե", 'last_transactions': "Գործարքներ", 
         'tx_id': "ID", 'tx_sender': "Ուղարկող", 'tx_recipient': "Ստացող", 'tx_amount': "Գումար", 'tx_timestamp': "Ժամանակ",
@@ -222,14 +313,29 @@ LANGUAGES = {
 
 # --- VERİTABANI YÖNETİCİSİ / DATABASE MANAGER ---
 class DatabaseManager:
-    def __init__(self, db_file):
+    def __init__(self, db_file, blob_store):
         self.db_file = db_file
+        self.blob_store = blob_store
+        self.pool = ConnectionPool(db_file, read_pool_size=DB_READ_POOL_SIZE, cache_size_kb=DB_CACHE_SIZE_KB, mmap_size=DB_MMAP_SIZE)
         self.init_db()
+        self.write_queue = WriteQueue(self.pool, max_pending=GOSSIP_WRITE_QUEUE_SIZE,
+                                      batch_rows=GOSSIP_WRITE_BATCH_ROWS, batch_ms=GOSSIP_WRITE_BATCH_MS)
 
     def get_connection(self):
-        conn = sqlite3.connect(self.db_file, check_same_thread=False, timeout=20) 
-        conn.row_factory = sqlite3.Row
-        return conn
+        # TR: İş parçacığına ait kalıcı yazma bağlantısı (close() havuza iade eder)
+        # EN: Thread-owned persistent write connection (close() returns it to the pool)
+        return self.pool.get_connection()
+
+    def get_read_connection(self):
+        return self.pool.get_read_connection()
+
+    def write(self):
+        return self.pool.write()
+
+    def submit_write(self, func, *args, wait=False, timeout=None, on_commit=None):
+        # TR: Tek yazar kuyruğu; wait=True COMMIT'e kadar bekler, kuyruk doluysa WriteQueueFull. on_commit sadece COMMIT'ten sonra çalışır
+        # EN: Single-writer queue; wait=True blocks until COMMIT, raises WriteQueueFull when full. on_commit runs only after COMMIT
+        return self.write_queue.submit(func, *args, wait=wait, timeout=timeout, on_commit=on_commit)
 
     def init_db(self):
         conn = self.get_connection()
@@ -277,8 +383,12 @@ class DatabaseManager:
         conn.commit()
         conn.close()
 
+        # TR: Şema göçleri (indeksler vb.) mevcut dosyaları yerinde yükseltir
+        # EN: Schema migrations (indexes etc.) upgrade existing files in place
+        run_migrations(self.pool, context={'blob_store': self.blob_store, 'treasury_key': TREASURY_WALLET_KEY, 'merkle_backfill': True})
+
     def get_fee(self, fee_type):
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         res = conn.execute("SELECT amount FROM network_fees WHERE fee_type = ?", (fee_type,)).fetchone()
         conn.close()
         return float(res['amount']) if res else 0.0
@@ -361,7 +471,7 @@ class SmartContractManager:
         finally: conn.close()
 
     def get_user_contracts(self, user_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         res = conn.execute("SELECT contract_address, creation_time FROM contracts WHERE owner_key=?",(user_key,)).fetchall()
         conn.close()
         return [dict(x) for x in res]
@@ -371,6 +481,7 @@ class MessengerManager:
         self.db = db_mgr
         self.chain_mgr = blockchain_mgr
         self.mesh_mgr = mesh_mgr
+        self.seen = SeenFilter(SEEN_LRU_SIZE, SEEN_BLOOM_CAPACITY, SEEN_BLOOM_FP_RATE)
 
     def send_invite(self, sender_key, friend_username):
         fee = self.db.get_fee('invite_fee')
@@ -424,23 +535,53 @@ class MessengerManager:
             conn.commit()
             
             msg_data = {'type': 'message', 'msg_id': msg_id, 'sender': sender_key, 'recipient': recipient_key, 'content': encrypted_content, 'asset_id': asset_id, 'timestamp': timestamp}
+            self.seen.add(msg_id)
             self.mesh_mgr.broadcast_message(msg_data)
             return True, "Message Sent."
         finally: conn.close()
 
-    def receive_message(self, msg_data):
-        conn = self.db.get_connection()
-        try:
-            exists = conn.execute("SELECT msg_id FROM messages WHERE msg_id = ?", (msg_data['msg_id'],)).fetchone()
-            if not exists:
-                conn.execute("INSERT INTO messages (msg_id, sender, recipient, content, asset_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
-                             (msg_data['msg_id'], msg_data['sender'], msg_data['recipient'], msg_data['content'], msg_data['asset_id'], msg_data['timestamp']))
-                conn.commit()
-        except: pass
-        finally: conn.close()
+    def receive_message(self, msg_data, wait=False):
+        # TR: Bilinen tekrarlar yazma kuyruğuna hiç girmez
+        # EN: Known duplicates never enter the write queue
+        if self.seen.is_duplicate(msg_data.get('msg_id')): return False
+        stored = []
+        return self.db.submit_write(self._apply_message, msg_data, stored, wait=wait, on_commit=lambda _: self._mark_seen(stored))
+
+    def receive_messages(self, msgs, wait=False):
+        msgs = [m for m in msgs if not (isinstance(m, dict) and self.seen.is_duplicate(m.get('msg_id')))]
+        if not msgs: return 0
+        stored = []
+        return self.db.submit_write(self._apply_messages, msgs, stored, wait=wait, on_commit=lambda _: self._mark_seen(stored))
+
+    def _mark_seen(self, msg_ids):
+        # TR: Kimlikler ancak COMMIT'ten sonra filtreye girer; geri alınan bir yazma, tekrar gönderimlerin düşmesine yol açmaz
+        # EN: Ids enter the filter only after COMMIT; a rolled-back write does not cause retransmissions to be dropped
+        for msg_id in msg_ids: self.seen.add(msg_id)
+
+    def _apply_messages(self, conn, msgs, stored):
+        applied = 0
+        for msg_data in msgs:
+            if not isinstance(msg_data, dict) or msg_data.get('type') != 'message': continue
+            try: applied += bool(self._apply_message(conn, msg_data, stored))
+            except (KeyError, TypeError): pass
+        return applied
+
+    def _apply_message(self, conn, msg_data, stored):
+        # TR: Bloom negatifse SELECT atlanır; pozitifse DB doğrular (yoksa yanlış pozitif). Bulunan/yazılan kimlik stored'a eklenir
+        # EN: On a Bloom negative the SELECT is skipped; on a positive the DB confirms (absent = false positive). The id found/written goes to stored
+        msg_id = msg_data['msg_id']
+        if self.seen.might_contain(msg_id):
+            if conn.execute("SELECT msg_id FROM messages WHERE msg_id = ?", (msg_id,)).fetchone():
+                stored.append(msg_id)
+                return False
+            self.seen.record_false_positive()
+        cur = conn.execute("INSERT OR IGNORE INTO messages (msg_id, sender, recipient, content, asset_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                           (msg_id, msg_data['sender'], msg_data['recipient'], msg_data['content'], msg_data.get('asset_id'), msg_data['timestamp']))
+        stored.append(msg_id)
+        return cur.rowcount > 0
 
     def get_messages(self, user_key, friend_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         msgs = conn.execute("SELECT * FROM messages WHERE (sender = ? AND recipient = ?) OR (sender = ? AND recipient = ?) ORDER BY timestamp ASC",
                             (user_key, friend_key, friend_key, user_key)).fetchall()
         conn.close()
@@ -453,7 +594,7 @@ class MessengerManager:
         return decoded_msgs
 
     def get_friends(self, user_key):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         friends = conn.execute("SELECT f.friend_key, u.username FROM friends f JOIN users u ON f.friend_key = u.wallet_public_key WHERE f.user_key = ?", (user_key,)).fetchall()
         conn.close()
         return [dict(f) for f in friends]
@@ -461,19 +602,89 @@ class MessengerManager:
 class AssetManager:
     def __init__(self, db_manager):
         self.db = db_manager
+        self.blobs = db_manager.blob_store
+
+    def blob_path(self, asset):
+        # TR: İçerik diskte; satırda sadece content_hash var
+        # EN: Content lives on disk; the row only carries content_hash
+        if not asset or not asset['content_hash']: return None
+        return self.blobs.path(asset['content_hash'])
+
+    def read_content(self, asset):
+        path = self.blob_path(asset)
+        if not path or not os.path.exists(path): return b""
+        with open(path, 'rb') as f: return f.read()
+
+    def _release_blob(self, conn, content_hash):
+        if not content_hash: return
+        still_used = conn.execute("SELECT 1 FROM assets WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone()
+        self.blobs.delete_if_orphan(content_hash, referenced=bool(still_used))
         
+    def sweep_orphan_blobs(self):
+        conn = self.db.get_read_connection()
+        try: referenced = {r['content_hash'] for r in conn.execute("SELECT DISTINCT content_hash FROM assets WHERE content_hash IS NOT NULL").fetchall()}
+        finally: conn.close()
+        return self.blobs.sweep(referenced)
+
+    def upload_limit(self, owner_key):
+        # TR: Bakiyenin karşılayabileceği en büyük boyut; kota ile birlikte üst sınırı belirler. Kullanıcı yoksa None
+        # EN: Largest size the balance can pay for; together with the quota it sets the cap. None if the user does not exist
+        rate = self.db.get_fee('storage_mb')
+        conn = self.db.get_read_connection()
+        user = conn.execute("SELECT balance FROM users WHERE wallet_public_key = ?", (owner_key,)).fetchone()
+        conn.close()
+        if not user: return None
+        limit = MAX_UPLOAD_BYTES
+        if rate > 0: limit = min(limit, int(float(user['balance']) / rate * 1024 * 1024))
+        return limit
+
+    def _too_large(self, limit):
+        if limit < MAX_UPLOAD_BYTES: return f"Low Balance ({round(limit / (1024 * 1024), 4)} MB max)"
+        return f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)"
+
+    def precheck_upload(self, owner_key, content_length):
+        """
+        TR: Gövde okunmadan (request.files'a dokunmadan) Content-Length kota ve bakiyeyle karşılaştırılır; hata mesajı veya None.
+            Uzunluk bilinmiyorsa (chunked) kontrol yüklemeden sonra _ingest_file'da yapılır.
+        EN: Content-Length is checked against the quota and balance before the body is read (before touching request.files);
+            returns an error message or None. With no known length (chunked) the check happens after the upload in _ingest_file.
+        """
+        if not content_length: return None
+        limit = self.upload_limit(owner_key)
+        if limit is None: return "User not found."
+        if content_length > limit + UPLOAD_FORM_ALLOWANCE: return self._too_large(limit)
+        return None
+
+    def _ingest_file(self, owner_key, file_storage):
+        limit = self.upload_limit(owner_key)
+        if limit is None: return False, "User not found."
+        stream = getattr(file_storage, 'stream', file_storage)
+        try:
+            # TR: Form ayrıştırıcısı dosyayı zaten deponun tmp dizinine yazdı (GhostRequest); yeniden kopyalanmadan alınır
+            # EN: The form parser already wrote the file into the store's tmp directory (GhostRequest); it is taken without another copy
+            if isinstance(stream, BlobSpool): return True, self.blobs.put_spool(stream, max_bytes=limit)
+            try: stream.seek(0)
+            except Exception: pass
+            return True, self.blobs.put_file(stream, max_bytes=limit, chunk_size=UPLOAD_CHUNK_SIZE)
+        except BlobTooLarge: return False, self._too_large(limit)
+
     def register_asset(self, owner_key, asset_type, name, content, is_file=False):
         if asset_type == 'domain' and not name.endswith('.ghost'): name += '.ghost'
         if not content and asset_type == 'domain': content = "<h1>New Ghost Site</h1>"
 
+        keywords = ""
         if is_file:
-            content.seek(0)
-            content_bytes = content.read()
+            # TR: Yükleme parça parça diske akıtılır; kota veya bakiye aşılınca okuma hemen kesilir
+            # EN: The upload is streamed to disk in chunks; reading stops as soon as quota or balance is exceeded
+            success, res = self._ingest_file(owner_key, content)
+            if not success: return False, res
+            content_hash, size = res
         else:
             content_bytes = content.encode('utf-8')
             keywords = extract_keywords(content) if asset_type == 'domain' else ""
-            
-        size = len(content_bytes)
+            size = len(content_bytes)
+            content_hash = None
+
         fee = self.db.get_fee('domain_reg') if asset_type == 'domain' else (size / (1024*1024)) * self.db.get_fee('storage_mb')
 
         conn = self.db.get_connection()
@@ -484,8 +695,11 @@ class AssetManager:
              return False, f"Low Balance ({fee} GHOST)"
 
         try:
-            conn.execute("INSERT OR REPLACE INTO assets (asset_id, owner_pub_key, type, name, content, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                         (str(uuid4()), owner_key, asset_type, name, content_bytes, size, time.time(), time.time() + DOMAIN_EXPIRY_SECONDS, keywords))
+            if content_hash is None: content_hash = self.blobs.put_bytes(content_bytes)
+            asset_id = str(uuid4())
+            conn.execute("INSERT OR REPLACE INTO assets (asset_id, owner_pub_key, type, name, content, content_hash, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)",
+                         (asset_id, owner_key, asset_type, name, content_hash, size, time.time(), time.time() + DOMAIN_EXPIRY_SECONDS, keywords))
+            ghost_search.index_asset(conn, asset_id, name, keywords, asset_type, None if is_file else content_bytes)
             
             # TR: Ücreti kullanıcıdan al, Hazineye ekle
             # EN: Take fee from user, add to Treasury
@@ -504,9 +718,14 @@ class AssetManager:
         try:
             keywords = extract_keywords(new_content)
             content_bytes = new_content.encode('utf-8')
-            conn.execute("UPDATE assets SET content = ?, keywords = ? WHERE asset_id = ? AND owner_pub_key = ?", 
-                         (content_bytes, keywords, asset_id, owner_key))
+            old = conn.execute("SELECT content_hash FROM assets WHERE asset_id = ? AND owner_pub_key = ?", (asset_id, owner_key)).fetchone()
+            content_hash = self.blobs.put_bytes(content_bytes)
+            conn.execute("UPDATE assets SET content = NULL, content_hash = ?, storage_size = ?, keywords = ? WHERE asset_id = ? AND owner_pub_key = ?", 
+                         (content_hash, len(content_bytes), keywords, asset_id, owner_key))
+            row = conn.execute("SELECT name, type FROM assets WHERE asset_id = ? AND owner_pub_key = ?", (asset_id, owner_key)).fetchone()
+            if row: ghost_search.index_asset(conn, asset_id, row['name'], keywords, row['type'], content_bytes)
             conn.commit()
+            if old and old['content_hash'] != content_hash: self._release_blob(conn, old['content_hash'])
             return True, "Updated."
         except Exception as e: return False, str(e)
         finally: conn.close()
@@ -514,25 +733,37 @@ class AssetManager:
     def delete_asset(self, asset_id, owner_key):
         conn = self.db.get_connection()
         try:
+            old = conn.execute("SELECT content_hash FROM assets WHERE asset_id = ? AND owner_pub_key = ?", (asset_id, owner_key)).fetchone()
             conn.execute("DELETE FROM assets WHERE asset_id = ? AND owner_pub_key = ?", (asset_id, owner_key))
+            if old: ghost_search.remove_asset(conn, asset_id)
             conn.commit()
+            if old: self._release_blob(conn, old['content_hash'])
             return True, "Deleted."
         except Exception as e: return False, str(e)
         finally: conn.close()
 
     def get_all_assets_meta(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         assets = conn.execute("SELECT asset_id, owner_pub_key, type, name, creation_time FROM assets").fetchall()
         conn.close()
         return [dict(a) for a in assets]
 
-    def get_asset_by_id(self, asset_id):
-        conn = self.db.get_connection()
+    def get_changes(self, since=0, limit=MAX_ASSET_CHANGES_PER_PAGE):
+        # TR: Tetikleyicilerin tuttuğu değişiklik günlüğünden bir sayfa; kayıt, güncelleme ve silme hepsi görünür
+        # EN: One page of the trigger-maintained change log; registrations, updates and deletes all show up
+        conn = self.db.get_read_connection()
+        try: return read_asset_changes(conn, since, limit)
+        finally: conn.close()
+
+    def get_asset_by_id(self, asset_id, with_content=True):
+        conn = self.db.get_read_connection()
         asset = conn.execute("SELECT * FROM assets WHERE asset_id = ?", (asset_id,)).fetchone()
         conn.close()
         if asset:
             d = dict(asset)
-            d['content'] = base64.b64encode(d['content']).decode('utf-8')
+            # TR: Eski eşler için base64 içerik; yeni eşler with_content=False ile /api/blob üzerinden akış alır
+            # EN: base64 content for old peers; new peers pass with_content=False and stream via /api/blob
+            d['content'] = base64.b64encode(self.read_content(asset)).decode('utf-8') if with_content else None
             return d
         return None
 
@@ -540,9 +771,11 @@ class AssetManager:
         conn = self.db.get_connection()
         try:
             content_bytes = base64.b64decode(asset_data['content'])
-            conn.execute("INSERT OR IGNORE INTO assets (asset_id, owner_pub_key, type, name, content, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                         (asset_data['asset_id'], asset_data['owner_pub_key'], asset_data['type'], asset_data['name'], content_bytes, 
+            content_hash = self.blobs.put_bytes(content_bytes)
+            cur = conn.execute("INSERT OR IGNORE INTO assets (asset_id, owner_pub_key, type, name, content, content_hash, storage_size, creation_time, expiry_time, keywords) VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, ?)",
+                         (asset_data['asset_id'], asset_data['owner_pub_key'], asset_data['type'], asset_data['name'], content_hash, 
                           len(content_bytes), asset_data['creation_time'], asset_data['expiry_time'], asset_data.get('keywords', '')))
+            if cur.rowcount: ghost_search.index_asset(conn, asset_data['asset_id'], asset_data['name'], asset_data.get('keywords', ''), asset_data['type'], content_bytes)
             conn.commit()
         except: pass
         finally: conn.close()
@@ -551,19 +784,27 @@ class BlockchainManager:
     def __init__(self, db_manager):
         self.db = db_manager
         self.mesh_mgr = None 
+        self.miner = MiningEngine(MINING_WORKERS)
+        self.validator = BlockValidator(BASE_DIFFICULTY, VALIDATION_WORKERS)
+        self.fork_choice = ForkChoice(self.validator, MAX_REORG_BLOCKS, SIDE_BRANCH_TTL)
+        self.seen_tx = SeenFilter(SEEN_LRU_SIZE, SEEN_BLOOM_CAPACITY, SEEN_BLOOM_FP_RATE)
+        self.mempool = Mempool(MAX_BLOCK_TXS, MAX_BLOCK_TXS_PER_SENDER, MEMPOOL_MAX_TXS, MEMPOOL_TX_TTL)
+        conn = self.db.get_read_connection()
+        try: self.mempool.load(conn)
+        finally: conn.close()
 
     def set_mesh_manager(self, mgr):
         self.mesh_mgr = mgr
 
     def get_last_block(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         block = conn.execute("SELECT * FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
         conn.close()
         return dict(block)
 
     def get_statistics(self):
-        conn = self.db.get_connection()
-        mined_supply = conn.execute("SELECT SUM(amount) FROM transactions WHERE sender = 'GhostProtocol_System'").fetchone()[0] or 0.0
+        conn = self.db.get_read_connection()
+        mined_supply = read_chain_stats(conn)['circulating_supply']
         last_block = conn.execute("SELECT * FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
         current_block_index = last_block['block_index']
         halvings = current_block_index // HALVING_INTERVAL
@@ -580,89 +821,192 @@ class BlockchainManager:
         }
 
     def get_all_headers(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         headers = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index ASC").fetchall()
         conn.close()
         return [dict(h) for h in headers]
 
     def get_block_by_hash(self, block_hash):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         block = conn.execute("SELECT * FROM blocks WHERE block_hash = ?", (block_hash,)).fetchone()
         conn.close()
         return dict(block) if block else None
 
-    def add_block_from_peer(self, block_data):
-        conn = self.db.get_connection()
+    def add_block_from_peer(self, block_data, wait=True):
+        # TR: Senkronizasyon döngüsü sonucu kullandığı için varsayılan olarak COMMIT beklenir
+        # EN: Waits for COMMIT by default because the sync loop uses the result
+        return self.add_blocks_from_peer([block_data], wait=wait) == 1
+
+    def add_blocks_from_peer(self, blocks, wait=True):
+        """
+        TR: Aralık önce doğrulanır ve çatal seçimiyle sınıflanır (yazma kilidi dışında); sadece geçerli önek tek bir yazma işinde
+            (tek işlem) uygulanır. Daha ağır bir dal yerel blokları geri alıp yerine bağlanır (reorg, her zaman beklenir).
+            Kabul edilen (zaten bilinen + yeni, yan dala alınanlar dahil) blok sayısı döner.
+        EN: The range is validated and classified by fork choice first (outside the write lock); only the valid prefix is applied
+            as one write item (one transaction). A heavier branch disconnects the local blocks and is connected in their place
+            (reorg, always waited for). Returns the number of blocks accepted (already known + new, side branch blocks included).
+        """
+        if not blocks: return 0
+        conn = self.db.get_read_connection()
+        try: plan = self.fork_choice.plan(conn, blocks)
+        finally: conn.close()
+        if plan['action'] in ('none', 'side'): return plan['accepted']
         try:
-            cursor = conn.execute("INSERT OR IGNORE INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key) VALUES (?,?,?,?,?,?)",
-                         (block_data['block_index'], block_data['timestamp'], block_data['previous_hash'], block_data['block_hash'], block_data['proof'], block_data['miner_key']))
-            if cursor.rowcount > 0:
-                index = block_data['block_index']
-                pending_txs = conn.execute("SELECT tx_id, sender, recipient, amount FROM transactions WHERE block_index = 0 OR block_index IS NULL").fetchall()
-                for p_tx in pending_txs:
-                    conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (p_tx['amount'], p_tx['recipient']))
-                    conn.execute("UPDATE transactions SET block_index = ? WHERE tx_id = ?", (index, p_tx['tx_id']))
-
-                reward = self.calculate_block_reward(index)
-                tx_id_reward = str(uuid4()) 
-                conn.execute("INSERT INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (?, ?, ?, ?, ?, ?)",
-                             (tx_id_reward, "GhostProtocol_System", block_data['miner_key'], reward, block_data['timestamp'], index))
-                conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (reward, block_data['miner_key']))
-            conn.commit()
-            return True
-        except: return False
+            if plan['action'] == 'reorg':
+                confirmed, unconfirmed, removed = self.db.submit_write(self._reorg_to_branch, plan, wait=True)
+                # TR: Bellek içi durum sadece COMMIT'ten sonra değişir; geri alınan bir reorg mempool'u ve istatistikleri bozmaz
+                # EN: In-memory state changes only after COMMIT; a rolled-back reorg leaves the mempool and the stats untouched
+                self.mempool.restore(unconfirmed)
+                self.mempool.remove(confirmed)
+                self.fork_choice.record_reorg(plan['ancestor'], removed, len(plan['blocks']))
+            else:
+                confirmed = self.db.submit_write(self._apply_peer_blocks, plan['blocks'], wait=wait)
+                if wait: self.mempool.remove(confirmed)
+            return plan['accepted']
+        except Exception as e:
+            logger.warning(f"Block range rejected: {e}")
+            return plan['known']
+
+    def _reorg_to_branch(self, conn, plan):
+        # TR: Plan okunduktan sonra uç değiştiyse hiçbir şey yazılmaz. Geri alınan işlemler yeni dalın seçimine mempool'a dokunmadan
+        #     (öne eklenen adaylar olarak) girer; (onaylananlar, bekleyene dönenler, silinen blok sayısı) döner, mempool'u çağıran günceller
+        # EN: Nothing is written if the tip changed after the plan was read. Rolled-back transactions enter the new branch's selection
+        #     without touching the mempool (as candidates in front); returns (confirmed, back to pending, blocks removed), the caller updates the mempool
+        tip = conn.execute("SELECT block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+        if tip['block_hash'] != plan['tip_hash'] or block_hash_at(conn, plan['ancestor']) != plan['blocks'][0]['previous_hash']:
+            raise ValueError("tip changed before reorg")
+        removed, unconfirmed = disconnect_blocks(conn, plan['ancestor'])
+        confirmed = self._apply_peer_blocks(conn, plan['blocks'], extra=unconfirmed)
+        return confirmed, unconfirmed, removed
+
+    def _apply_peer_blocks(self, conn, blocks, extra=()):
+        # TR: Doğrulamadan bu yana uç değiştiyse (ebeveyn artık uç değilse) aralık yazılmaz
+        # EN: If the tip changed since validation (the parent is no longer the tip) the range is not written
+        tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+        if tip['block_index'] != blocks[0]['block_index'] - 1 or tip['block_hash'] != blocks[0]['previous_hash']: raise ValueError("parent changed before commit")
+        # TR: Aynı aralıktaki bloklar aynı işlemleri iki kez seçmesin diye seçilenler atlanır
+        # EN: Already selected ids are skipped so blocks in one range never select the same transactions twice
+        self._refresh_mempool()
+        confirmed, taken = [], set()
+        for block_data in blocks:
+            ids = self._apply_peer_block(conn, block_data, taken, extra)
+            confirmed.extend(ids)
+            taken.update(ids)
+        return confirmed
+
+    def _refresh_mempool(self):
+        # TR: Sadece kesinleşmiş yeni satırlar okunur (ayrı okuma bağlantısı)
+        # EN: Only committed new rows are read (separate read connection)
+        conn = self.db.get_read_connection()
+        try: self.mempool.refresh(conn)
         finally: conn.close()
 
-    def hash_block(self, index, timestamp, previous_hash, proof, miner_key):
-        block_string = json.dumps({'index': index, 'timestamp': timestamp, 'previous_hash': previous_hash, 'proof': proof, 'miner': miner_key}, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
-
-    def proof_of_work(self, last_proof, difficulty):
-        proof = 0
-        while True:
-            guess = f'{last_proof}{proof}'.encode()
-            if hashlib.sha256(guess).hexdigest()[:difficulty] == '0' * difficulty: return proof
-            proof += 1
+    def _confirm_pending(self, conn, index, skip=None):
+        """
+        TR: Mempool'dan en fazla MAX_BLOCK_TXS işlem seçip bloğa bağlar; maliyet O(seçilen).
+            UPDATE bekleyen koşuluyla korunur: bu arada onaylanmış veya hiç kesinleşmemiş kayıt alıcıya yazılmaz.
+            Seçilen tx_id'ler döner; çağıran COMMIT'ten sonra mempool'dan siler.
+        EN: Selects up to MAX_BLOCK_TXS transactions from the mempool and binds them to the block; cost is O(selected).
+            The UPDATE is guarded on pending: an entry confirmed meanwhile or never committed does not credit the recipient.
+            Returns the selected tx_ids; the caller removes them from the mempool after COMMIT.
+        """
+        return self._bind_pending(conn, index, self.mempool.select(skip=skip))
+
+    def _bind_pending(self, conn, index, selected):
+        credits = {}
+        for tx in selected:
+            cur = conn.execute("UPDATE transactions SET block_index = ? WHERE tx_id = ? AND (block_index = 0 OR block_index IS NULL)", (index, tx['tx_id']))
+            if cur.rowcount: credits[tx['recipient']] = credits.get(tx['recipient'], 0) + tx['amount']
+        conn.executemany("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", [(amount, key) for key, amount in credits.items()])
+        return [tx['tx_id'] for tx in selected]
+
+    def _apply_peer_block(self, conn, block_data, skip, extra=()):
+        """
+        TR: Kök sadece blok hash'ine bağlıysa (committed_root) saklanır. O durumda bloğa yalnızca o kökü yeniden üreten işlem kümesi bağlanır:
+            ödül + mempool seçimi tutmazsa sadece ödül bağlanır, bekleyen işlemler kendi köklerini taşıyacak bir bloğu bekler.
+            Kökü olmayan veya doğrulanamayan bloklarda mempool seçimi bağlanır ve kök bu sunucunun bağladığı işlemlerden hesaplanır.
+        EN: A root is stored only if it is bound to the block hash (committed_root). Then only a transaction set that reproduces that root is
+            bound to the block: if reward + the mempool selection does not match, only the reward is bound and pending transactions wait for
+            a block that can commit to them. For blocks with no root or an unverifiable one the mempool selection is bound and the root is
+            computed from the transactions this server bound.
+        """
+        index, root = block_data['block_index'], committed_root(block_data)
+        cursor = conn.execute("INSERT OR IGNORE INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root) VALUES (?,?,?,?,?,?,?)",
+                     (index, block_data['timestamp'], block_data['previous_hash'], block_data['block_hash'], block_data['proof'],
+                      block_data['miner_key'], root))
+        if cursor.rowcount == 0: return []
+        reward = self.calculate_block_reward(index)
+        reward_tx = {'tx_id': reward_tx_id(index, block_data['previous_hash'], block_data['proof']), 'sender': "GhostProtocol_System",
+                     'recipient': block_data['miner_key'], 'amount': reward, 'timestamp': block_data['timestamp']}
+        selected = self.mempool.select(skip=skip, extra=extra)
+        if root is not None and tx_root(sorted(selected + [reward_tx], key=lambda tx: tx['tx_id'])) != root: selected = []
+        confirmed = self._bind_pending(conn, index, selected)
+        conn.execute("INSERT OR IGNORE INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (:tx_id, :sender, :recipient, :amount, :timestamp, :block_index)",
+                     dict(reward_tx, block_index=index))
+        conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (reward, block_data['miner_key']))
+        if root is None: conn.execute("UPDATE blocks SET merkle_root = ? WHERE block_index = ?", (block_root(conn, index), index))
+        return confirmed
+
+    def hash_block(self, index, timestamp, previous_hash, proof, miner_key, merkle_root=None):
+        return hash_block(index, timestamp, previous_hash, proof, miner_key, merkle_root)
+
+    def proof_of_work(self, last_proof, difficulty, progress=None, cancel=None):
+        # TR: Nonce alanı MINING_WORKERS sürece bölünür; ilk bulan hepsini durdurur. İptalde None döner.
+        # EN: The nonce space is split across MINING_WORKERS processes; the first finder stops them all. None if cancelled.
+        return self.miner.solve(last_proof, difficulty, progress=progress, cancel=cancel)
     
     def calculate_block_reward(self, current_block_index):
         halvings = current_block_index // HALVING_INTERVAL
         return INITIAL_BLOCK_REWARD / (2**halvings)
 
-    def mine_block(self, miner_key):
-        conn = self.db.get_connection()
+    def mine_block(self, miner_key, progress=None, cancel=None):
+        """
+        TR: Blok kazılır ve kaydedilir. Arama sırasında zincir ilerlerse yeni uca göre tekrar aranır.
+            Sonuç: {'block_index', 'block_hash', 'proof', 'hash_rate', ...} veya None (limit / iptal / hata).
+        EN: Mines and stores a block. If the chain advances during the search, it searches again on the new tip.
+            Result: {'block_index', 'block_hash', 'proof', 'hash_rate', ...} or None (limit / cancelled / error).
+        """
+        conn = self.db.get_read_connection()
         last_mined = conn.execute("SELECT last_mined FROM users WHERE wallet_public_key = ?", (miner_key,)).fetchone()
-        if last_mined and (time.time() - last_mined['last_mined'] < 86400):
-            conn.close()
-            return None 
-
-        last_block = self.get_last_block()
-        index = last_block['block_index'] + 1
-        active_peers_count = mesh_mgr.get_active_peers()
-        difficulty = calculate_difficulty(active_peers_count)
-        proof = self.proof_of_work(last_block['proof'], difficulty)
-        block_hash = self.hash_block(index, time.time(), last_block['block_hash'], proof, miner_key)
-        reward = self.calculate_block_reward(index)
+        conn.close()
+        if last_mined and (time.time() - last_mined['last_mined'] < 86400): return None
 
-        try:
-            conn.execute("INSERT INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key) VALUES (?, ?, ?, ?, ?, ?)",
-                         (index, time.time(), last_block['block_hash'], block_hash, proof, miner_key))
-            conn.execute("INSERT INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (?, ?, ?, ?, ?, ?)",
-                         (str(uuid4()), "GhostProtocol_System", miner_key, reward, time.time(), index))
-            conn.execute("UPDATE users SET balance = balance + ?, last_mined = ? WHERE wallet_public_key = ?", (reward, time.time(), miner_key))
-            
-            pending_txs = conn.execute("SELECT tx_id, sender, recipient, amount FROM transactions WHERE block_index = 0 OR block_index IS NULL").fetchall()
-            for p_tx in pending_txs:
-                conn.execute("UPDATE users SET balance = balance + ? WHERE wallet_public_key = ?", (p_tx['amount'], p_tx['recipient']))
-                conn.execute("UPDATE transactions SET block_index = ? WHERE tx_id = ?", (index, p_tx['tx_id']))
+        while True:
+            last_block = self.get_last_block()
+            index = last_block['block_index'] + 1
+            active_peers_count = mesh_mgr.get_active_peers()
+            difficulty = calculate_difficulty(active_peers_count)
+            solved = self.proof_of_work(last_block['proof'], difficulty, progress=progress, cancel=cancel)
+            if solved is None: return None
+            proof = solved['proof']
+            reward = self.calculate_block_reward(index)
+            self._refresh_mempool()
 
-            conn.commit()
-            return True
-        except: return None 
-        finally: conn.close()
+            try:
+                with self.db.write() as conn:
+                    tip = conn.execute("SELECT MAX(block_index) FROM blocks").fetchone()[0]
+                    if tip != last_block['block_index']: continue
+                    # TR: Önce işlemler bloğa bağlanır; kök gerçekten onaylananlardan hesaplanır ve blok hash'ine girer
+                    # EN: Transactions are bound first; the root is computed from those actually confirmed and goes into the block hash
+                    timestamp = time.time()
+                    conn.execute("INSERT INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (?, ?, ?, ?, ?, ?)",
+                                 (reward_tx_id(index, last_block['block_hash'], proof), "GhostProtocol_System", miner_key, reward, timestamp, index))
+                    conn.execute("UPDATE users SET balance = balance + ?, last_mined = ? WHERE wallet_public_key = ?", (reward, timestamp, miner_key))
+                    confirmed = self._confirm_pending(conn, index)
+                    root = block_root(conn, index)
+                    block_hash = self.hash_block(index, timestamp, last_block['block_hash'], proof, miner_key, root)
+                    conn.execute("INSERT INTO blocks (block_index, timestamp, previous_hash, block_hash, proof, miner_key, merkle_root) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (index, timestamp, last_block['block_hash'], block_hash, proof, miner_key, root))
+                self.mempool.remove(confirmed)
+                return dict(solved, block_index=index, block_hash=block_hash, difficulty=difficulty, reward=reward)
+            except Exception as e:
+                logger.error(f"Mined block could not be stored: {e}")
+                return None
 
     def get_current_mined_supply(self):
-        conn = self.db.get_connection()
-        total = conn.execute("SELECT SUM(amount) FROM transactions WHERE sender = 'GhostProtocol_System'").fetchone()[0] or 0.0
+        conn = self.db.get_read_connection()
+        total = read_chain_stats(conn)['circulating_supply']
+        conn.close()
         return total
 
     def transfer_coin(self, sender_key, recipient_key, amount):
@@ -688,23 +1032,49 @@ class BlockchainManager:
         finally: conn.close()
 
     def broadcast_transaction(self, tx_data):
-        def _send():
-            if self.mesh_mgr:
-                peers = self.mesh_mgr.get_peer_ips()
-                for peer in peers:
-                    try: requests.post(f"http://{peer}:{GHOST_PORT}/api/send_transaction", json=tx_data, timeout=2)
-                    except: pass
-        threading.Thread(target=_send, daemon=True).start()
-
-    def receive_transaction(self, tx_data):
-        conn = self.db.get_connection()
-        try:
-            if not conn.execute("SELECT tx_id FROM transactions WHERE tx_id = ?", (tx_data['tx_id'],)).fetchone():
-                conn.execute("INSERT INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (?, ?, ?, ?, ?, ?)",
-                             (tx_data['tx_id'], tx_data['sender'], tx_data['recipient'], tx_data['amount'], tx_data['timestamp'], 0))
-                conn.commit()
-        except: pass
-        finally: conn.close()
+        # TR: Kendi işlemimiz eşlerden geri döndüğünde DB'ye gitmeden elenir
+        # EN: Our own transaction is dropped without a DB hit when peers echo it back
+        self.seen_tx.add(tx_data.get('tx_id'))
+        if self.mesh_mgr: self.mesh_mgr.outbound.broadcast(self.mesh_mgr.get_peer_ips(), "/api/send_transaction", tx_data, batch_path="/api/send_transactions")
+
+    def receive_transaction(self, tx_data, wait=False):
+        if self.seen_tx.is_duplicate(tx_data.get('tx_id')): return False
+        stored = []
+        return self.db.submit_write(self._apply_transaction, tx_data, stored, wait=wait, on_commit=lambda _: self._mark_seen(stored))
+
+    def receive_transactions(self, txs, wait=False):
+        # TR: Toplu gelen işlemler tek bir yazma işinde (tek işlem) uygulanır; bilinen tekrarlar önceden elenir
+        # EN: An inbound batch is applied as one write item (one transaction); known duplicates are dropped first
+        txs = [t for t in txs if not (isinstance(t, dict) and self.seen_tx.is_duplicate(t.get('tx_id')))]
+        if not txs: return 0
+        stored = []
+        return self.db.submit_write(self._apply_transactions, txs, stored, wait=wait, on_commit=lambda _: self._mark_seen(stored))
+
+    def _mark_seen(self, tx_ids):
+        # TR: Kimlikler ancak COMMIT'ten sonra filtreye girer; geri alınan bir yazma, tekrar gönderimlerin düşmesine yol açmaz
+        # EN: Ids enter the filter only after COMMIT; a rolled-back write does not cause retransmissions to be dropped
+        for tx_id in tx_ids: self.seen_tx.add(tx_id)
+
+    def _apply_transactions(self, conn, txs, stored):
+        applied = 0
+        for tx_data in txs:
+            try: applied += bool(self._apply_transaction(conn, tx_data, stored))
+            except (KeyError, TypeError): pass
+        return applied
+
+    def _apply_transaction(self, conn, tx_data, stored):
+        tx_id = tx_data['tx_id']
+        if self.seen_tx.might_contain(tx_id):
+            if conn.execute("SELECT tx_id FROM transactions WHERE tx_id = ?", (tx_id,)).fetchone():
+                stored.append(tx_id)
+                return False
+            self.seen_tx.record_false_positive()
+        # TR: Filtre döndükten sonra eski kimlikler Bloom'dan düşer; OR IGNORE birincil anahtarla tekrarı yine engeller
+        # EN: Old ids fall out of the Bloom after rotation; OR IGNORE still blocks the duplicate via the primary key
+        cur = conn.execute("INSERT OR IGNORE INTO transactions (tx_id, sender, recipient, amount, timestamp, block_index) VALUES (?, ?, ?, ?, ?, ?)",
+                           (tx_id, tx_data['sender'], tx_data['recipient'], tx_data['amount'], tx_data['timestamp'], 0))
+        stored.append(tx_id)
+        return cur.rowcount > 0
 
 class MeshManager:
     def __init__(self, db_manager):
@@ -712,6 +1082,11 @@ class MeshManager:
         self.broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         try: self.broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         except: pass
+        self.scheduler = SyncScheduler(GHOST_PORT, SYNC_PARALLELISM, SYNC_ROUND_DEADLINE, SYNC_CHUNK_BLOCKS)
+        # TR: Yayınlar eş başına keep-alive oturumlarla sabit bir işçi havuzundan gider
+        # EN: Gossip leaves through a fixed worker pool over keep-alive sessions per peer
+        self.outbound = OutboundPool(GHOST_PORT, OUTBOUND_WORKERS, OUTBOUND_QUEUE_SIZE, OUTBOUND_PUT_TIMEOUT,
+                                     batch_window=GOSSIP_BATCH_WINDOW, batch_max_items=GOSSIP_BATCH_MAX_ITEMS)
         threading.Thread(target=self._listen_for_peers, daemon=True).start()
         threading.Thread(target=self._broadcast_presence, daemon=True).start()
         threading.Thread(target=self._sync_loop, daemon=True).start()
@@ -723,37 +1098,51 @@ class MeshManager:
             time.sleep(60)
 
     def sync_with_network(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         peers = conn.execute("SELECT ip_address FROM mesh_peers WHERE last_seen > ?", (time.time() - 3600,)).fetchall()
+        locator = build_locator(conn)
         conn.close()
-        my_headers = [h['block_hash'] for h in blockchain_mgr.get_all_headers()]
+        local_ip = self._get_local_ip()
+        peers = [p['ip_address'] for p in peers if p['ip_address'] != local_ip]
+        if not peers: return
 
-        for peer_row in peers:
-            peer_ip = peer_row['ip_address']
-            if peer_ip == self._get_local_ip(): continue
+        # TR: Eşlerle eşzamanlı konuşulur; tur SYNC_ROUND_DEADLINE saniyede biter, ölü eşler turu durduramaz
+        # EN: Peers are contacted concurrently; the round ends after SYNC_ROUND_DEADLINE seconds, dead peers cannot stall it
+        deadline = self.scheduler.new_deadline()
+        try:
+            # TR: Yanıt vermeyen eşler turun kalanında atlanır
+            # EN: Peers that did not answer are skipped for the rest of the round
+            applied, legacy, peers = self.scheduler.sync_blocks(peers, locator, blockchain_mgr.add_blocks_from_peer, deadline)
+            if applied: logger.info(f"Synced {applied} blocks from {len(peers)} peers")
+            if legacy: self.scheduler.map(lambda ip: self._sync_blocks_legacy(ip, deadline), legacy, deadline)
+        except Exception as e: logger.debug(f"Block sync failed: {e}")
+
+        def _fees(peer_ip):
+            f_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/get_fees", timeout=time_left(deadline, 3))
+            return f_resp.json() if f_resp.status_code == 200 else None
+        fees = [f for f in self.scheduler.map(_fees, peers, deadline).values() if f]
+        if fees:
             try:
-                resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/chain_meta", timeout=3)
-                if resp.status_code == 200:
-                    for ph in resp.json():
-                        if ph['block_hash'] not in my_headers:
-                            b_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/block/{ph['block_hash']}", timeout=3)
-                            if b_resp.status_code == 200: blockchain_mgr.add_block_from_peer(b_resp.json())
-                
-                f_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/get_fees", timeout=3)
-                if f_resp.status_code == 200: 
-                    c = self.db.get_connection()
-                    for k,v in f_resp.json().items(): c.execute("INSERT OR REPLACE INTO network_fees (fee_type, amount) VALUES (?,?)", (k,v))
-                    c.commit()
-                    c.close()
+                with self.db.write() as c:
+                    for fee_map in fees:
+                        for k, v in fee_map.items(): c.execute("INSERT OR REPLACE INTO network_fees (fee_type, amount) VALUES (?,?)", (k, v))
             except: pass
 
+    def _sync_blocks_legacy(self, peer_ip, deadline):
+        # TR: /api/headers olmayan eski eşler için tam başlık listesi (küme ile karşılaştırılır). Her istek turun kalanıyla sınırlıdır;
+        #     süre dolunca time_left döngüyü keser ve o ana kadar eklenen bloklar kalır
+        # EN: Full header list for old peers without /api/headers (compared against a set). Every request is capped by what is left
+        #     of the round; once the time is up time_left ends the loop and the blocks added so far stay
+        resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/chain_meta", timeout=time_left(deadline, 3))
+        if resp.status_code != 200: return
+        my_headers = {h['block_hash'] for h in blockchain_mgr.get_all_headers()}
+        for ph in resp.json():
+            if ph['block_hash'] not in my_headers:
+                b_resp = requests.get(f"http://{peer_ip}:{GHOST_PORT}/api/block/{ph['block_hash']}", timeout=time_left(deadline, 3))
+                if b_resp.status_code == 200: blockchain_mgr.add_block_from_peer(b_resp.json())
+
     def broadcast_message(self, msg_data):
-        def _send():
-            peers = self.get_peer_ips()
-            for peer in peers:
-                try: requests.post(f"http://{peer}:{GHOST_PORT}/api/messenger/receive_message", json=msg_data, timeout=2)
-                except: pass
-        threading.Thread(target=_send, daemon=True).start()
+        self.outbound.broadcast(self.get_peer_ips(), "/api/messenger/receive_message", msg_data, batch_path="/api/messenger/receive_messages")
 
     def _broadcast_presence(self):
         while True:
@@ -784,59 +1173,206 @@ class MeshManager:
 
     def register_peer(self, ip_address):
         if ip_address.startswith("127.0") or ip_address == "0.0.0.0": return
-        conn = self.db.get_connection()
-        try:
-            conn.execute("INSERT OR REPLACE INTO mesh_peers (ip_address, last_seen) VALUES (?, ?)", (ip_address, time.time()))
-            conn.commit()
-        finally: conn.close()
+        try: self.db.submit_write(self._apply_peer, ip_address, time.time())
+        except WriteQueueFull: pass
+
+    def _apply_peer(self, conn, ip_address, last_seen):
+        conn.execute("INSERT OR REPLACE INTO mesh_peers (ip_address, last_seen) VALUES (?, ?)", (ip_address, last_seen))
 
     def get_active_peers(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         count = conn.execute("SELECT COUNT(*) FROM mesh_peers WHERE last_seen > ?", (time.time() - 300,)).fetchone()[0]
         conn.close()
         return count
 
     def get_peer_ips(self):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
         peers = conn.execute("SELECT ip_address FROM mesh_peers WHERE last_seen > ?", (time.time() - 3600,)).fetchall()
         conn.close()
         return [p['ip_address'] for p in peers] + KNOWN_PEERS
 
+class MiningJobManager:
+    """
+    TR: Madencilik arka plan işleri. POST /mining hemen bir iş kimliği döner; durum /api/mining/status üzerinden sorgulanır.
+        İşler mining_jobs tablosunda tutulur, böylece her gunicorn işçisi durumu okuyup iptal edebilir; cüzdan başına tek açık iş
+        kısmi benzersiz indeksle korunur. Her iş tüm çekirdekleri kullandığından sunucu genelinde aynı anda tek iş kazılır; diğerleri
+        sıraları gelene kadar 'queued' kalır. Sahibi ölen işin kalp atışı MINING_JOB_STALE'den eskiyse iş 'failed' olur.
+    EN: Background mining jobs. POST /mining returns a job id immediately; status is polled via /api/mining/status.
+        Jobs live in the mining_jobs table so any gunicorn worker can read and cancel them; one open job per wallet is enforced
+        by a partial unique index. Each job uses every core, so one job mines at a time server-wide; the others stay 'queued'
+        until their turn. A job whose owner died is marked 'failed' once its heartbeat is older than MINING_JOB_STALE.
+    """
+    def __init__(self, db, blockchain_mgr):
+        self.db = db
+        self.chain = blockchain_mgr
+        self._cancels = {}
+        with self.db.write() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS mining_jobs (job_id TEXT PRIMARY KEY, miner_key TEXT NOT NULL, state TEXT NOT NULL, "
+                         "difficulty INTEGER, hashes INTEGER DEFAULT 0, hash_rate REAL DEFAULT 0, expected_hashes REAL, created REAL, "
+                         "started REAL, finished REAL, heartbeat REAL, result TEXT, error TEXT, cancel_requested INTEGER DEFAULT 0)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mining_jobs_open ON mining_jobs(miner_key) WHERE state IN ('queued', 'running')")
+
+    def _expire(self, conn, now):
+        conn.execute("UPDATE mining_jobs SET state = 'failed', error = 'Worker lost.', finished = ? WHERE state IN ('queued', 'running') AND heartbeat < ?",
+                     (now, now - MINING_JOB_STALE))
+        conn.execute("DELETE FROM mining_jobs WHERE finished < ?", (now - MINING_JOB_TTL,))
+
+    def start(self, miner_key):
+        difficulty = calculate_difficulty(mesh_mgr.get_active_peers())
+        job_id, now = str(uuid4()), time.time()
+        with self.db.write() as conn:
+            self._expire(conn, now)
+            try:
+                conn.execute("INSERT INTO mining_jobs (job_id, miner_key, state, difficulty, expected_hashes, created, heartbeat) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                             (job_id, miner_key, difficulty, float(16 ** difficulty), now, now))
+            except sqlite3.IntegrityError:
+                return False, conn.execute("SELECT job_id FROM mining_jobs WHERE miner_key = ? AND state IN ('queued', 'running')", (miner_key,)).fetchone()[0]
+        self._cancels[job_id] = threading.Event()
+        threading.Thread(target=self._run, args=(job_id, miner_key), daemon=True).start()
+        return True, job_id
+
+    def _claim(self, job_id, cancel):
+        # TR: En eski bekleyen iş, kazılan iş yokken kendini 'running' yapar; beklerken kalp atışı yazılır ve iptal okunur
+        # EN: The oldest queued job moves itself to 'running' when no job is mining; while waiting it beats and reads cancellation
+        now = time.time()
+        with self.db.write() as conn:
+            self._expire(conn, now)
+            row = conn.execute("SELECT state, cancel_requested FROM mining_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None or row['state'] != 'queued' or row['cancel_requested']:
+                cancel.set()
+                return False
+            conn.execute("UPDATE mining_jobs SET heartbeat = ? WHERE job_id = ?", (now, job_id))
+            return conn.execute("UPDATE mining_jobs SET state = 'running', started = ? WHERE job_id = ? "
+                                "AND NOT EXISTS (SELECT 1 FROM mining_jobs WHERE state = 'running') "
+                                "AND NOT EXISTS (SELECT 1 FROM mining_jobs WHERE state = 'queued' AND rowid < (SELECT rowid FROM mining_jobs WHERE job_id = ?))",
+                                (now, job_id, job_id)).rowcount == 1
+
+    def _beat(self, job_id, hashes, rate):
+        with self.db.write() as conn:
+            conn.execute("UPDATE mining_jobs SET hashes = ?, hash_rate = ?, heartbeat = ? WHERE job_id = ?", (hashes, rate, time.time(), job_id))
+            row = conn.execute("SELECT cancel_requested FROM mining_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def _finish(self, job_id, state, error=None, result=None, hashes=None, rate=None):
+        with self.db.write() as conn:
+            conn.execute("UPDATE mining_jobs SET state = ?, error = ?, result = ?, hashes = COALESCE(?, hashes), hash_rate = COALESCE(?, hash_rate), "
+                         "finished = ? WHERE job_id = ? AND state IN ('queued', 'running')",
+                         (state, error, json.dumps(result) if result else None, hashes, rate, time.time(), job_id))
+
+    def _run(self, job_id, miner_key):
+        cancel = self._cancels[job_id]
+        last_beat = [0.0]
+        def progress(hashes, rate):
+            if time.time() - last_beat[0] < MINING_JOB_HEARTBEAT: return
+            last_beat[0] = time.time()
+            if self._beat(job_id, hashes, rate): cancel.set()
+        try:
+            while not self._claim(job_id, cancel):
+                if cancel.is_set(): return self._finish(job_id, 'cancelled')
+                cancel.wait(MINING_QUEUE_POLL)
+            result = self.chain.mine_block(miner_key, progress=progress, cancel=cancel)
+            if result:
+                self._finish(job_id, 'done', hashes=result['hashes'], rate=result['hash_rate'],
+                             result={'block_index': result['block_index'], 'block_hash': result['block_hash'], 'proof': result['proof'], 'reward': result['reward']})
+            elif cancel.is_set(): self._finish(job_id, 'cancelled')
+            else: self._finish(job_id, 'failed', error="Madencilik hatası.")
+        except Exception as e:
+            logger.error(f"Mining job {job_id} failed: {e}")
+            try: self._finish(job_id, 'failed', error=str(e))
+            except Exception: pass
+        finally:
+            self._cancels.pop(job_id, None)
+
+    def get_active_job(self, miner_key):
+        conn = self.db.get_read_connection()
+        try:
+            row = conn.execute("SELECT job_id FROM mining_jobs WHERE miner_key = ? AND state IN ('queued', 'running') AND heartbeat >= ?",
+                               (miner_key, time.time() - MINING_JOB_STALE)).fetchone()
+        finally: conn.close()
+        return row['job_id'] if row else None
+
+    def cancel(self, job_id, miner_key):
+        # TR: İptal tabloya yazılır (işi hangi işçi yürütürse yürütsün bir sonraki kalp atışında görür); iş bu işçideyse hemen durur
+        # EN: Cancellation is written to the table (whichever worker runs the job sees it on its next heartbeat); stops at once if local
+        with self.db.write() as conn:
+            row = conn.execute("SELECT miner_key, state FROM mining_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if not row or row['miner_key'] != miner_key: return False, "Job not found."
+            if row['state'] not in ('queued', 'running'): return False, f"Job already {row['state']}."
+            conn.execute("UPDATE mining_jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+        event = self._cancels.get(job_id)
+        if event: event.set()
+        return True, "Cancelling."
+
+    def status(self, job_id, miner_key):
+        conn = self.db.get_read_connection()
+        try: job = conn.execute("SELECT * FROM mining_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally: conn.close()
+        if not job or job['miner_key'] != miner_key: return None
+        elapsed = (job['finished'] or time.time()) - (job['started'] or job['created'])
+        rate = job['hash_rate']
+        # TR: Beklenen deneme sayısı 16^zorluk; ETA kalan beklenen denemeden tahmin edilir
+        # EN: Expected attempts are 16^difficulty; ETA is estimated from the remaining expected attempts
+        remaining = max(job['expected_hashes'] - job['hashes'], 0)
+        return {'job_id': job['job_id'], 'state': job['state'], 'difficulty': job['difficulty'],
+                'hashes': job['hashes'], 'hash_rate': round(rate, 1), 'elapsed': round(elapsed, 1),
+                'progress': 1.0 if job['state'] == 'done' else round(min(job['hashes'] / job['expected_hashes'], 0.99), 4),
+                'eta_seconds': round(remaining / rate, 1) if job['state'] == 'running' and rate > 0 else None,
+                'result': json.loads(job['result']) if job['result'] else None, 'error': job['error']}
+
 class TransactionManager:
     def __init__(self, db_manager):
         self.db = db_manager
 
     def get_last_transactions(self, pub_key, limit=10):
-        conn = self.db.get_connection()
+        conn = self.db.get_read_connection()
+        # TR: OR yerine iki indeksli alt sorgu; her biri idx_tx_*_ts üzerinden en fazla `limit` satır okur
+        # EN: Two indexed sub-queries instead of OR; each reads at most `limit` rows via idx_tx_*_ts
         transactions = conn.execute(
-            "SELECT * FROM transactions WHERE sender = ? OR recipient = ? ORDER BY timestamp DESC LIMIT ?", 
-            (pub_key, pub_key, limit)
+            "SELECT * FROM (SELECT * FROM transactions WHERE sender = ? ORDER BY timestamp DESC LIMIT ?) "
+            "UNION SELECT * FROM (SELECT * FROM transactions WHERE recipient = ? ORDER BY timestamp DESC LIMIT ?) "
+            "ORDER BY timestamp DESC LIMIT ?",
+            (pub_key, limit, pub_key, limit, limit)
         ).fetchall()
         conn.close()
         return transactions
 
 # --- MANAGER INIT (GLOBAL & ORDERED) ---
-db = DatabaseManager(DB_FILE)
-blockchain_mgr = BlockchainManager(db)
-assets_mgr = AssetManager(db)
-mesh_mgr = MeshManager(db) 
-messenger_mgr = MessengerManager(db, blockchain_mgr, mesh_mgr)
-tx_mgr = TransactionManager(db)
-
-# TR: Smart Contract Manager
-# EN: Smart Contract Manager
-try:
-    from ghost_vm import GhostVM, EXAMPLE_CONTRACT
-    vm_engine = GhostVM()
-    smart_contract_mgr = SmartContractManager(db, blockchain_mgr, vm_engine)
-except ImportError:
-    class DummyVM: 
-        def validate_code(self, c): return True, "OK"
-        def execute_contract(self, c, m, a, s): return {'success':False, 'error':'VM Missing'}
-    smart_contract_mgr = SmartContractManager(db, blockchain_mgr, DummyVM())
-    EXAMPLE_CONTRACT = "# VM Not Found"
-
-blockchain_mgr.set_mesh_manager(mesh_mgr)
+# TR: forkserver/spawn ile başlatılan madenci ve blok doğrulama süreçleri bu dosyayı __mp_main__ olarak içe aktarır;
+#     yöneticiler, soketler ve iş parçacıkları yalnızca sunucu sürecinde kurulur
+# EN: Miner and block validation processes started with forkserver/spawn import this file as __mp_main__;
+#     managers, sockets and threads are only set up in the serving process
+if __name__ != '__mp_main__':
+    blob_store = BlobStore(BLOB_DIR)
+    db = DatabaseManager(DB_FILE, blob_store)
+    if __name__ == '__main__' and '--reindex-stats' in sys.argv:
+        # TR: chain_stats sayaçlarını tablolardan yeniden hesapla ve çık; yöneticiler ve ağ iş parçacıkları başlatılmadan önce
+        # EN: Recompute the chain_stats counters from the tables and exit, before any manager or network thread is started
+        with db.write() as conn: print(reindex_chain_stats(conn))
+        sys.exit(0)
+    blockchain_mgr = BlockchainManager(db)
+    assets_mgr = AssetManager(db)
+    mesh_mgr = MeshManager(db) 
+    messenger_mgr = MessengerManager(db, blockchain_mgr, mesh_mgr)
+    tx_mgr = TransactionManager(db)
+    mining_jobs = MiningJobManager(db, blockchain_mgr)
+
+    # TR: Smart Contract Manager
+    # EN: Smart Contract Manager
+    try:
+        from ghost_vm import GhostVM, EXAMPLE_CONTRACT
+        vm_engine = GhostVM()
+        smart_contract_mgr = SmartContractManager(db, blockchain_mgr, vm_engine)
+    except ImportError:
+        class DummyVM: 
+            def validate_code(self, c): return True, "OK"
+            def execute_contract(self, c, m, a, s): return {'success':False, 'error':'VM Missing'}
+        smart_contract_mgr = SmartContractManager(db, blockchain_mgr, DummyVM())
+        EXAMPLE_CONTRACT = "# VM Not Found"
+
+    blockchain_mgr.set_mesh_manager(mesh_mgr)
+    threading.Thread(target=assets_mgr.sweep_orphan_blobs, daemon=True).start()
+    snapshot_publisher = SnapshotPublisher(db.get_read_connection, SNAPSHOT_DIR, SNAPSHOT_EVERY_BLOCKS, SNAPSHOT_KEEP, SNAPSHOT_CHECK_INTERVAL)
+    snapshot_publisher.start()
 
 # --- HTML TEMPLATES ---
 # (Şablonlar aynı kalıyor / Templates remain same)
@@ -917,6 +1453,41 @@ MINING_UI = r"""
 
         <hr style="border-top: 1px solid #333; margin: 10px 0;">
 
+        {% if job_id %}
+        <div id="mining-job" data-status-url="{{ url_for('api_mining_status', job_id=job_id) }}" data-cancel-url="{{ url_for('api_mining_cancel', job_id=job_id) }}">
+            <div class="status-message status-success" id="mining-state">{{ lang['mine_running'] }}...</div>
+            <div style="background:#333; height:10px; border-radius:5px; overflow:hidden;"><div id="mining-bar" style="background:#4caf50; height:10px; width:0%;"></div></div>
+            <p id="mining-rate" style="font-size:0.9em; color:#aaa;"></p>
+            <button class="action-button" type="button" id="mining-cancel" style="background:#c62828;">{{ lang['mine_cancel'] }}</button>
+        </div>
+        <script>
+        (function() {
+            var box = document.getElementById('mining-job');
+            function poll() {
+                fetch(box.dataset.statusUrl, {credentials: 'same-origin'}).then(function(r) { return r.json(); }).then(function(s) {
+                    if (s.state === 'queued') {
+                        document.getElementById('mining-state').textContent = '{{ lang['mine_queued'] }}...';
+                        setTimeout(poll, 1000);
+                    } else if (s.state === 'running') {
+                        document.getElementById('mining-state').textContent = '{{ lang['mine_running'] }}...';
+                        document.getElementById('mining-bar').style.width = (s.progress * 100).toFixed(1) + '%';
+                        document.getElementById('mining-rate').textContent = Math.round(s.hash_rate).toLocaleString() + ' H/s | '
+                            + s.hashes.toLocaleString() + ' hashes | {{ lang['mine_eta'] }}: ' + (s.eta_seconds === null ? '-' : Math.ceil(s.eta_seconds) + 's');
+                        setTimeout(poll, 1000);
+                    } else {
+                        var el = document.getElementById('mining-state');
+                        if (s.state === 'done') el.textContent = '{{ lang['mine_success'] }}: #' + s.result.block_index + ' (' + Math.round(s.hash_rate).toLocaleString() + ' H/s)';
+                        else if (s.state === 'cancelled') el.textContent = '{{ lang['mine_cancelled'] }}';
+                        else { el.className = 'status-message status-error'; el.textContent = s.error || 'Error'; }
+                        setTimeout(function() { window.location = '{{ url_for('mining') }}'; }, 2000);
+                    }
+                });
+            }
+            document.getElementById('mining-cancel').onclick = function() { fetch(box.dataset.cancelUrl, {method: 'POST', credentials: 'same-origin'}); };
+            poll();
+        })();
+        </script>
+        {% else %}
         <form method="POST" action="{{ url_for('mining') }}">
         {% if not can_mine %}
             <div class="status-message status-error">
@@ -927,6 +1498,7 @@ MINING_UI = r"""
             <button class="action-button" type="submit">Madencilik Başlat</button>
         {% endif %}
         </form>
+        {% endif %}
     </div>
     <div class="card" style="flex: 1; font-size: 0.9em; background-color: #2a2a2a;">
         <h4 style="border-bottom: 1px solid #444; padding-bottom: 5px;">{{ lang['stats_title'] }}</h4>
@@ -940,7 +1512,7 @@ MINING_UI = r"""
 {% endblock %}
 """
 
-SEARCH_UI = r"""{% extends 'base.html' %}{% block content %}<div class="card"><h3>{{ lang['search_title'] }}</h3><form method="GET" action="{{ url_for('search') }}"><input type="text" name="query" placeholder="..." value="{{ query or '' }}" required style="width: 80%; display: inline-block;"><button class="action-button" type="submit" style="width: 19%; display: inline-block; margin-left: 1%;">{{ lang['search'] }}</button></form></div>{% if results %}<div class="card"><h3>Arama Sonuçları</h3><table><tr><th>{{ lang['asset_name'] }}</th><th>{{ lang['asset_type'] }}</th><th>Link</th></tr>{% for r in results %}<tr><td>{{ r.name }}</td><td>{{ r.type | upper }}</td><td><a href="{{ url_for('view_asset', asset_id=r.asset_id) }}" target="_blank" style="color:#4caf50;">{{ lang['view'] }}</a></td></tr>{% endfor %}</table></div>{% endif %}{% endblock %}"""
+SEARCH_UI = r"""{% extends 'base.html' %}{% block content %}<div class="card"><h3>{{ lang['search_title'] }}</h3><form method="GET" action="{{ url_for('search') }}"><input type="text" name="query" placeholder="..." value="{{ query or '' }}" required style="width: 80%; display: inline-block;"><button class="action-button" type="submit" style="width: 19%; display: inline-block; margin-left: 1%;">{{ lang['search'] }}</button></form></div>{% if results %}<div class="card"><h3>Arama Sonuçları</h3><table><tr><th>{{ lang['asset_name'] }}</th><th>{{ lang['asset_type'] }}</th><th>Link</th></tr>{% for r in results %}<tr><td>{{ r.name }}</td><td>{{ r.type | upper }}</td><td><a href="{{ url_for('view_asset', asset_id=r.asset_id) }}" target="_blank" style="color:#4caf50;">{{ lang['view'] }}</a></td></tr>{% endfor %}</table>{% if pages > 1 %}<p style="text-align:center;">{% if page > 1 %}<a href="{{ url_for('search', query=query, page=page-1) }}" style="color:#4caf50;">&laquo;</a>{% endif %} {{ page }} / {{ pages }} ({{ total }}) {% if page < pages %}<a href="{{ url_for('search', query=query, page=page+1) }}" style="color:#4caf50;">&raquo;</a>{% endif %}</p>{% endif %}</div>{% endif %}{% endblock %}"""
 
 EDIT_ASSET_UI = r"""{% extends 'base.html' %}{% block content %}<div class="card"><h3>{{ lang['edit_title'] }}: {{ asset_id }}</h3>{% if error %}<div class="status-message status-error">{{ error }}</div>{% endif %}<form method="POST"><textarea name="content" rows="10" placeholder="{{ lang['content_placeholder'] }}">{{ current_content }}</textarea><br><button class="action-button" type="submit">{{ lang['update_btn'] }}</button></form><br><a href="{{ url_for('dashboard') }}" style="color:#aaa;">{{ lang['back_to_dashboard'] }}</a></div>{% endblock %}"""
 
@@ -967,8 +1539,32 @@ def timestamp_to_datetime(timestamp):
 app.jinja_env.filters['thousands'] = format_thousands
 app.jinja_env.filters['timestamp_to_datetime'] = timestamp_to_datetime
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return f"Dosya çok büyük / File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)", 413
+
+# TR: Oturuma dokunmayan uç noktalar; Set-Cookie olmadan yanıt verirler ki nginx önbelleğe alabilsin
+# EN: Endpoints that never touch the session; they respond without Set-Cookie so nginx can cache them
+SESSIONLESS_ENDPOINTS = {'view_asset', 'api_get_blob', 'api_snapshot_file'}
+
+class GhostSessionInterface(SecureCookieSessionInterface):
+    def save_session(self, app, session, response):
+        if request.endpoint in SESSIONLESS_ENDPOINTS: return
+        return super().save_session(app, session, response)
+
+app.session_interface = GhostSessionInterface()
+
+class GhostRequest(Request):
+    # TR: Yüklenen dosyalar Werkzeug'un kendi geçici dosyası yerine doğrudan blob deposunun tmp dizinine akar (diske tek yazma)
+    # EN: Uploaded files stream straight into the blob store's tmp directory instead of Werkzeug's own temp file (one write to disk)
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return blob_store.spool()
+
+app.request_class = GhostRequest
+
 @app.before_request
 def make_session_permanent():
+    if request.endpoint in SESSIONLESS_ENDPOINTS: return
     session.permanent = True
 
 @app.route('/set_lang/<lang>')
@@ -987,7 +1583,7 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = hashlib.sha256(request.form['password'].encode('utf-8')).hexdigest()
-        conn = db.get_connection()
+        conn = db.get_read_connection()
         user = conn.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password)).fetchone()
         conn.close()
         if user:
@@ -1043,7 +1639,10 @@ def dashboard():
     contract_result = None
     
     if request.method == 'POST':
-        action = request.form.get('action')
+        # TR: Çok parçalı yüklemeler gövde ayrıştırılmadan önce boyutla reddedilebilir (request.form tüm gövdeyi okur)
+        # EN: Multipart uploads can be rejected by size before the body is parsed (request.form reads the whole body)
+        if request.mimetype == 'multipart/form-data': error = assets_mgr.precheck_upload(pub_key, request.content_length)
+        action = None if error else request.form.get('action')
         if action == 'register_domain':
             content = request.form.get('content')
             success, msg = assets_mgr.register_asset(pub_key, 'domain', request.form['domain_name'], content)
@@ -1081,7 +1680,7 @@ def dashboard():
                 contract_result = res
             else: error = res
 
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     user = conn.execute("SELECT balance FROM users WHERE wallet_public_key = ?", (pub_key,)).fetchone()
     session['balance'] = user['balance'] if user else 0.0
     assets = conn.execute("SELECT * FROM assets WHERE owner_pub_key = ? ORDER BY creation_time DESC", (pub_key,)).fetchall()
@@ -1109,7 +1708,7 @@ def edit_asset(asset_id):
     L = LANGUAGES[session.get('lang', 'tr')]
     pub_key = session['pub_key']
     
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     asset = conn.execute("SELECT * FROM assets WHERE asset_id = ? AND owner_pub_key = ?", (asset_id, pub_key)).fetchone()
     conn.close()
     
@@ -1121,7 +1720,7 @@ def edit_asset(asset_id):
         if success: return redirect(url_for('dashboard'))
         else: return f"Hata: {msg}"
 
-    try: current_content = asset['content'].decode('utf-8')
+    try: current_content = assets_mgr.read_content(asset).decode('utf-8')
     except: current_content = ""
 
     return render_template_string(EDIT_ASSET_UI, lang=L, asset_id=asset_id, current_content=current_content, active_peers_count=session.get('active_peers_count', 0))
@@ -1132,7 +1731,7 @@ def mining():
     L = LANGUAGES[session.get('lang', 'tr')]
     pub_key = session['pub_key']
     
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     user = conn.execute("SELECT last_mined FROM users WHERE wallet_public_key = ?", (pub_key,)).fetchone()
     last_mined_time = user['last_mined'] if user else 0
     conn.close()
@@ -1146,45 +1745,86 @@ def mining():
     message = None
     error = None
 
+    job_id = mining_jobs.get_active_job(pub_key)
+    wants_json = request.accept_mimetypes.best == 'application/json'
+
     if request.method == 'POST':
-        if can_mine:
-            result = blockchain_mgr.mine_block(pub_key)
-            if result:
-                message = L['mine_success']
-                can_mine = False
-                last_block = blockchain_mgr.get_last_block()
-            else: error = "Madencilik hatası."
+        # TR: Madencilik arka planda çalışır; istek işçiyi bloklamadan hemen iş kimliği döner
+        # EN: Mining runs in the background; the request returns a job id at once without blocking the worker
+        if job_id: error = L['mine_job_active']
+        elif can_mine: _, job_id = mining_jobs.start(pub_key)
         else: error = L['mine_limit_error']
+        if wants_json:
+            if error: return jsonify({'error': error, 'job_id': job_id}), 409
+            return jsonify({'job_id': job_id, 'status_url': url_for('api_mining_status', job_id=job_id)}), 202
+        if not error: return redirect(url_for('mining'))
 
     remaining = max(0, 86400 - (time.time() - last_mined_time))
     remaining_time = str(timedelta(seconds=int(remaining)))
     
     stats = blockchain_mgr.get_statistics()
     
-    return render_template_string(MINING_UI, lang=L, message=message, error=error, last_block=last_block, difficulty=difficulty, current_reward=current_reward, can_mine=can_mine, remaining_time=remaining_time, next_halving=0, active_peers_count=active_peers, stats=stats)
+    return render_template_string(MINING_UI, lang=L, message=message, error=error, last_block=last_block, difficulty=difficulty, current_reward=current_reward, can_mine=can_mine, remaining_time=remaining_time, next_halving=0, active_peers_count=active_peers, stats=stats, job_id=job_id)
+
+@app.route('/api/mining/status/<job_id>')
+def api_mining_status(job_id):
+    if not session.get('username'): return jsonify({'error': 'Auth required'}), 401
+    status = mining_jobs.status(job_id, session['pub_key'])
+    if not status: return jsonify({'error': 'Not found'}), 404
+    return jsonify(status)
+
+@app.route('/api/mining/cancel/<job_id>', methods=['POST'])
+def api_mining_cancel(job_id):
+    if not session.get('username'): return jsonify({'error': 'Auth required'}), 401
+    success, msg = mining_jobs.cancel(job_id, session['pub_key'])
+    if not success: return jsonify({'error': msg}), 409
+    return jsonify({'status': 'ok', 'message': msg})
+
+# TR: Dosya olarak yüklenen HTML tarayıcıda çalıştırılmaz; sadece .ghost alan adları HTML olarak sunulur
+# EN: HTML uploaded as a file is never rendered; only .ghost domains are served as HTML
+UNSAFE_FILE_MIMETYPES = {'text/html', 'application/xhtml+xml'}
+
+def asset_mimetype(asset):
+    if asset['type'] == 'domain': return 'text/html'
+    guessed, _ = mimetypes.guess_type(asset['name'] or '')
+    if not guessed or guessed in UNSAFE_FILE_MIMETYPES: return 'application/octet-stream'
+    return guessed
 
 @app.route('/view_asset/<asset_id>')
 def view_asset(asset_id):
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     asset = conn.execute("SELECT * FROM assets WHERE asset_id = ?", (asset_id,)).fetchone()
     conn.close()
     if not asset: return "Bulunamadı", 404
-    
-    if asset['type'] == 'domain':
-        return asset['content']
-    return Response(asset['content'], mimetype='application/octet-stream')
+    path = assets_mgr.blob_path(asset)
+    if not path or not os.path.exists(path): return "Bulunamadı", 404
+
+    # TR: Dosya doğrudan diskten akıtılır (wsgi.file_wrapper / sendfile); Python belleğine kopyalanmaz.
+    #     conditional=True: If-None-Match / If-Modified-Since -> 304, Range -> 206.
+    # EN: The file is streamed straight from disk (wsgi.file_wrapper / sendfile); never copied into the Python heap.
+    #     conditional=True: If-None-Match / If-Modified-Since -> 304, Range -> 206.
+    resp = send_file(path, mimetype=asset_mimetype(asset), conditional=True, etag=asset['content_hash'],
+                     last_modified=os.path.getmtime(path), max_age=ASSET_CACHE_MAX_AGE)
+    resp.cache_control.public = True
+    resp.cache_control.must_revalidate = True
+    resp.headers['X-Content-Type-Options'] = 'nosniff'
+    return resp
 
 @app.route('/search')
 def search():
     L = LANGUAGES[session.get('lang', 'tr')]
     query = request.args.get('query', '').strip()
-    results = []
+    try: page = max(1, int(request.args.get('page', 1)))
+    except ValueError: page = 1
+    results, total = [], 0
     if query:
-        conn = db.get_connection()
-        s = f'%{query}%'
-        results = conn.execute("SELECT * FROM assets WHERE name LIKE ? OR keywords LIKE ?", (s, s)).fetchall()
-        conn.close()
-    return render_template_string(SEARCH_UI, lang=L, query=query, results=results, active_peers_count=mesh_mgr.get_active_peers())
+        # TR: BM25 sıralı FTS5 araması; sadece meta veri okunur, içerik diske dokunulmadan kalır
+        # EN: BM25-ranked FTS5 search; only metadata is read, content stays untouched on disk
+        conn = db.get_read_connection()
+        try: results, total = ghost_search.search(conn, query, page, SEARCH_PAGE_SIZE)
+        finally: conn.close()
+    pages = max(1, (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE)
+    return render_template_string(SEARCH_UI, lang=L, query=query, results=results, total=total, page=page, pages=pages, active_peers_count=mesh_mgr.get_active_peers())
 
 @app.route('/peer_update', methods=['POST'])
 def peer_update():
@@ -1199,6 +1839,41 @@ def peer_update():
 def api_chain_meta():
     return jsonify(blockchain_mgr.get_all_headers())
 
+@app.route('/api/headers')
+def api_headers():
+    # TR: ?locator=h1,h2,... (en yeni önce) veya ?since_index=&since_hash= ; &limit= sayfa boyutu
+    # EN: ?locator=h1,h2,... (newest first) or ?since_index=&since_hash= ; &limit= page size
+    try:
+        since_index = request.args.get('since_index', type=int)
+        limit = request.args.get('limit', MAX_HEADERS_PER_PAGE, type=int)
+        conn = db.get_read_connection()
+        try: page = headers_since(conn, parse_locator(request.args.get('locator')), since_index, request.args.get('since_hash'), limit)
+        finally: conn.close()
+    except Exception as e: return jsonify({'error': str(e)}), 400
+    # TR: Accept ile ikili isteyen eşe sabit düzenli sayfa; kodlanamayan bir hash varsa JSON
+    # EN: A fixed-layout page for peers asking for binary via Accept; JSON if a hash cannot be encoded
+    resp = None
+    if wants_binary(request.accept_mimetypes):
+        try: resp = Response(encode_headers_page(page), mimetype=BINARY_MIME)
+        except ValueError as e: logger.debug(f"Header page sent as JSON: {e}")
+    if resp is None: resp = jsonify(page)
+    resp.vary.add('Accept')
+    return resp
+
+@app.route('/api/blocks')
+def api_blocks():
+    # TR: ?from=&to= (dahil) aralığındaki bloklar, satır başına bir JSON (NDJSON) veya Accept ile ikili kayıtlar olarak akıtılır
+    # EN: Blocks in the inclusive ?from=&to= range, streamed as one JSON object per line (NDJSON) or as binary records via Accept
+    start = request.args.get('from', type=int)
+    end = request.args.get('to', type=int)
+    if start is None or end is None or end < start: return jsonify({'error': 'from/to required'}), 400
+    start, end = clamp_block_range(start, end)
+    if wants_binary(request.accept_mimetypes):
+        resp = Response(iter_blocks_binary(db.get_read_connection, start, end), mimetype=BINARY_MIME)
+    else: resp = Response(iter_blocks_ndjson(db.get_read_connection, start, end), mimetype='application/x-ndjson')
+    resp.vary.add('Accept')
+    return resp
+
 @app.route('/api/block/<block_hash>')
 def api_get_block(block_hash):
     block = blockchain_mgr.get_block_by_hash(block_hash)
@@ -1209,21 +1884,105 @@ def api_get_block(block_hash):
 def api_assets_meta():
     return jsonify(assets_mgr.get_all_assets_meta())
 
+@app.route('/api/assets_changes')
+def api_assets_changes():
+    # TR: ?since=<seq>&limit= ; since'ten sonraki varlık değişiklikleri (ekleme/güncelleme meta verisiyle, silme mezar taşıyla), sayfalı
+    # EN: ?since=<seq>&limit= ; asset changes after since (inserts/updates with metadata, deletes as tombstones), paginated
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', MAX_ASSET_CHANGES_PER_PAGE, type=int)
+    if since < 0 or limit < 1: return jsonify({'error': 'bad since/limit'}), 400
+    return jsonify(assets_mgr.get_changes(since, limit))
+
 @app.route('/api/asset_data/<asset_id>')
 def api_get_asset_data(asset_id):
-    asset = assets_mgr.get_asset_by_id(asset_id)
+    asset = assets_mgr.get_asset_by_id(asset_id, with_content=request.args.get('content', '1') != '0')
     if asset: return jsonify(asset)
     return jsonify({'error': 'Not found'}), 404
 
+@app.route('/api/blob/<content_hash>')
+def api_get_blob(content_hash):
+    if not blob_store.exists(content_hash): return jsonify({'error': 'Not found'}), 404
+    # TR: Hash ile adreslenen içerik değişmez; süresiz önbelleğe alınabilir
+    # EN: Hash-addressed content never changes; it can be cached indefinitely
+    resp = send_file(blob_store.path(content_hash), mimetype='application/octet-stream', conditional=True,
+                     etag=content_hash, max_age=31536000)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
 # YENİ ENDPOINT: İŞLEM ALMA
 @app.route('/api/send_transaction', methods=['POST'])
 def api_send_transaction():
     tx_data = request.get_json()
     if tx_data:
-        blockchain_mgr.receive_transaction(tx_data)
+        try: blockchain_mgr.receive_transaction(tx_data, wait=request.args.get('wait') == '1')
+        except WriteQueueFull: return jsonify({'error': 'busy'}), 503
+        except Exception as e: return jsonify({'error': str(e)}), 400
         return jsonify({'status': 'ok'}), 200
     return jsonify({'error': 'no data'}), 400
 
+@app.route('/api/tx_proof/<tx_id>')
+def api_tx_proof(tx_id):
+    # TR: Onaylanmış işlemin Merkle kapsama yolu; hafif düğüm kendi başlığındaki köke karşı doğrular
+    # EN: Merkle inclusion path of a confirmed transaction; a light node verifies it against the root in its own header
+    conn = db.get_read_connection()
+    try: proof = tx_proof(conn, tx_id)
+    finally: conn.close()
+    if proof is None: return jsonify({'error': 'Not found'}), 404
+    return jsonify(proof)
+
+@app.route('/api/mempool')
+def api_mempool():
+    # TR: Mempool özeti; ?sender= ile o gönderenin bekleyen işlemleri geliş sırasıyla
+    # EN: Mempool summary; with ?sender= that sender's pending transactions in arrival order
+    sender = request.args.get('sender')
+    if sender: return jsonify(blockchain_mgr.mempool.pending_for(sender))
+    return jsonify(blockchain_mgr.mempool.snapshot())
+
+@app.route('/api/snapshot')
+def api_snapshot():
+    # TR: En son anlık görüntünün manifesti (yükseklik, uç hash'i, sha256, boyut)
+    # EN: Manifest of the latest snapshot (height, tip hash, sha256, size)
+    manifest = latest_manifest(SNAPSHOT_DIR)
+    if not manifest: return jsonify({'error': 'Not found'}), 404
+    return jsonify(manifest)
+
+@app.route('/api/snapshot/<int:height>')
+def api_snapshot_file(height):
+    path = os.path.join(SNAPSHOT_DIR, snapshot_name(height))
+    if not os.path.exists(path): return jsonify({'error': 'Not found'}), 404
+    # TR: Belirli bir yükseklikteki dosya değişmez
+    # EN: The file for a given height never changes
+    resp = send_file(path, mimetype='application/gzip', conditional=True, max_age=31536000)
+    resp.cache_control.public = True
+    return resp
+
+@app.route('/api/gossip_stats')
+def api_gossip_stats():
+    # TR: Tekrar filtresi sayaçları (LRU isabetleri, Bloom yanlış pozitifleri) ve giden kuyruk durumu
+    # EN: Duplicate filter counters (LRU hits, Bloom false positives) and outbound queue state
+    outbound = dict(mesh_mgr.outbound.stats, pending=mesh_mgr.outbound.pending())
+    return jsonify({'seen_transactions': blockchain_mgr.seen_tx.snapshot(), 'seen_messages': messenger_mgr.seen.snapshot(), 'outbound': outbound})
+
+@app.route('/api/fork_stats')
+def api_fork_stats():
+    # TR: Çatal seçimi sayaçları (çatallanma, reorg, en derin reorg), bellekteki yan dallar ve doğrulama sayaçları
+    # EN: Fork choice counters (forks, reorgs, deepest reorg), in-memory side branches and validation counters
+    fork_choice = blockchain_mgr.fork_choice
+    return jsonify(dict(fork_choice.stats, side_branches=len(fork_choice.branches), validation=blockchain_mgr.validator.stats))
+
+@app.route('/api/send_transactions', methods=['POST'])
+def api_send_transactions():
+    # TR: İşlem dizisi; hepsi tek DB işleminde uygulanır
+    # EN: Array of transactions; all applied in one DB transaction
+    txs = request.get_json(silent=True)
+    if not isinstance(txs, list) or not txs: return jsonify({'error': 'array required'}), 400
+    if len(txs) > MAX_INBOUND_BATCH: return jsonify({'error': f'max {MAX_INBOUND_BATCH} items'}), 413
+    try: blockchain_mgr.receive_transactions(txs, wait=request.args.get('wait') == '1')
+    except WriteQueueFull: return jsonify({'error': 'busy'}), 503
+    except Exception as e: return jsonify({'error': str(e)}), 400
+    return jsonify({'status': 'ok', 'received': len(txs)}), 200
+
 # --- MESSENGER API ENDPOINTS ---
 @app.route('/api/messenger/friends')
 def api_friends():
@@ -1246,10 +2005,22 @@ def api_chat(friend_key):
 def api_receive_message():
     data = request.get_json()
     if data and data.get('type') == 'message':
-        messenger_mgr.receive_message(data)
+        try: messenger_mgr.receive_message(data, wait=request.args.get('wait') == '1')
+        except WriteQueueFull: return jsonify({'error': 'busy'}), 503
+        except Exception as e: return jsonify({'error': str(e)}), 400
         return jsonify({'status': 'ok'}), 200
     return jsonify({'error': 'invalid data'}), 400
 
+@app.route('/api/messenger/receive_messages', methods=['POST'])
+def api_receive_messages():
+    msgs = request.get_json(silent=True)
+    if not isinstance(msgs, list) or not msgs: return jsonify({'error': 'array required'}), 400
+    if len(msgs) > MAX_INBOUND_BATCH: return jsonify({'error': f'max {MAX_INBOUND_BATCH} items'}), 413
+    try: messenger_mgr.receive_messages(msgs, wait=request.args.get('wait') == '1')
+    except WriteQueueFull: return jsonify({'error': 'busy'}), 503
+    except Exception as e: return jsonify({'error': str(e)}), 400
+    return jsonify({'status': 'ok', 'received': len(msgs)}), 200
+
 @app.route('/api/messenger/send', methods=['POST'])
 def api_send_msg():
     if not session.get('username'): return jsonify({'error': 'Auth required'}), 401
@@ -1260,7 +2031,7 @@ def api_send_msg():
 # --- FEE API ---
 @app.route('/api/get_fees')
 def api_get_fees():
-    conn = db.get_connection()
+    conn = db.get_read_connection()
     fees = conn.execute("SELECT * FROM network_fees").fetchall()
     conn.close()
     return jsonify({row['fee_type']: row['amount'] for row in fees})
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol State Snapshots
+TR: H yüksekliğinde sıkıştırılmış (gzip NDJSON), sha256 sağlamalı durum anlık görüntüsü: bloklar, bakiyeler, varlık meta verisi,
+    ücretler, kontrat durumu ve zincir istatistikleri. Sunucu periyodik üretir; yeni düğüm ilk açılışta yükler ve sadece H sonrasını senkronlar.
+EN: Compressed (gzip NDJSON), sha256-checksummed state snapshot at height H: blocks, balances, asset metadata, fees,
+    contract state and chain statistics. The server produces it periodically; a new node loads it on first start and syncs only past H.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+import requests
+import ghost_search
+from ghost_chain import committed_root
+from ghost_db import CHAIN_STATS_COLUMNS
+
+logger = logging.getLogger("GhostSnapshot")
+
+SNAPSHOT_VERSION = 1
+DEFAULT_EVERY_BLOCKS = 100
+DEFAULT_KEEP = 2
+DEFAULT_CHECK_INTERVAL = 600
+IMPORT_BATCH_ROWS = 2000
+DOWNLOAD_TIMEOUT = 60
+
+# TR: (bölüm, kaynak tablo, sütunlar, koşul). Kullanıcı adı/parola gibi yerel hesap verisi asla dışa aktarılmaz.
+# EN: (section, source table, columns, condition). Local account data such as username/password is never exported.
+SNAPSHOT_SECTIONS = (
+    ('blocks', 'blocks', ('block_index', 'timestamp', 'previous_hash', 'block_hash', 'proof', 'miner_key', 'merkle_root'), "WHERE block_index <= :height ORDER BY block_index"),
+    ('balances', 'users', ('wallet_public_key', 'balance'), ""),
+    ('assets', 'assets', ('asset_id', 'owner_pub_key', 'type', 'name', 'content_hash', 'storage_size', 'creation_time', 'expiry_time', 'keywords'), ""),
+    ('network_fees', 'network_fees', ('fee_type', 'amount'), ""),
+    ('contracts', 'contracts', ('contract_address', 'owner_key', 'code', 'state', 'creation_time'), ""),
+    ('chain_stats', 'chain_stats', CHAIN_STATS_COLUMNS, "WHERE id = 1"),
+)
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone() is not None
+
+def snapshot_name(height):
+    return f"snapshot_{height}.ndjson.gz"
+
+def export_snapshot(conn, out_dir):
+    """
+    TR: Tek okuma işleminde (tutarlı görünüm) uçtaki yüksekliğin anlık görüntüsünü yazar; manifest döner.
+        Dosya geçici adla yazılır, sağlaması alınır ve atomik olarak yeniden adlandırılır.
+    EN: Writes a snapshot of the tip height inside one read transaction (consistent view); returns the manifest.
+        The file is written under a temporary name, checksummed and atomically renamed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    conn.execute("BEGIN")
+    try:
+        tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+        height = tip['block_index']
+        sections = [s for s in SNAPSHOT_SECTIONS if _table_exists(conn, s[1])]
+        header = {'version': SNAPSHOT_VERSION, 'height': height, 'tip_hash': tip['block_hash'], 'created_at': time.time(),
+                  'sections': {name: list(columns) for name, _, columns, _ in sections}}
+        path = os.path.join(out_dir, snapshot_name(height))
+        tmp_path = path + ".tmp"
+        rows = 0
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(json.dumps(header, separators=(',', ':')) + "\n")
+            for name, table, columns, where in sections:
+                cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} {where}", {'height': height})
+                while True:
+                    batch = cursor.fetchmany(IMPORT_BATCH_ROWS)
+                    if not batch: break
+                    f.write("".join(json.dumps([name, list(r)], separators=(',', ':')) + "\n" for r in batch))
+                    rows += len(batch)
+    finally:
+        conn.execute("ROLLBACK")
+    digest = hashlib.sha256()
+    with open(tmp_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''): digest.update(chunk)
+    os.replace(tmp_path, path)
+    manifest = {'version': SNAPSHOT_VERSION, 'height': height, 'tip_hash': tip['block_hash'], 'created_at': header['created_at'],
+                'file': snapshot_name(height), 'size': os.path.getsize(path), 'sha256': digest.hexdigest(), 'rows': rows}
+    with open(path + ".json", 'w') as f: json.dump(manifest, f)
+    return manifest
+
+def list_manifests(out_dir):
+    manifests = []
+    if not os.path.isdir(out_dir): return manifests
+    for fname in os.listdir(out_dir):
+        if not fname.endswith(".ndjson.gz.json"): continue
+        try:
+            with open(os.path.join(out_dir, fname)) as f: manifests.append(json.load(f))
+        except (OSError, ValueError): continue
+    return sorted(manifests, key=lambda m: m['height'], reverse=True)
+
+def latest_manifest(out_dir):
+    manifests = list_manifests(out_dir)
+    return manifests[0] if manifests else None
+
+def prune_snapshots(out_dir, keep=DEFAULT_KEEP):
+    for manifest in list_manifests(out_dir)[keep:]:
+        path = os.path.join(out_dir, manifest['file'])
+        for p in (path, path + ".json"):
+            try: os.remove(p)
+            except OSError: pass
+
+class SnapshotPublisher:
+    """
+    TR: Uç son anlık görüntüden en az every_blocks ilerlediyse yenisini üretir; en yeni keep dosya tutulur.
+    EN: Produces a new snapshot once the tip is at least every_blocks past the last one; the newest keep files are kept.
+    """
+    def __init__(self, get_conn, out_dir, every_blocks=DEFAULT_EVERY_BLOCKS, keep=DEFAULT_KEEP, interval=DEFAULT_CHECK_INTERVAL):
+        self.get_conn = get_conn
+        self.out_dir = out_dir
+        self.every_blocks = every_blocks
+        self.keep = keep
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def maybe_publish(self, force=False):
+        with self._lock:
+            last = latest_manifest(self.out_dir)
+            conn = self.get_conn()
+            try:
+                tip = conn.execute("SELECT MAX(block_index) FROM blocks").fetchone()[0]
+                last_height = last['height'] if last else 0
+                if tip == last_height or (not force and tip - last_height < self.every_blocks): return None
+                started = time.time()
+                manifest = export_snapshot(conn, self.out_dir)
+            finally: conn.close()
+            prune_snapshots(self.out_dir, self.keep)
+            logger.info(f"Snapshot at height {manifest['height']} published: {manifest['size']} bytes, {manifest['rows']} rows ({time.time() - started:.2f}s)")
+            return manifest
+
+    def run_forever(self):
+        while True:
+            try: self.maybe_publish()
+            except Exception as e: logger.error(f"Snapshot failed: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        threading.Thread(target=self.run_forever, name="ghost-snapshot", daemon=True).start()
+
+def fetch_manifest(base_url, timeout=5):
+    # TR: Eşin son manifesti; eş anlık görüntü sunmuyorsa (404, henüz üretilmedi) veya sürüm farklıysa None
+    # EN: The peer's latest manifest; None if the peer offers no snapshot (404, none produced yet) or the version differs
+    resp = requests.get(f"{base_url}/api/snapshot", timeout=timeout)
+    if resp.status_code != 200: return None
+    manifest = resp.json()
+    return manifest if manifest.get('version') == SNAPSHOT_VERSION else None
+
+def download_snapshot(base_url, dest_dir, timeout=DOWNLOAD_TIMEOUT, manifest=None):
+    """
+    TR: Eşin son manifestini alır (verilmediyse), dosyayı diske akıtırken sha256'sını hesaplar. Uyuşmazsa dosya silinir.
+        (yol, manifest) veya eş desteklemiyorsa None döner.
+    EN: Fetches the peer's latest manifest (unless given) and streams the file to disk while hashing it. On mismatch the file
+        is deleted. Returns (path, manifest), or None if the peer does not offer snapshots.
+    """
+    if manifest is None: manifest = fetch_manifest(base_url, min(timeout, 5))
+    if manifest is None: return None
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, snapshot_name(int(manifest['height'])))
+    digest = hashlib.sha256()
+    with requests.get(f"{base_url}/api/snapshot/{manifest['height']}", stream=True, timeout=timeout) as f_resp:
+        f_resp.raise_for_status()
+        with open(path + ".part", 'wb') as f:
+            for chunk in f_resp.iter_content(chunk_size=65536):
+                digest.update(chunk)
+                f.write(chunk)
+    if digest.hexdigest() != manifest['sha256']:
+        os.remove(path + ".part")
+        raise ValueError(f"snapshot checksum mismatch at height {manifest['height']}")
+    os.replace(path + ".part", path)
+    return path, manifest
+
+def _local_columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+def import_snapshot(conn, path, validator, expected_height=None):
+    """
+    TR: Anlık görüntüyü çağıranın yazma işleminde uygular; herhangi bir hata tümünü geri aldırır (çağıran raise ile ROLLBACK eder).
+        Bloklar sayfa sayfa BlockValidator'dan geçer (bağ + PoW). Yerelde olmayan tablolar (ör. düğümde contracts) atlanır;
+        bakiyeler sadece yerelde var olan cüzdanlara yazılır: düğümün users tablosu yerel hesap listesidir (ilk satır düğümün kendi
+        hesabı, kayıt cüzdan anahtarını türetir), diğer cüzdanlar için satır açılmaz. Yeni bir düğümde sadece kendi hesabı ve hazine
+        bakiye alır; counts['balances'] gerçekten yazılan sayıdır. chain_stats en son yazılır (tetikleyici artışlarının üzerine).
+    EN: Applies the snapshot inside the caller's write transaction; any error rolls all of it back (the caller ROLLBACKs on raise).
+        Blocks go through the BlockValidator page by page (linkage + PoW). Tables missing locally (e.g. contracts on the node) are skipped.
+        Balances are only written to wallets that exist locally: the node's users table is its local account list (the first row is
+        the node's own account, registration derives the wallet key), so no rows are created for other wallets. On a fresh node
+        only the node's own account and the treasury get a balance; counts['balances'] is the number actually written.
+        chain_stats is written last (over the trigger increments).
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != SNAPSHOT_VERSION: raise ValueError(f"unsupported snapshot version {header.get('version')}")
+        if expected_height is not None and header['height'] != expected_height: raise ValueError("snapshot height does not match manifest")
+        sections = header['sections']
+        local = {name: _local_columns(conn, name) for name in ('blocks', 'users', 'assets', 'network_fees', 'contracts', 'chain_stats')
+                 if _table_exists(conn, name)}
+        pending, counts, stats = {}, {}, None
+
+        def flush(name):
+            rows = pending.pop(name, [])
+            if not rows: return
+            columns = sections[name]
+            if name == 'blocks':
+                blocks = [dict(zip(columns, r)) for r in rows]
+                new_blocks, known, error = validator.validate(conn, blocks)
+                if error or known + len(new_blocks) != len(blocks): raise ValueError(f"snapshot block range invalid: {error}")
+                # TR: Sadece blok hash'ine bağlı kökler saklanır (hafif ödeme doğrulaması bunlara güvenir)
+                # EN: Only roots bound to the block hash are kept (light payment verification trusts them)
+                rows = [tuple(committed_root(b) if c == 'merkle_root' else b[c] for c in columns) for b in new_blocks]
+                sql = f"INSERT INTO blocks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            elif name == 'balances':
+                if 'users' not in local: return
+                cur = conn.executemany("UPDATE users SET balance = ? WHERE wallet_public_key = ?", [(r[1], r[0]) for r in rows])
+                counts[name] = counts.get(name, 0) + cur.rowcount
+                return
+            else:
+                if name not in local: return
+                keep = [i for i, c in enumerate(columns) if c in local[name]]
+                rows = [tuple(r[i] for i in keep) for r in rows]
+                cols = [columns[i] for i in keep]
+                sql = f"INSERT OR REPLACE INTO {name} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+                if name == 'assets':
+                    a = {c: i for i, c in enumerate(cols)}
+                    for r in rows: ghost_search.index_asset(conn, r[a['asset_id']], r[a['name']], r[a.get('keywords', a['name'])], r[a['type']], None)
+            conn.executemany(sql, rows)
+            counts[name] = counts.get(name, 0) + len(rows)
+
+        for line in f:
+            name, row = json.loads(line)
+            if name not in sections: continue
+            if name == 'chain_stats':
+                stats = row
+                continue
+            pending.setdefault(name, []).append(row)
+            if len(pending[name]) >= IMPORT_BATCH_ROWS: flush(name)
+        for name in list(pending): flush(name)
+        tip = conn.execute("SELECT block_index, block_hash FROM blocks ORDER BY block_index DESC LIMIT 1").fetchone()
+        if tip['block_index'] != header['height'] or tip['block_hash'] != header['tip_hash']:
+            raise ValueError("snapshot tip does not match its header")
+        if stats is not None and 'chain_stats' in local:
+            columns = sections['chain_stats']
+            conn.execute(f"UPDATE chain_stats SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = 1", tuple(stats))
+    return header, counts
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+GhostProtocol Binary Wire Format
+TR: Blok başlıkları için sabit düzenli ikili kodlama (struct). Senkronizasyon uç noktaları Accept başlığına göre bunu veya JSON'u döner;
+    JSON her zaman geri dönüş biçimidir. Hash'ler 64 karakter hex yerine 32 ham bayttır.
+EN: Fixed-layout binary encoding (struct) for block headers. The sync endpoints return it or JSON depending on the Accept header;
+    JSON is always the fallback. Hashes are 32 raw bytes instead of 64 hex characters.
+"""
+import math
+import struct
+import logging
+
+logger = logging.getLogger("GhostWire")
+
+BINARY_MIME = 'application/octet-stream'
+# TR: İstemci ikiliyi tercih eder, JSON'u da kabul eder; eski sunucular Accept'i yok sayar ve JSON döner
+# EN: The client prefers binary and still accepts JSON; old servers ignore Accept and answer JSON
+ACCEPT_BINARY = f'{BINARY_MIME}, application/json;q=0.5'
+
+# TR: Başlık sayfası: sihirli sayı, çatallanma indeksi, uç indeksi, uç hash'i, devamı var mı, kayıt sayısı
+# EN: Header page: magic, fork index, tip index, tip hash, more flag, record count
+PAGE_MAGIC = b'GHH1'
+PAGE_STRUCT = struct.Struct('>4sQQ32s?I')
+# TR: Kısa başlık (/api/headers): indeks, hash, önceki hash — 72 bayt
+# EN: Short header (/api/headers): index, hash, previous hash — 72 bytes
+HEADER_STRUCT = struct.Struct('>Q32s32s')
+# TR: Tam başlık (/api/blocks): indeks, zaman, hash, önceki hash, kanıt, Merkle kökü, madenci anahtarı uzunluğu + UTF-8 anahtar.
+#     GHB1 (kök yok) akışları hâlâ çözülür.
+# EN: Full header (/api/blocks): index, timestamp, hash, previous hash, proof, Merkle root, miner key length + UTF-8 key.
+#     GHB1 (no root) streams are still decoded.
+BLOCKS_MAGIC = b'GHB2'
+BLOCK_STRUCT = struct.Struct('>Qd32s32sq32sH')
+BLOCKS_V1_MAGIC = b'GHB1'
+BLOCK_V1_STRUCT = struct.Struct('>Qd32s32sqH')
+# TR: Genesis'in previous_hash'i '0' ve kökü olmayan bloklar sıfır baytlarla kodlanır
+# EN: Genesis has previous_hash '0'; it and a missing root are encoded as zero bytes
+ZERO_HASH = b'\x00' * 32
+
+def wants_binary(accept_mimetypes):
+    # TR: Sadece açıkça istenirse; */* (requests varsayılanı) JSON alır
+    # EN: Only when asked for explicitly; */* (the requests default) gets JSON
+    quality = dict(accept_mimetypes)
+    return quality.get(BINARY_MIME, 0) > 0 and quality.get(BINARY_MIME, 0) >= quality.get('application/json', 0)
+
+def is_binary(resp):
+    return resp.headers.get('Content-Type', '').split(';')[0].strip() == BINARY_MIME
+
+def encode_hash(value):
+    if value == '0': return ZERO_HASH
+    if not isinstance(value, str): raise ValueError(f"not a hash: {value!r}")
+    raw = bytes.fromhex(value)
+    if len(raw) != 32: raise ValueError(f"not a 32-byte hash: {value!r}")
+    return raw
+
+def decode_hash(raw):
+    return '0' if raw == ZERO_HASH else raw.hex()
+
+def encode_headers_page(page):
+    """
+    TR: headers_since() sonucunu ikili sayfaya çevirir. Hash'i 32 bayta sığmayan bir satır ValueError fırlatır (çağıran JSON'a döner).
+    EN: Turns a headers_since() result into a binary page. A row whose hash does not fit 32 bytes raises ValueError (the caller falls back to JSON).
+    """
+    try:
+        parts = [PAGE_STRUCT.pack(PAGE_MAGIC, page['fork_index'], page['tip_index'], encode_hash(page['tip_hash'] or '0'),
+                                  page['more'], len(page['headers']))]
+        parts.extend(HEADER_STRUCT.pack(h['block_index'], encode_hash(h['block_hash']), encode_hash(h['previous_hash'])) for h in page['headers'])
+    except struct.error as e: raise ValueError(str(e))
+    return b''.join(parts)
+
+def decode_headers_page(data):
+    if len(data) < PAGE_STRUCT.size: raise ValueError("truncated header page")
+    magic, fork_index, tip_index, tip_hash, more, count = PAGE_STRUCT.unpack_from(data, 0)
+    if magic != PAGE_MAGIC: raise ValueError("bad header page magic")
+    if len(data) != PAGE_STRUCT.size + count * HEADER_STRUCT.size: raise ValueError("header page size mismatch")
+    headers = [{'block_index': index, 'block_hash': block_hash.hex(), 'previous_hash': decode_hash(previous_hash)}
+               for index, block_hash, previous_hash in HEADER_STRUCT.iter_unpack(memoryview(data)[PAGE_STRUCT.size:])]
+    return {'fork_index': fork_index, 'headers': headers, 'more': more, 'tip_index': tip_index,
+            'tip_hash': decode_hash(tip_hash) if tip_index else None}
+
+def encode_block(block):
+    # TR: block bir dict veya sqlite3.Row olabilir; alan aralık dışındaysa ValueError
+    # EN: block may be a dict or a sqlite3.Row; ValueError when a field is out of range
+    miner_key = (block['miner_key'] or '').encode('utf-8')
+    timestamp = block['timestamp']
+    try:
+        return BLOCK_STRUCT.pack(block['block_index'], math.nan if timestamp is None else timestamp,
+                                 encode_hash(block['block_hash']), encode_hash(block['previous_hash'] or '0'),
+                                 block['proof'] or 0, encode_hash(block['merkle_root'] or '0'), len(miner_key)) + miner_key
+    except struct.error as e: raise ValueError(str(e))
+
+def encode_blocks(blocks):
+    return BLOCKS_MAGIC + b''.join(encode_block(b) for b in blocks)
+
+def decode_blocks(data):
+    """
+    TR: Tam başlık akışını çözer; eksik veya bozuk kayıt ValueError fırlatır.
+    EN: Decodes a full-header stream; a missing or corrupt record raises ValueError.
+    """
+    view = memoryview(data)
+    magic = bytes(view[:4])
+    if magic not in (BLOCKS_MAGIC, BLOCKS_V1_MAGIC): raise ValueError("bad block stream magic")
+    record = BLOCK_STRUCT if magic == BLOCKS_MAGIC else BLOCK_V1_STRUCT
+    blocks, offset, size = [], 4, record.size
+    while offset < len(view):
+        if offset + size > len(view): raise ValueError("truncated block record")
+        if record is BLOCK_STRUCT: index, timestamp, block_hash, previous_hash, proof, root, key_len = record.unpack_from(view, offset)
+        else: (index, timestamp, block_hash, previous_hash, proof, key_len), root = record.unpack_from(view, offset), ZERO_HASH
+        offset += size
+        if offset + key_len > len(view): raise ValueError("truncated miner key")
+        miner_key = bytes(view[offset:offset + key_len]).decode('utf-8')
+        offset += key_len
+        blocks.append({'block_index': index, 'timestamp': None if math.isnan(timestamp) else timestamp, 'previous_hash': decode_hash(previous_hash),
+                       'block_hash': block_hash.hex(), 'proof': proof, 'miner_key': miner_key, 'merkle_root': None if root == ZERO_HASH else root.hex()})
+    return blocks